@@ -0,0 +1,85 @@
+"""
+Background job endpoints, and the helper that runs API work in the job pool.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.schemas.lottery import JobStatusResponse
+from app.services import job_store
+from app.services.job_pool import JobTimeoutError, PoolBusyError, Slot, get_job_pool
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Seconds clients are asked to wait when the job queue is full
+RETRY_AFTER_SECONDS = 5
+
+
+def raise_busy() -> None:
+    """Refuse a request because the job queue is full."""
+    raise HTTPException(
+        status_code=503,
+        detail="Server busy, please retry shortly",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+@contextmanager
+def reserve_pool_slot() -> Iterator[Slot]:
+    """
+    Reserve a job pool slot for the request, or refuse it with a 503.
+    
+    Yields:
+        Slot to pass to run_pool_job
+    """
+    try:
+        with get_job_pool().reserve() as slot:
+            yield slot
+    except PoolBusyError:
+        raise_busy()
+
+
+async def run_pool_job(fn: Callable, *args, slot: Optional[Slot] = None) -> Any:
+    """
+    Run a CPU-heavy job in the job pool on behalf of a request.
+    
+    Args:
+        fn: Job function (see app.services.job_pool)
+        *args: Job arguments
+        slot: Slot from reserve_pool_slot, if one was reserved
+        
+    Returns:
+        The job's result
+        
+    Raises:
+        HTTPException: 503 when the queue is full, 504 on timeout
+    """
+    try:
+        return await get_job_pool().run(fn, *args, slot=slot)
+    except PoolBusyError:
+        raise_busy()
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the status (and, once completed, the result) of a background job.
+    
+    Jobs are stored in the database, so any worker can answer the poll.
+    
+    Args:
+        job_id: Id returned when the job was submitted
+        
+    Returns:
+        Job status
+    """
+    job = await job_store.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
@@ -3,12 +3,17 @@ Lottery API endpoints.
 """
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 
-from app.core.database import get_db
+from app.core.bitmask import matrix_from_masks
+from app.core.database import get_async_db, get_db
+from app.core.http_cache import contest_etag
+from app.api.v1.jobs import reserve_pool_slot, run_pool_job
 from app.models.lottery import LotteryResult
 from app.schemas.lottery import (
     LatestResultResponse,
@@ -17,44 +22,123 @@ from app.schemas.lottery import (
     GenerateSuggestionsResponse,
     HistoryResponse,
     LotteryResultResponse,
+    SearchResponse,
+    SearchResult,
 )
-from app.services.statistics_service import LotteryStatisticsService
-from app.services.strategy_service import LotteryStrategyGenerator
+from app.services.cache_service import (
+    get_cached_async,
+    get_cached_draw_matrix,
+    get_cached_latest_result,
+    get_cached_result_count,
+    get_cached_statistics,
+    get_cached_strategy_plan,
+)
+from app.services.job_pool import generate_suggestions_job, snapshot_of
+from app.services.ticket_scoring import MIN_PRIZE_HITS
 from app.services.rate_limit_service import RateLimitService
 
 router = APIRouter(tags=["lottery"])
 
+SUGGESTION_LIMIT_DETAIL = "Daily suggestion limit reached. Upgrade to Premium for unlimited suggestions."
+
 
-@router.get("/results/latest", response_model=LatestResultResponse)
-async def get_latest_result(db: Session = Depends(get_db)):
+@router.get("/results/latest", response_model=LatestResultResponse, dependencies=[Depends(contest_etag)])
+async def get_latest_result():
     """
     Get the latest lottery result.
     
     Returns:
         Latest lottery result
     """
-    result = db.query(LotteryResult).order_by(desc(LotteryResult.contest_number)).first()
+    result = await get_cached_async("latest_result", get_cached_latest_result)
     
     if not result:
         raise HTTPException(status_code=404, detail="No results found")
     
-    return LatestResultResponse(
-        contest=result.contest_number,
-        date=result.draw_date.isoformat(),
-        numbers=result.numbers
+    return LatestResultResponse(**result)
+
+
+def _validate_numbers(name: str, numbers: List[int]) -> List[int]:
+    """Reject query numbers outside the lottery range."""
+    if not all(1 <= num <= 25 for num in numbers):
+        raise HTTPException(status_code=422, detail=f"{name}: numbers must be between 1 and 25")
+    return numbers
+
+
+@router.get("/results/search", response_model=SearchResponse, dependencies=[Depends(contest_etag)])
+async def search_results(
+    contains: List[int] = Query([], description="Numbers that must all be drawn"),
+    contains_any: List[int] = Query([], description="Numbers of which at least one must be drawn"),
+    excludes: List[int] = Query([], description="Numbers that must not be drawn"),
+    sum_min: Optional[int] = Query(None, ge=0, description="Minimum sum of the drawn numbers"),
+    sum_max: Optional[int] = Query(None, ge=0, description="Maximum sum of the drawn numbers"),
+    even_count: Optional[int] = Query(None, ge=0, le=15, description="Exact number of even numbers"),
+    ticket: List[int] = Query([], description="Ticket to compare the draws with"),
+    min_overlap: Optional[int] = Query(
+        None, ge=1, le=15, description=f"Minimum numbers shared with the ticket (default {MIN_PRIZE_HITS})"
+    ),
+    page_size: int = Query(20, ge=1, le=100, description="Results per page"),
+    before: Optional[int] = Query(None, ge=1, description="Only contests older than this one (cursor)"),
+):
+    """
+    Search contests by drawn numbers, sum, parity and overlap with a ticket.
+    
+    Answered from the cached per-contest feature arrays (masks, sums, even
+    counts), newest first; pass `next_before` as `before` for the next page.
+    
+    Returns:
+        Matching contests and the total number of matches
+    """
+    _validate_numbers("contains", contains)
+    _validate_numbers("contains_any", contains_any)
+    _validate_numbers("excludes", excludes)
+    _validate_numbers("ticket", ticket)
+    if min_overlap is not None and not ticket:
+        raise HTTPException(status_code=422, detail="min_overlap requires a ticket")
+    
+    matrix = await get_cached_async("draw_matrix", get_cached_draw_matrix)
+    selected = matrix.search(
+        contains_all=contains,
+        contains_any=contains_any,
+        excludes=excludes,
+        sum_min=sum_min,
+        sum_max=sum_max,
+        even_count=even_count,
+        ticket=ticket,
+        min_overlap=min_overlap or MIN_PRIZE_HITS
+    )
+    matches = np.flatnonzero(selected)
+    
+    # Rows are in contest order: the cursor is a binary search away
+    if before is not None:
+        matches = matches[:np.searchsorted(matches, np.searchsorted(matrix.contests, before))]
+    page = matches[::-1][:page_size]
+    numbers = matrix_from_masks(matrix.masks[page])
+    
+    return SearchResponse(
+        results=[
+            SearchResult(
+                contest_number=int(matrix.contests[row]),
+                draw_date=matrix.dates[row].item(),
+                numbers=numbers[i].tolist()
+            )
+            for i, row in enumerate(page)
+        ],
+        total=int(selected.sum()),
+        page_size=page_size,
+        next_before=int(matrix.contests[page[-1]]) if len(matches) > page_size else None
     )
 
 
-@router.get("/statistics", response_model=StatisticsResponse)
-async def get_statistics(db: Session = Depends(get_db)):
+@router.get("/statistics", response_model=StatisticsResponse, dependencies=[Depends(contest_etag)])
+async def get_statistics():
     """
     Get comprehensive lottery statistics.
     
     Returns:
         Statistical analysis of lottery data
     """
-    stats_service = LotteryStatisticsService(db)
-    statistics = stats_service.compute_statistics()
+    statistics = await get_cached_async("statistics", get_cached_statistics)
     
     if "error" in statistics:
         raise HTTPException(status_code=404, detail=statistics["error"])
@@ -65,7 +149,7 @@ async def get_statistics(db: Session = Depends(get_db)):
 @router.post("/suggestions", response_model=GenerateSuggestionsResponse)
 async def generate_suggestions(
     request: GenerateSuggestionsRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate lottery number suggestions.
@@ -79,32 +163,40 @@ async def generate_suggestions(
     Returns:
         Generated suggestions with metadata
     """
-    # Check rate limit
     rate_limit_service = RateLimitService(db)
-    can_generate, remaining = rate_limit_service.check_and_increment(request.user_id)
-    
-    if not can_generate:
-        raise HTTPException(
-            status_code=429,
-            detail="Daily suggestion limit reached. Upgrade to Premium for unlimited suggestions."
-        )
-    
-    # Get statistics and history
-    stats_service = LotteryStatisticsService(db)
-    statistics = stats_service.compute_statistics()
     
-    # Check if statistics computation was successful
-    if "error" in statistics:
-        raise HTTPException(status_code=404, detail=statistics["error"])
+    # Refuse users who are out of suggestions before doing any work
+    if await rate_limit_service.get_remaining_count(request.user_id) == 0:
+        raise HTTPException(status_code=429, detail=SUGGESTION_LIMIT_DETAIL)
     
-    history = stats_service.get_history_dataframe()
+    # Hold a job pool slot before loading anything, so a full queue fails fast (503)
+    with reserve_pool_slot() as slot:
+        # Get statistics and history
+        statistics = await get_cached_async("statistics", get_cached_statistics)
+        
+        # Check if statistics computation was successful
+        if "error" in statistics:
+            raise HTTPException(status_code=404, detail=statistics["error"])
+        
+        plan = await get_cached_async("strategy_plan", get_cached_strategy_plan)
+        matrix = await get_cached_async("draw_matrix", get_cached_draw_matrix)
+        
+        # Generate suggestions (CPU-bound: runs in the job pool, whose workers hold the history)
+        suggestions = await run_pool_job(
+            generate_suggestions_job, snapshot_of(matrix), statistics, plan, request.strategy, request.count,
+            slot=slot
+        )
     
-    # Generate suggestions
-    generator = LotteryStrategyGenerator(statistics, history)
-    suggestions = generator.generate_suggestions(request.strategy, request.count)
+    # Only suggestions actually delivered count against the daily limit: a
+    # full queue, a timeout or a failed job cost the user nothing. The
+    # increment is atomic, so concurrent requests that all passed the check
+    # above still can't go past the limit.
+    can_generate, remaining = await rate_limit_service.check_and_increment(request.user_id)
+    if not can_generate:
+        raise HTTPException(status_code=429, detail=SUGGESTION_LIMIT_DETAIL)
     
     # Check if premium
-    is_premium = rate_limit_service.is_premium(request.user_id)
+    is_premium = await rate_limit_service.is_premium(request.user_id)
     
     return GenerateSuggestionsResponse(
         suggestions=suggestions,
@@ -113,51 +205,57 @@ async def generate_suggestions(
     )
 
 
-@router.get("/history", response_model=HistoryResponse)
+@router.get("/history", response_model=HistoryResponse, dependencies=[Depends(contest_etag)])
 async def get_history(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Results per page"),
-    db: Session = Depends(get_db)
+    before: Optional[int] = Query(None, ge=1, description="Only contests older than this one (cursor)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get paginated lottery history.
     
+    Pages can be addressed by number (OFFSET) or, for constant-time deep
+    pages, by cursor: pass the previous response's `next_before` as
+    `before` (the `page` parameter is then ignored).
+    
     Args:
         page: Page number (1-indexed)
         page_size: Number of results per page
+        before: Contest number cursor (keyset pagination)
         
     Returns:
         Paginated lottery results
     """
-    # Get total count
-    total = db.query(LotteryResult).count()
-    
-    # Calculate pagination
-    offset = (page - 1) * page_size
+    # Total count is cached per contest version
+    total = await get_cached_async("result_count", get_cached_result_count)
     total_pages = (total + page_size - 1) // page_size
     
-    # Get results
-    results = (
-        db.query(LotteryResult)
-        .order_by(desc(LotteryResult.contest_number))
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+    query = select(LotteryResult).order_by(desc(LotteryResult.contest_number))
+    if before is not None:
+        query = query.where(LotteryResult.contest_number < before)
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    # One extra row tells whether there is a next page
+    results = (await db.execute(query.limit(page_size + 1))).scalars().all()
+    has_next = len(results) > page_size
+    results = results[:page_size]
     
     return HistoryResponse(
         results=results,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_before=results[-1].contest_number if has_next else None
     )
 
 
-@router.get("/results/{contest_number}", response_model=LotteryResultResponse)
+@router.get("/results/{contest_number}", response_model=LotteryResultResponse, dependencies=[Depends(contest_etag)])
 async def get_result_by_contest(
     contest_number: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get lottery result by contest number.
@@ -168,9 +266,9 @@ async def get_result_by_contest(
     Returns:
         Lottery result for the specified contest
     """
-    result = db.query(LotteryResult).filter(
-        LotteryResult.contest_number == contest_number
-    ).first()
+    result = (await db.execute(
+        select(LotteryResult).where(LotteryResult.contest_number == contest_number)
+    )).scalars().first()
     
     if not result:
         raise HTTPException(status_code=404, detail=f"Contest {contest_number} not found")
@@ -211,7 +309,7 @@ async def trigger_update(db: Session = Depends(get_db)):
 
 
 @router.get("/admin/data-status")
-async def get_data_status(db: Session = Depends(get_db)):
+async def get_data_status(db: AsyncSession = Depends(get_async_db)):
     """
     Check if database is up to date with Caixa API.
     
@@ -224,9 +322,7 @@ async def get_data_status(db: Session = Depends(get_db)):
     from app.services.data.lotofacil_fetcher import get_fetcher
     
     # Get latest from database
-    latest_db = db.query(LotteryResult).order_by(
-        desc(LotteryResult.contest_number)
-    ).first()
+    latest_db_contest = (await db.execute(select(func.max(LotteryResult.contest_number)))).scalar() or 0
     
     # Get latest from API
     fetcher = get_fetcher()
@@ -239,7 +335,6 @@ async def get_data_status(db: Session = Depends(get_db)):
         )
     
     latest_api_contest = latest_api_result.get("numero")
-    latest_db_contest = latest_db.contest_number if latest_db else 0
     
     is_up_to_date = latest_db_contest >= latest_api_contest
     missing_contests = max(0, latest_api_contest - latest_db_contest)
@@ -249,7 +344,6 @@ async def get_data_status(db: Session = Depends(get_db)):
         "latest_in_database": latest_db_contest,
         "latest_in_api": latest_api_contest,
         "missing_contests": missing_contests,
-        "total_contests_in_db": db.query(LotteryResult).count(),
+        "total_contests_in_db": (await db.execute(select(func.count(LotteryResult.id)))).scalar(),
         "last_update_check": datetime.utcnow().isoformat()
     }
-
@@ -3,10 +3,16 @@ Subscription management endpoints.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.schemas.lottery import UpdateSubscriptionRequest, UserSubscriptionStatus
+from app.core.database import get_async_db
+from app.core.security import verify_webhook_secret
+from app.schemas.lottery import (
+    BatchSubscriptionUpdateRequest,
+    BatchSubscriptionUpdateResponse,
+    UpdateSubscriptionRequest,
+    UserSubscriptionStatus,
+)
 from app.services.subscription_service import SubscriptionService
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
@@ -15,7 +21,7 @@ router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 @router.get("/{user_id}", response_model=UserSubscriptionStatus)
 async def get_subscription_status(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get user subscription status.
@@ -27,13 +33,13 @@ async def get_subscription_status(
         User subscription status
     """
     service = SubscriptionService(db)
-    return service.get_subscription(user_id)
+    return await service.get_subscription(user_id)
 
 
 @router.post("/update", response_model=UserSubscriptionStatus)
 async def update_subscription(
     request: UpdateSubscriptionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user subscription status.
@@ -51,13 +57,45 @@ async def update_subscription(
     # For now, this is a simple update endpoint
     
     service = SubscriptionService(db)
-    return service.update_subscription(request)
+    return await service.update_subscription(request)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchSubscriptionUpdateResponse,
+    dependencies=[Depends(verify_webhook_secret)]
+)
+async def update_subscriptions_batch(
+    request: BatchSubscriptionUpdateRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply many subscription events at once (e.g. a RevenueCat webhook replay).
+    
+    Events are collapsed to the latest state per user and applied in a
+    single transaction. Requires the webhook secret in the Authorization
+    header (REVENUECAT_WEBHOOK_SECRET).
+    
+    Args:
+        request: Batch of subscription events
+        
+    Returns:
+        Number of events received and the resulting status per user
+    """
+    service = SubscriptionService(db)
+    results = await service.apply_events(request.events)
+    
+    return BatchSubscriptionUpdateResponse(
+        received=len(request.events),
+        users_updated=len(results),
+        results=results
+    )
 
 
 @router.delete("/{user_id}", response_model=UserSubscriptionStatus)
 async def cancel_subscription(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cancel user subscription.
@@ -69,4 +107,4 @@ async def cancel_subscription(
         Updated subscription status
     """
     service = SubscriptionService(db)
-    return service.cancel_subscription(user_id)
+    return await service.cancel_subscription(user_id)
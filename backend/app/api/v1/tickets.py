@@ -0,0 +1,66 @@
+"""
+Ticket scoring endpoints.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.api.v1.jobs import raise_busy, run_pool_job
+from app.schemas.lottery import TicketScore, TicketScoreRequest, TicketScoreResponse
+from app.services.cache_service import get_cached_async, get_cached_draw_matrix
+from app.services.job_pool import PoolBusyError, get_job_pool, score_tickets_job, snapshot_of
+from app.services.ticket_scoring import score_against_draw, tickets_to_masks
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+
+@router.post("/score", response_model=TicketScoreResponse)
+async def score_tickets(request: TicketScoreRequest):
+    """
+    Score tickets against the draw history ("check my tickets").
+    
+    With `contest`, returns each ticket's hits in that contest. Without it,
+    returns how many past draws each ticket would have hit 11 to 15 times;
+    that runs in the job pool, or as a background job with `background`
+    (202 with the job id to poll at /jobs/{job_id}).
+    
+    Args:
+        request: Tickets and optional contest number
+        
+    Returns:
+        Score of every ticket, in request order
+    """
+    matrix = await get_cached_async("draw_matrix", get_cached_draw_matrix)
+    if len(matrix) == 0:
+        raise HTTPException(status_code=404, detail="No results found")
+    
+    ticket_masks = tickets_to_masks(request.tickets)
+    
+    if request.contest is not None:
+        row = matrix.index_of(request.contest)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Contest {request.contest} not found")
+        
+        hits = score_against_draw(ticket_masks, matrix.masks[row]).tolist()
+        return TicketScoreResponse(
+            contest=request.contest,
+            contests_scored=1,
+            scores=[TicketScore(numbers=ticket, hits=h) for ticket, h in zip(request.tickets, hits)]
+        )
+    
+    snapshot = snapshot_of(matrix)
+    if request.background:
+        try:
+            # The job already renders its result as JSON
+            job = await run_in_threadpool(
+                get_job_pool().submit_job, "ticket_score", score_tickets_job, snapshot, request.tickets, encode=str
+            )
+        except PoolBusyError:
+            raise_busy()
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+    
+    # CPU-bound for large requests: scored and rendered in the job pool, off the event loop
+    content = await run_pool_job(score_tickets_job, snapshot, request.tickets)
+    return Response(content=content, media_type="application/json")
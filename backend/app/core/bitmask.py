@@ -0,0 +1,93 @@
+"""
+Bitmask encoding of drawn number sets.
+
+Lotofácil numbers are 1-25, so a draw (or ticket) fits in a 32-bit mask
+with bit ``n - 1`` set for each number ``n``. Set operations become
+bitwise operations: ``popcount(a & b)`` is the number of hits.
+"""
+
+from typing import Iterable, List
+
+import numpy as np
+
+# Lookup table for popcount on NumPy versions without np.bitwise_count
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def numbers_to_mask(numbers: Iterable[int]) -> int:
+    """
+    Encode numbers as a bitmask.
+    
+    Args:
+        numbers: Numbers between 1 and 32
+        
+    Returns:
+        Mask with bit (n - 1) set for each number n
+    """
+    mask = 0
+    for number in numbers:
+        mask |= 1 << (int(number) - 1)
+    return mask
+
+
+def mask_to_numbers(mask: int) -> List[int]:
+    """
+    Decode a bitmask into its sorted numbers.
+    
+    Args:
+        mask: Bitmask from numbers_to_mask
+        
+    Returns:
+        Sorted list of numbers
+    """
+    mask = int(mask)
+    return [bit + 1 for bit in range(32) if mask >> bit & 1]
+
+
+def masks_from_matrix(numbers: np.ndarray) -> np.ndarray:
+    """
+    Vectorized numbers_to_mask over a (rows x numbers) matrix.
+    
+    Args:
+        numbers: Integer array of shape (n, k) with numbers between 1 and 32
+        
+    Returns:
+        uint32 array of n masks
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    bits = np.left_shift(np.uint64(1), (numbers - 1).astype(np.uint64))
+    return np.bitwise_or.reduce(bits, axis=1).astype(np.uint32)
+
+
+def matrix_from_masks(masks: np.ndarray, width: int = 15) -> np.ndarray:
+    """
+    Vectorized mask_to_numbers for masks with exactly `width` bits set.
+    
+    Args:
+        masks: uint32 array of n masks
+        width: Numbers per mask
+        
+    Returns:
+        int16 array of shape (n, width), sorted per row
+    """
+    masks = np.asarray(masks, dtype=np.uint32)
+    bits = (masks[:, None] >> np.arange(32, dtype=np.uint32)) & 1
+    _, positions = np.nonzero(bits)
+    return (positions + 1).astype(np.int16).reshape(len(masks), width)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """
+    Count set bits of each uint32 element.
+    
+    Args:
+        values: uint32 array
+        
+    Returns:
+        uint8 array of bit counts, same shape as values
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (4,))
+    return _POPCOUNT_8[as_bytes].sum(axis=-1, dtype=np.uint8)
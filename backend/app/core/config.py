@@ -6,7 +6,7 @@ This module handles all application settings using Pydantic Settings.
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -40,6 +40,21 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_suggestions_per_day: int = Field(default=3, alias="RATE_LIMIT_SUGGESTIONS_PER_DAY")
     rate_limit_premium_unlimited: bool = Field(default=True, alias="RATE_LIMIT_PREMIUM_UNLIMITED")
+    # Subscription status cache (premium checks); updates invalidate it
+    subscription_cache_ttl_seconds: int = Field(default=60, alias="SUBSCRIPTION_CACHE_TTL_SECONDS")
+    subscription_cache_max_entries: int = Field(default=50_000, alias="SUBSCRIPTION_CACHE_MAX_ENTRIES")
+    # Where free-tier usage is counted: "database" (atomic upsert per request),
+    # "memory" (single worker) or "redis" (shared, uses REDIS_URL)
+    rate_limit_backend: str = Field(default="database", alias="RATE_LIMIT_BACKEND")
+    rate_limit_window_seconds: int = Field(default=86400, alias="RATE_LIMIT_WINDOW_SECONDS")
+    rate_limit_flush_interval_seconds: float = Field(default=10, alias="RATE_LIMIT_FLUSH_INTERVAL_SECONDS")
+    
+    # Usage retention: daily rows older than this are rolled up into monthly rows
+    usage_retention_days: int = Field(default=90, alias="USAGE_RETENTION_DAYS")
+    usage_retention_batch_size: int = Field(default=5000, alias="USAGE_RETENTION_BATCH_SIZE")
+    usage_retention_hour: int = Field(default=4, alias="USAGE_RETENTION_HOUR")
+    # Partitions created ahead of time when the usage table is partitioned (PostgreSQL)
+    usage_partition_months_ahead: int = Field(default=3, alias="USAGE_PARTITION_MONTHS_AHEAD")
     
     # Lottery Configuration
     lottery_min_number: int = Field(default=1, alias="LOTTERY_MIN_NUMBER")
@@ -52,6 +67,18 @@ class Settings(BaseSettings):
     # Strategy generation settings
     default_suggestions_count: int = Field(default=3, alias="DEFAULT_SUGGESTIONS_COUNT")
     recent_draws_window: int = Field(default=10, alias="RECENT_DRAWS_WINDOW")
+    # "pandas" (from the loaded history) or "sql" (aggregate queries in the database)
+    statistics_backend: str = Field(default="pandas", alias="STATISTICS_BACKEND")
+    # Publish the draw matrix as memory-mapped files in data/processed, shared by all workers
+    shared_draw_matrix_enabled: bool = Field(default=True, alias="SHARED_DRAW_MATRIX_ENABLED")
+    
+    # Process pool for CPU-heavy jobs (suggestions, ticket scoring); 0 runs them in a thread
+    process_pool_workers: int = Field(default=2, alias="PROCESS_POOL_WORKERS")
+    # Jobs queued or running before requests get a 503
+    process_pool_max_pending: int = Field(default=32, alias="PROCESS_POOL_MAX_PENDING")
+    process_pool_job_timeout_seconds: float = Field(default=30, alias="PROCESS_POOL_JOB_TIMEOUT_SECONDS")
+    # How long finished background jobs (and their results) stay available for polling
+    process_pool_job_ttl_seconds: int = Field(default=3600, alias="PROCESS_POOL_JOB_TTL_SECONDS")
     
     @property
     def raw_data_dir(self) -> Path:
@@ -67,6 +94,13 @@ class Settings(BaseSettings):
         path.mkdir(parents=True, exist_ok=True)
         return path
     
+    @property
+    def history_log_dir(self) -> Path:
+        """Get history log directory path (durable data, unlike processed)."""
+        path = self.data_dir / "history"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+    
     @property
     def lottery_history_file(self) -> Path:
         """Get default lottery history file path."""
@@ -82,8 +116,30 @@ class Settings(BaseSettings):
     
     # Scheduler
     scheduler_enabled: bool = Field(default=True, alias="SCHEDULER_ENABLED")
-    scheduler_update_hour: int = Field(default=22, alias="SCHEDULER_UPDATE_HOUR")
-    scheduler_update_minute: int = Field(default=0, alias="SCHEDULER_UPDATE_MINUTE")
+    # Polling starts at this time on draw days (draws happen at 20:00 Brasília time)
+    scheduler_update_hour: int = Field(default=20, alias="SCHEDULER_UPDATE_HOUR")
+    scheduler_update_minute: int = Field(default=15, alias="SCHEDULER_UPDATE_MINUTE")
+    scheduler_draw_days: str = Field(default="mon-sat", alias="SCHEDULER_DRAW_DAYS")
+    scheduler_timezone: str = Field(default="America/Sao_Paulo", alias="SCHEDULER_TIMEZONE")
+    
+    # Draw polling backoff (bounded number of upstream calls per draw)
+    poll_initial_delay_seconds: float = Field(default=60, alias="POLL_INITIAL_DELAY_SECONDS")
+    poll_backoff_factor: float = Field(default=2.0, alias="POLL_BACKOFF_FACTOR")
+    poll_max_delay_seconds: float = Field(default=900, alias="POLL_MAX_DELAY_SECONDS")
+    poll_max_attempts: int = Field(default=16, alias="POLL_MAX_ATTEMPTS")
+    
+    # Startup
+    startup_sync_enabled: bool = Field(default=True, alias="STARTUP_SYNC_ENABLED")
+    # Schema initialization is retried with backoff until the database is reachable
+    startup_db_retry_initial_seconds: float = Field(default=1, alias="STARTUP_DB_RETRY_INITIAL_SECONDS")
+    startup_db_retry_max_seconds: float = Field(default=60, alias="STARTUP_DB_RETRY_MAX_SECONDS")
+    
+    # Multi-worker coordination
+    leader_election_interval_seconds: int = Field(default=60, alias="LEADER_ELECTION_INTERVAL_SECONDS")
+    contest_version_ttl_seconds: int = Field(default=30, alias="CONTEST_VERSION_TTL_SECONDS")
+    
+    # HTTP caching of contest-versioned endpoints (ETag + Cache-Control)
+    http_cache_max_age_seconds: int = Field(default=60, alias="HTTP_CACHE_MAX_AGE_SECONDS")
     
     # Caixa API
     caixa_api_base_url: str = Field(
@@ -91,6 +147,17 @@ class Settings(BaseSettings):
         alias="CAIXA_API_BASE_URL"
     )
     
+    # Fetcher transport: "live" (network), "record" (network + save fixtures)
+    # or "replay" (serve saved fixtures offline)
+    fetcher_mode: str = Field(default="live", alias="FETCHER_MODE")
+    fetcher_fixtures_dir: Path = Field(
+        default_factory=lambda: Path(__file__).parent.parent.parent / "data" / "fixtures" / "upstream",
+        alias="FETCHER_FIXTURES_DIR"
+    )
+    # Replay fault injection, per host ("*" for all hosts)
+    replay_latency_seconds: Dict[str, float] = Field(default_factory=dict, alias="REPLAY_LATENCY_SECONDS")
+    replay_errors: Dict[str, int] = Field(default_factory=dict, alias="REPLAY_ERRORS")
+    
     # RevenueCat
     revenuecat_api_key: str | None = Field(default=None, alias="REVENUECAT_API_KEY")
     revenuecat_webhook_secret: str | None = Field(default=None, alias="REVENUECAT_WEBHOOK_SECRET")
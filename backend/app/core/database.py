@@ -1,12 +1,27 @@
 """
 Database configuration and session management.
+
+Two engines share the same database:
+
+- `engine` / `SessionLocal` (sync): schema setup, ingestion, scheduler jobs,
+  scripts and the contest cache computations, which run in worker threads
+- `async_engine` / `AsyncSessionLocal`: request handlers, through the
+  `get_async_db` dependency, so queries never block the event loop
 """
 
+from typing import Any, Callable
+
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.sql_bitmask import register_sqlite_functions
 
 # Create database engine
 engine = create_engine(
@@ -19,10 +34,72 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(database_url: str) -> str:
+    """
+    Map a sync database URL to its async driver (asyncpg / aiosqlite).
+    
+    Args:
+        database_url: URL used by the sync engine
+        
+    Returns:
+        URL for create_async_engine
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+        # asyncpg takes "ssl" where libpq takes "sslmode"
+        if "sslmode" in url.query:
+            query = dict(url.query)
+            query["ssl"] = query.pop("sslmode")
+            url = url.set(query=query)
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    
+    return url.render_as_string(hide_password=False)
+
+
+# Create async engine (request handlers)
+async_engine = create_async_engine(
+    to_async_url(settings.database_url),
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10,
+)
+
+# SQL bit_count() for bitmask queries (registered per connection on SQLite)
+register_sqlite_functions(engine)
+register_sqlite_functions(async_engine.sync_engine)
+
+# Create async session factory; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 # Base class for models
 Base = declarative_base()
 
 
+def init_db():
+    """
+    Create database tables for all registered models.
+    
+    Called from the application lifespan (off the import path) so that
+    importing the app never blocks on the database. Serialized across
+    worker processes with a shared lock so concurrent workers don't race
+    on CREATE TABLE or on the schema upgrades in app.core.migrations.
+    """
+    from app.core.locks import create_lock
+    from app.core.migrations import run_migrations
+    # Import models so they are registered on Base.metadata
+    from app.models import lottery  # noqa: F401
+    
+    with create_lock("schema"):
+        Base.metadata.create_all(bind=engine)
+        # Bring tables created by older versions up to the current models
+        run_migrations(engine)
+
+
 def get_db():
     """
     Dependency for getting database sessions.
@@ -35,3 +112,52 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Rows per multi-row INSERT (keeps bound parameters under SQLite's and asyncpg's limits)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def dialect_insert(db):
+    """
+    INSERT construct with ON CONFLICT support for the session's database.
+    
+    Args:
+        db: Sync or async session
+        
+    Returns:
+        The PostgreSQL or SQLite `insert` function
+    """
+    return postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+
+
+async def get_async_db():
+    """
+    Dependency for getting async database sessions.
+    
+    Yields:
+        Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking database/CPU work in the threadpool with its own sync session.
+    
+    Args:
+        fn: Function taking a sync Session as first argument
+        *args, **kwargs: Extra arguments for fn
+        
+    Returns:
+        fn's return value
+    """
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+    
+    return await run_in_threadpool(call)
@@ -0,0 +1,74 @@
+"""
+HTTP caching for endpoints whose responses only change with a new contest.
+
+Such endpoints declare the `contest_etag` dependency. Their ETag is derived
+from the contest version kept by the in-process contest cache, so a request
+carrying a matching If-None-Match is answered with 304 before the endpoint
+runs: no query, no statistics. Cache-Control lets a reverse proxy or CDN
+serve repeats for a short while on its own.
+"""
+
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.config import settings
+
+
+def make_etag(version: Tuple[int, int]) -> str:
+    """Strong ETag for a contest version (latest contest, result count)."""
+    latest, count = version
+    return f'"contest-{latest}-{count}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+    
+    Args:
+        if_none_match: Raw header value (may list several tags, or be "*")
+        etag: Current ETag
+        
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def cache_headers(etag: str) -> dict:
+    """Response headers for a contest-versioned resource."""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age_seconds}",
+    }
+
+
+async def contest_etag(request: Request, response: Response) -> str:
+    """
+    Dependency: answer 304 for current client copies, else add cache headers.
+    
+    The contest version is only re-read from the database when it is older
+    than CONTEST_VERSION_TTL_SECONDS, so most 304s never touch it.
+    
+    Raises:
+        HTTPException: 304 Not Modified when If-None-Match matches.
+    
+    Returns:
+        The ETag of the current contest version
+    """
+    # Imported here: cache_service pulls in the analysis services
+    from app.services.cache_service import get_contest_version_async
+    
+    etag = make_etag(await get_contest_version_async())
+    headers = cache_headers(etag)
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return etag
@@ -0,0 +1,202 @@
+"""
+Inter-process locks.
+
+Used to coordinate the gunicorn workers (and any other process sharing the
+same database): a Postgres advisory lock in production and a file lock as
+the stand-in when running against SQLite.
+"""
+
+import fcntl
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+
+
+class ProcessLock(ABC):
+    """Base class for named locks shared between processes."""
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    @property
+    @abstractmethod
+    def is_held(self) -> bool:
+        """Whether this instance currently holds the lock."""
+    
+    @abstractmethod
+    def acquire(self, blocking: bool = False) -> bool:
+        """
+        Acquire the lock.
+        
+        Args:
+            blocking: Wait until the lock is available instead of giving up
+            
+        Returns:
+            True if the lock is now held by this instance
+        """
+    
+    @abstractmethod
+    def release(self) -> None:
+        """Release the lock if held."""
+    
+    def __enter__(self):
+        self.acquire(blocking=True)
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+
+class PostgresAdvisoryLock(ProcessLock):
+    """
+    Session-level Postgres advisory lock.
+    
+    The lock lives as long as the dedicated connection it was taken on, so
+    it is released automatically if the holding process dies. It is also
+    lost, without notice, if that connection drops (database restart, idle
+    timeout...), which is why is_held asks the server.
+    """
+    
+    # Advisory locks on a bigint key appear in pg_locks split into
+    # classid (high 32 bits) and objid (low 32 bits), with objsubid 1
+    HELD_QUERY = text(
+        "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+        "AND pid = pg_backend_pid() AND classid = 0 AND objid::bigint = :key "
+        "AND objsubid = 1 AND granted)"
+    )
+    
+    def __init__(self, name: str, engine: Engine = None):
+        super().__init__(name)
+        self.engine = engine or default_engine
+        # Stable 32-bit key derived from the lock name
+        self.key = zlib.crc32(name.encode("utf-8"))
+        self._connection: Optional[Connection] = None
+    
+    @property
+    def is_held(self) -> bool:
+        """
+        Whether the lock is still held, checked on its connection.
+        
+        If the connection is gone or no longer holds the lock, it is
+        discarded so that the next acquire() takes the lock again.
+        """
+        if self._connection is None:
+            return False
+        
+        try:
+            held = self._connection.execute(self.HELD_QUERY, {"key": self.key}).scalar()
+            self._connection.commit()
+        except SQLAlchemyError:
+            held = False
+        
+        if not held:
+            self._discard_connection()
+        return bool(held)
+    
+    def acquire(self, blocking: bool = False) -> bool:
+        if self.is_held:
+            return True
+        
+        connection = self.engine.connect()
+        try:
+            if blocking:
+                connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": self.key})
+                acquired = True
+            else:
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+                ).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+    
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._connection.commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+    
+    def _discard_connection(self) -> None:
+        """Drop a connection that lost the lock."""
+        connection, self._connection = self._connection, None
+        try:
+            connection.close()
+        except SQLAlchemyError:
+            pass
+
+
+class FileLock(ProcessLock):
+    """
+    Advisory file lock (flock), the stand-in for SQLite and local runs.
+    
+    Like the Postgres lock, it is released by the OS when the process exits.
+    """
+    
+    def __init__(self, name: str, directory: Path = None):
+        super().__init__(name)
+        directory = directory or settings.data_dir / "locks"
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{name}.lock"
+        self._file: Optional[IO] = None
+    
+    @property
+    def is_held(self) -> bool:
+        return self._file is not None
+    
+    def acquire(self, blocking: bool = False) -> bool:
+        if self.is_held:
+            return True
+        
+        lock_file = open(self.path, "a+")
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        
+        self._file = lock_file
+        return True
+    
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def create_lock(name: str) -> ProcessLock:
+    """
+    Create a process lock suited to the configured database.
+    
+    Args:
+        name: Lock name (processes using the same name exclude each other)
+        
+    Returns:
+        PostgresAdvisoryLock on PostgreSQL, FileLock otherwise
+    """
+    if default_engine.dialect.name == "postgresql":
+        return PostgresAdvisoryLock(name)
+    return FileLock(name)
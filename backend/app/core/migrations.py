@@ -0,0 +1,135 @@
+"""
+Idempotent schema upgrades for existing databases.
+
+`Base.metadata.create_all` only creates missing tables; it never adds
+constraints, indexes or columns to tables that already exist. Each step
+here brings an existing database up to the current models and is safe to
+run on every startup (it is a no-op once applied). Steps run from
+`init_db`, under the schema lock, right after create_all.
+"""
+
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_steps: List[Tuple[str, Callable[[Connection], None]]] = []
+
+# Rows updated per statement by backfill steps
+BACKFILL_BATCH_SIZE = 5000
+
+
+def migration(name: str):
+    """Decorator registering a migration step (steps run in definition order)."""
+    def decorator(fn: Callable[[Connection], None]):
+        _steps.append((name, fn))
+        return fn
+    return decorator
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Apply every migration step, each in its own transaction.
+    
+    Args:
+        engine: Sync engine of the database to upgrade
+    """
+    for name, step in _steps:
+        with engine.begin() as connection:
+            step(connection)
+        logger.debug(f"Migration step '{name}' checked")
+
+
+def _has_index(connection: Connection, table: str, name: str) -> bool:
+    """Whether `table` already has an index or unique constraint called `name`."""
+    inspector = inspect(connection)
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    names.update(constraint["name"] for constraint in inspector.get_unique_constraints(table))
+    return name in names
+
+
+@migration("user_suggestion_usage_unique_user_date")
+def _unique_usage_per_user_and_day(connection: Connection) -> None:
+    """One usage row per (user_id, date), required by the atomic rate-limit upsert."""
+    if _has_index(connection, "user_suggestion_usage", "uq_user_suggestion_usage_user_date"):
+        return
+    
+    # Collapse duplicates left by the old read-modify-write: keep the
+    # oldest row per user and day, with the highest count seen
+    connection.execute(text("""
+        UPDATE user_suggestion_usage
+        SET suggestions_count = (
+            SELECT MAX(u.suggestions_count) FROM user_suggestion_usage u
+            WHERE u.user_id = user_suggestion_usage.user_id AND u.date = user_suggestion_usage.date
+        )
+    """))
+    deleted = connection.execute(text("""
+        DELETE FROM user_suggestion_usage
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM user_suggestion_usage GROUP BY user_id, date
+        )
+    """)).rowcount
+    if deleted:
+        logger.warning(f"Removed {deleted} duplicate suggestion usage rows")
+    
+    connection.execute(text(
+        "CREATE UNIQUE INDEX uq_user_suggestion_usage_user_date "
+        "ON user_suggestion_usage (user_id, date)"
+    ))
+    logger.info("Created unique index uq_user_suggestion_usage_user_date")
+
+
+@migration("user_suggestion_usage_drop_user_id_index")
+def _drop_redundant_user_id_index(connection: Connection) -> None:
+    """The (user_id, date) index covers user_id lookups; the single-column one only costs writes."""
+    if not _has_index(connection, "user_suggestion_usage", "uq_user_suggestion_usage_user_date"):
+        return
+    if _has_index(connection, "user_suggestion_usage", "ix_user_suggestion_usage_user_id"):
+        connection.execute(text("DROP INDEX ix_user_suggestion_usage_user_id"))
+        logger.info("Dropped redundant index ix_user_suggestion_usage_user_id")
+
+
+@migration("lottery_results_numbers_mask")
+def _numbers_mask(connection: Connection) -> None:
+    """Add, index and backfill lottery_results.numbers_mask."""
+    from app.core.bitmask import numbers_to_mask
+    from app.models.lottery import LotteryResult
+    
+    columns = {column["name"] for column in inspect(connection).get_columns("lottery_results")}
+    if "numbers_mask" not in columns:
+        connection.execute(text("ALTER TABLE lottery_results ADD COLUMN numbers_mask INTEGER"))
+        logger.info("Added column lottery_results.numbers_mask")
+    
+    if not _has_index(connection, "lottery_results", "ix_lottery_results_numbers_mask"):
+        connection.execute(text("CREATE INDEX ix_lottery_results_numbers_mask ON lottery_results (numbers_mask)"))
+    
+    table = LotteryResult.__table__
+    backfilled = 0
+    while True:
+        rows = connection.execute(
+            select(table.c.id, table.c.numbers)
+            .where(table.c.numbers_mask.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            update(table).where(table.c.id == bindparam("row_id")).values(numbers_mask=bindparam("mask")),
+            [{"row_id": row.id, "mask": numbers_to_mask(row.numbers)} for row in rows]
+        )
+        backfilled += len(rows)
+    
+    if backfilled:
+        logger.info(f"Backfilled numbers_mask for {backfilled} results")
+
+
+@migration("user_subscriptions_event_timestamp")
+def _subscription_event_timestamp(connection: Connection) -> None:
+    """Add user_subscriptions.event_timestamp, used to ignore out-of-order webhook events."""
+    columns = {column["name"] for column in inspect(connection).get_columns("user_subscriptions")}
+    if "event_timestamp" not in columns:
+        connection.execute(text("ALTER TABLE user_subscriptions ADD COLUMN event_timestamp TIMESTAMP"))
+        logger.info("Added column user_subscriptions.event_timestamp")
@@ -0,0 +1,33 @@
+"""
+Authentication of server-to-server requests.
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def verify_webhook_secret(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Dependency requiring the RevenueCat webhook secret.
+    
+    RevenueCat sends the authorization value configured in its dashboard
+    as the Authorization header; it must match REVENUECAT_WEBHOOK_SECRET
+    (with or without a "Bearer " prefix). Without a configured secret,
+    requests are refused rather than left unauthenticated.
+    
+    Raises:
+        HTTPException: 503 if no secret is configured, 401 if it doesn't match
+    """
+    secret = settings.revenuecat_webhook_secret
+    if not secret:
+        raise HTTPException(status_code=503, detail="Webhook secret is not configured")
+    
+    token = authorization or ""
+    if token.startswith("Bearer "):
+        token = token[len("Bearer "):]
+    if not hmac.compare_digest(token.encode(), secret.encode()):
+        raise HTTPException(status_code=401, detail="Invalid webhook authorization")
@@ -0,0 +1,85 @@
+"""
+Single-flight execution of async computations.
+
+When many requests miss the same cache entry at once (cold start, or the
+first requests after a new contest), they should not all run the same
+query and computation. SingleFlight lets the first caller for a key run
+it while concurrent callers for that key await the same result.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key into one in-flight computation.
+    
+    Keys may be tuples such as (name, version); the counters aggregate by
+    the first element so they don't grow with every new version.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Counter = Counter()
+        self.executed: Counter = Counter()
+        self.coalesced: Counter = Counter()
+    
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `compute` for a key, or join the call already running for it.
+        
+        The computation runs as its own task: a caller that is cancelled
+        (e.g. client disconnect) stops waiting without cancelling it for
+        the others. Errors are raised to every caller of that flight.
+        
+        Args:
+            key: Identifies the computation (include the version it is for)
+            compute: Coroutine function producing the value
+        
+        Returns:
+            The computation's result
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._calls[key] = task
+            self.executed[_name(key)] += 1
+            task.add_done_callback(lambda _: self._finish(key))
+        else:
+            self._waiters[key] += 1
+            self.coalesced[_name(key)] += 1
+        
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: Hashable) -> None:
+        """Forget a finished flight so the next miss starts a new one."""
+        self._calls.pop(key, None)
+        waiters = self._waiters.pop(key, 0)
+        if waiters:
+            logger.info(f"Single-flight {key!r}: {waiters} concurrent callers shared one computation")
+    
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        return len(self._calls)
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get counters per key name.
+        
+        Returns:
+            dict of name -> {"executed": computations run, "coalesced": callers that joined one}
+        """
+        return {
+            str(name): {"executed": self.executed[name], "coalesced": self.coalesced[name]}
+            for name in self.executed
+        }
+
+
+def _name(key: Hashable) -> Hashable:
+    """Counter key: the first element of tuple keys."""
+    return key[0] if isinstance(key, tuple) and key else key
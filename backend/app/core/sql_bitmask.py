@@ -0,0 +1,54 @@
+"""
+SQL-side bitmask operations on `lottery_results.numbers_mask`.
+
+`bit_count(expr)` counts the set bits of an integer expression, so set
+queries run in the database:
+
+- contains all of a ticket's numbers: ``numbers_mask & :mask = :mask``
+- hits against a ticket: ``bit_count(numbers_mask & :mask)``
+
+PostgreSQL 14+ only has bit_count for bit strings, so the integer is cast
+to BIT(32) there; on SQLite an equivalent function is registered on every
+new connection.
+"""
+
+from sqlalchemy import Integer, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class bit_count(FunctionElement):
+    """Number of set bits of an integer SQL expression."""
+    type = Integer()
+    inherit_cache = True
+    name = "bit_count"
+
+
+@compiles(bit_count)
+def _compile_bit_count(element, compiler, **kw):
+    return f"bit_count({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(bit_count, "postgresql")
+def _compile_bit_count_postgresql(element, compiler, **kw):
+    return f"bit_count(CAST({compiler.process(element.clauses, **kw)} AS BIT(32)))"
+
+
+def _sqlite_bit_count(value):
+    return None if value is None else bin(value & 0xFFFFFFFF).count("1")
+
+
+def register_sqlite_functions(engine: Engine) -> None:
+    """
+    Make bit_count available on every SQLite connection of `engine`.
+    
+    Args:
+        engine: Sync engine (for async engines, pass `async_engine.sync_engine`)
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("bit_count", 1, _sqlite_bit_count, deterministic=True)
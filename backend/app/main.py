@@ -2,63 +2,164 @@
 Main FastAPI application.
 """
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.v1 import lottery, subscriptions
-from app.schemas.lottery import HealthCheckResponse
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, init_db
+from app.api.v1 import jobs, lottery, subscriptions, tickets
+from app.schemas.lottery import HealthCheckResponse, LivenessResponse, ReadinessResponse
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+async def initialize_database(app: FastAPI) -> None:
+    """
+    Create/upgrade the schema, retrying with exponential backoff.
+    
+    The database may not be reachable yet when the worker boots (e.g.
+    Postgres still starting). Retrying here, instead of giving up, lets
+    `/health/ready` turn ready once it is, without restarting the worker.
+    """
+    state = app.state
+    delay = settings.startup_db_retry_initial_seconds
+    
+    while True:
+        try:
+            await run_in_threadpool(init_db)
+            state.database_initialized = True
+            state.database_error = None
+            return
+        except Exception as e:
+            state.database_error = str(e)
+            print(f"Could not initialize database (retrying in {delay:.0f}s): {e}")
+        
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, settings.startup_db_retry_max_seconds)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+async def initial_sync(app: FastAPI):
     """
-    Lifespan context manager for startup and shutdown events.
+    Initialize the database schema and sync lottery data in the background.
+    
+    Runs as a task started by the lifespan so the app can serve existing
+    data while the (potentially slow) upstream backfill is in progress.
+    Only the worker that wins leader election runs the sync.
     """
-    # Startup
-    print(f"Starting {settings.app_name} v{settings.app_version}")
-    print(f"Environment: {settings.environment}")
-    print(f"Database: Connected")
+    state = app.state
+    
+    await initialize_database(app)
+    
+    # Only the leader worker syncs with the upstream API
+    from app.services.leader_election import try_acquire_leadership
+    
+    state.is_leader = await run_in_threadpool(try_acquire_leadership)
+    if state.is_leader and settings.scheduler_enabled:
+        from app.services.scheduler import setup_scheduler
+        setup_scheduler()
+    
+    if not settings.startup_sync_enabled:
+        state.initial_sync = "disabled"
+        return
+    
+    if not state.is_leader:
+        state.initial_sync = "follower"
+        print("Another worker is the leader, skipping data sync")
+        return
     
     # Check and update lottery data
     print("Checking lottery data...")
-    from app.core.database import SessionLocal
     from app.services.data.lotofacil_fetcher import get_fetcher
     
+    state.initial_sync = "running"
+    sync_started = time.perf_counter()
     db = SessionLocal()
     try:
         fetcher = get_fetcher()
         result = await fetcher.update_database(db)
         if result.get("success"):
+            state.initial_sync = "completed"
             print(f"Update: {result.get('message')} (Latest: {result.get('latest_contest')})")
         else:
+            state.initial_sync = "failed"
             print(f"Data update warning: {result.get('error')}")
     except Exception as e:
+        state.initial_sync = "failed"
         print(f"Could not update lottery data: {e}")
     finally:
         db.close()
+        print(f"Initial data sync finished in {time.perf_counter() - sync_started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan context manager for startup and shutdown events.
+    
+    Startup does not wait for the database sync: it is scheduled as a
+    background task and `/health/ready` reports when traffic can be routed.
+    """
+    # Startup
+    startup_started = time.perf_counter()
+    print(f"Starting {settings.app_name} v{settings.app_version}")
+    print(f"Environment: {settings.environment}")
+    
+    app.state.started_at = time.monotonic()
+    app.state.startup_seconds = None
+    app.state.database_initialized = False
+    app.state.database_error = None
+    app.state.has_data = False
+    app.state.is_leader = False
+    app.state.initial_sync = "pending"
+    app.state.sync_task = asyncio.create_task(initial_sync(app))
+    
+    # Write-behind flushing for the optional in-memory/Redis suggestion limiter
+    from app.services.usage_limiter import get_usage_limiter, run_usage_flusher
+    limiter = get_usage_limiter()
+    app.state.usage_flush_task = None
+    if limiter is not None:
+        app.state.usage_flush_task = asyncio.create_task(
+            run_usage_flusher(limiter, settings.rate_limit_flush_interval_seconds)
+        )
+    
+    # Worker processes for CPU-heavy jobs (suggestions, ticket scoring)
+    from app.services.job_pool import get_job_pool
+    get_job_pool().start()
     
     # Start scheduler if enabled
     if settings.scheduler_enabled:
         from app.services.scheduler import start_scheduler
         start_scheduler()
     
+    app.state.startup_seconds = round(time.perf_counter() - startup_started, 4)
+    print(f"Startup completed in {app.state.startup_seconds * 1000:.1f}ms (data sync running in background)")
+    
     yield
     
     # Shutdown
     print("Shutting down...")
+    if not app.state.sync_task.done():
+        app.state.sync_task.cancel()
+    if app.state.usage_flush_task is not None:
+        # Cancelling runs a final flush of the pending usage counts
+        app.state.usage_flush_task.cancel()
+        await asyncio.gather(app.state.usage_flush_task, return_exceptions=True)
+        await limiter.backend.close()
     if settings.scheduler_enabled:
         from app.services.scheduler import shutdown_scheduler
         shutdown_scheduler()
+    
+    # Queued jobs are dropped; running ones get to finish so the workers exit cleanly
+    await run_in_threadpool(get_job_pool().shutdown, True)
+    
+    from app.services.leader_election import release_leadership
+    release_leadership()
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -85,6 +186,8 @@ app.add_middleware(
 # Include routers
 app.include_router(lottery.router, prefix="/api/v1")
 app.include_router(subscriptions.router, prefix="/api/v1")
+app.include_router(tickets.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
 
 
 # Root endpoint
@@ -110,10 +213,8 @@ async def health_check():
     try:
         # Test database connection
         from sqlalchemy import text
-        from app.core.database import SessionLocal
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -126,6 +227,94 @@ async def health_check():
     )
 
 
+@app.get("/health/live", response_model=LivenessResponse)
+async def liveness_check():
+    """
+    Liveness probe.
+    
+    Only reports that the process is serving requests; it never touches
+    the database so a slow dependency does not get the process restarted.
+    
+    Returns:
+        Liveness status
+    """
+    return LivenessResponse(
+        status="alive",
+        version=settings.app_version,
+        uptime_seconds=round(time.monotonic() - app.state.started_at, 2),
+        timestamp=datetime.utcnow()
+    )
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """
+    Readiness probe.
+    
+    The app is ready once the database schema exists and either there is
+    data to serve or the initial sync has finished. Responds with 503
+    while not ready so orchestrators hold traffic back.
+    
+    Returns:
+        Readiness status
+    """
+    state = app.state
+    database = "initializing"
+    if state.database_error:
+        database = f"initializing: {state.database_error}"
+    
+    if state.database_initialized:
+        try:
+            from sqlalchemy import select, text
+            from app.models.lottery import LotteryResult
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+                if not state.has_data:
+                    result = await db.execute(select(LotteryResult.id).limit(1))
+                    state.has_data = result.first() is not None
+            database = "healthy"
+        except Exception as e:
+            database = f"unhealthy: {str(e)}"
+    
+    sync_finished = state.initial_sync in ("completed", "failed", "disabled", "follower")
+    ready = database == "healthy" and (state.has_data or sync_finished)
+    
+    response = ReadinessResponse(
+        ready=ready,
+        database=database,
+        has_data=state.has_data,
+        initial_sync=state.initial_sync,
+        startup_seconds=state.startup_seconds,
+        timestamp=datetime.utcnow()
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content=response.model_dump(mode="json")
+    )
+
+
+@app.get("/health/cache")
+async def cache_check():
+    """
+    Report the derived-data cache state of this worker.
+    
+    `coalesced` counts requests that missed the cache while the same
+    value was already being computed and waited for that computation
+    instead of starting their own.
+    
+    Returns:
+        Contest version and single-flight counters per cache key
+    """
+    from app.services.cache_service import get_contest_cache, get_single_flight
+    single_flight = get_single_flight()
+    version = get_contest_cache().version
+    return {
+        "contest_version": version._asdict() if version is not None else None,
+        "in_flight": single_flight.in_flight(),
+        "single_flight": single_flight.stats(),
+    }
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
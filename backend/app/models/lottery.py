@@ -5,9 +5,11 @@ Database models for lottery data.
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean, Date, Float
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean, Date, Float, Index, Text
 from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import validates
 
+from app.core.bitmask import numbers_to_mask
 from app.core.database import Base
 
 
@@ -19,9 +21,18 @@ class LotteryResult(Base):
     id = Column(Integer, primary_key=True, index=True)
     contest_number = Column(Integer, unique=True, index=True, nullable=False)
     draw_date = Column(Date, nullable=False)
-    numbers = Column(ARRAY(Integer), nullable=False)  # Array of drawn numbers
+    # Array of drawn numbers (JSON on SQLite, used for local development and tests)
+    numbers = Column(ARRAY(Integer).with_variant(JSON(), "sqlite"), nullable=False)
+    # Same numbers as a bitmask (bit n-1 set for number n), for SQL set queries
+    numbers_mask = Column(Integer, index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    @validates("numbers")
+    def _sync_numbers_mask(self, key, numbers):
+        """Keep numbers_mask in step with numbers on every ORM assignment."""
+        self.numbers_mask = numbers_to_mask(numbers) if numbers is not None else None
+        return numbers
+    
     def __repr__(self):
         return f"<LotteryResult(contest={self.contest_number}, date={self.draw_date})>"
 
@@ -30,10 +41,15 @@ class UserSuggestionUsage(Base):
     """Model for tracking user suggestion usage (rate limiting)."""
     
     __tablename__ = "user_suggestion_usage"
+    __table_args__ = (
+        # One row per user and day: target of the atomic rate-limit upsert
+        # and the rate-limit lookup (also serves user_id-only filters)
+        Index("uq_user_suggestion_usage_user_date", "user_id", "date", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, index=True, nullable=False)  # Device ID or user ID
-    date = Column(Date, nullable=False, index=True)
+    user_id = Column(String, nullable=False)  # Device ID or user ID
+    date = Column(Date, nullable=False, index=True)  # Retention scans by date
     suggestions_count = Column(Integer, default=0)
     is_premium = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -43,6 +59,25 @@ class UserSuggestionUsage(Base):
         return f"<UserSuggestionUsage(user={self.user_id}, date={self.date}, count={self.suggestions_count})>"
 
 
+class UserSuggestionUsageMonthly(Base):
+    """Monthly rollup of daily usage rows older than the retention window."""
+    
+    __tablename__ = "user_suggestion_usage_monthly"
+    __table_args__ = (
+        Index("uq_user_suggestion_usage_monthly_user_month", "user_id", "month", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
+    suggestions_count = Column(Integer, default=0, nullable=False)
+    active_days = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UserSuggestionUsageMonthly(user={self.user_id}, month={self.month}, count={self.suggestions_count})>"
+
+
 class UserSubscription(Base):
     """Model for storing user subscription status."""
     
@@ -53,6 +88,8 @@ class UserSubscription(Base):
     is_premium = Column(Boolean, default=False)
     subscription_id = Column(String, nullable=True)  # RevenueCat subscription ID
     expires_at = Column(DateTime, nullable=True)
+    # Timestamp of the webhook event the state comes from (older events are ignored)
+    event_timestamp = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -73,3 +110,22 @@ class CachedStatistics(Base):
     
     def __repr__(self):
         return f"<CachedStatistics(key={self.cache_key})>"
+
+
+class BackgroundJob(Base):
+    """Model for background jobs of the job pool, shared by all workers."""
+    
+    __tablename__ = "background_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, completed, failed, timeout
+    result = Column(Text, nullable=True)  # JSON-encoded job output
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)  # Purged after this
+    
+    def __repr__(self):
+        return f"<BackgroundJob(id={self.job_id}, name={self.name}, status={self.status})>"
@@ -2,7 +2,7 @@
 Pydantic schemas for API request/response validation.
 """
 
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import List, Dict, Any, Optional
 from enum import Enum
 
@@ -132,6 +132,96 @@ class UpdateSubscriptionRequest(BaseModel):
     expires_at: Optional[datetime] = None
 
 
+class SubscriptionEvent(UpdateSubscriptionRequest):
+    """A subscription state change, as delivered by a webhook."""
+    event_timestamp: Optional[datetime] = Field(
+        None,
+        description=(
+            "When the event happened; orders events per user (later in the batch wins ties). "
+            "Events without one never override a state set by a timestamped event."
+        )
+    )
+    
+    @field_validator('event_timestamp')
+    @classmethod
+    def normalize_event_timestamp(cls, v):
+        """Store and compare timestamps as naive UTC, like the rest of the database."""
+        if v is not None and v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+
+class BatchSubscriptionUpdateRequest(BaseModel):
+    """Request schema for applying many subscription events at once."""
+    events: List[SubscriptionEvent] = Field(..., min_length=1, max_length=50_000)
+
+
+class BatchSubscriptionUpdateResponse(BaseModel):
+    """Response schema for batch subscription updates."""
+    received: int
+    users_updated: int
+    results: List[UserSubscriptionStatus]
+
+
+# Ticket Scoring Schemas
+
+class TicketScoreRequest(BaseModel):
+    """Request schema for scoring tickets against the draw history."""
+    tickets: List[List[int]] = Field(..., min_length=1, max_length=5_000, description="Tickets of 15 to 20 numbers")
+    contest: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Score against this contest only; omit for the 11-15 hit distribution over all history"
+    )
+    background: bool = Field(
+        default=False,
+        description="Run as a background job: returns 202 with a job id to poll at /jobs/{job_id}"
+    )
+    
+    @field_validator('tickets')
+    @classmethod
+    def validate_tickets(cls, v):
+        """Validate that every ticket has 15-20 unique numbers between 1 and 25."""
+        for ticket in v:
+            if not 15 <= len(ticket) <= 20:
+                raise ValueError("Tickets must have between 15 and 20 numbers")
+            if len(ticket) != len(set(ticket)):
+                raise ValueError("Ticket numbers must be unique")
+            if not all(1 <= num <= 25 for num in ticket):
+                raise ValueError("Numbers must be between 1 and 25")
+        return [sorted(ticket) for ticket in v]
+
+
+class TicketScore(BaseModel):
+    """Score of a single ticket."""
+    numbers: List[int]
+    hits: Optional[int] = Field(None, description="Hits in the requested contest")
+    distribution: Optional[Dict[int, int]] = Field(
+        None,
+        description="Number of past draws with each hit count (11 to 15)"
+    )
+
+
+class TicketScoreResponse(BaseModel):
+    """Response schema for ticket scoring."""
+    contest: Optional[int] = None
+    contests_scored: int
+    scores: List[TicketScore]
+
+
+# Background Job Schemas
+
+class JobStatusResponse(BaseModel):
+    """Response schema for a background job."""
+    job_id: str
+    name: str
+    status: str = Field(..., description="queued, completed, failed or timeout")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = Field(None, description="Job output once completed")
+    error: Optional[str] = None
+
+
 # History Schemas
 
 class HistoryResponse(BaseModel):
@@ -141,6 +231,22 @@ class HistoryResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_before: Optional[int] = Field(None, description="Cursor for the next page (pass as ?before=)")
+
+
+class SearchResult(BaseModel):
+    """A contest matching a search."""
+    contest_number: int
+    draw_date: date
+    numbers: List[int]
+
+
+class SearchResponse(BaseModel):
+    """Response schema for contest search."""
+    results: List[SearchResult]
+    total: int = Field(..., description="Contests matching the filters")
+    page_size: int
+    next_before: Optional[int] = Field(None, description="Cursor for the next page (pass as ?before=)")
 
 
 # Health Check
@@ -151,3 +257,21 @@ class HealthCheckResponse(BaseModel):
     version: str
     database: str
     timestamp: datetime
+
+
+class LivenessResponse(BaseModel):
+    """Response schema for liveness probe."""
+    status: str
+    version: str
+    uptime_seconds: float
+    timestamp: datetime
+
+
+class ReadinessResponse(BaseModel):
+    """Response schema for readiness probe."""
+    ready: bool
+    database: str
+    has_data: bool
+    initial_sync: str
+    startup_seconds: Optional[float] = None
+    timestamp: datetime
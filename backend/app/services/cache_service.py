@@ -0,0 +1,400 @@
+"""
+Contest-versioned in-process cache.
+
+Everything derived from the lottery results (statistics, history frames...)
+only changes when results are ingested, so cached values are tagged with
+the latest contest number and the number of stored results (the "contest
+version"; the count moves when older contests are backfilled). When the
+version moves, the cache is cleared.
+
+Only the leader process ingests data; the other workers notice new
+contests by re-reading the version from the database at most every
+`contest_version_ttl_seconds`.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_in_session
+from app.core.single_flight import SingleFlight
+from app.models.lottery import LotteryResult
+from app.services.draw_matrix import DrawMatrix
+from app.services.storage.shared_draw_matrix import attach_draw_matrix, publish_draw_matrix
+from app.services.statistics_service import LotteryStatisticsService
+from app.services.strategy_service import build_strategy_plan
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ContestVersion(NamedTuple):
+    """
+    State of the stored results that derived values depend on.
+    
+    Its string form is also the version of the shared draw matrix.
+    """
+    
+    latest: int
+    count: int
+    
+    def __str__(self) -> str:
+        return f"{self.latest}-{self.count}"
+
+
+class ContestCache:
+    """Cache of values derived from lottery results, invalidated per contest version."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[ContestVersion] = None
+        self._checked_at: float = 0.0
+        self._values: Dict[str, Any] = {}
+    
+    @property
+    def version(self) -> Optional[ContestVersion]:
+        """Latest known contest version (None until first checked)."""
+        return self._version
+    
+    def is_stale(self, ttl_seconds: float) -> bool:
+        """Whether the version should be re-read from the database."""
+        return self._version is None or time.monotonic() - self._checked_at >= ttl_seconds
+    
+    def set_version(self, version: ContestVersion) -> bool:
+        """
+        Record the contest version, clearing cached values if it changed.
+        
+        Args:
+            version: Current contest version
+            
+        Returns:
+            True if the version changed
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version == self._version:
+                return False
+            
+            previous = self._version
+            self._version = version
+            self._values.clear()
+        
+        logger.info(f"Contest version changed: {previous} -> {version}, cache invalidated")
+        return True
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value for the current version."""
+        return self._values.get(key, default)
+    
+    def set(self, key: str, value: Any, version: Optional[ContestVersion] = None) -> None:
+        """
+        Cache a value for the current version.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            version: Version the value was computed for; ignored if it is
+                     no longer the current version
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._values[key] = value
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, computing and caching it on a miss.
+        
+        Args:
+            key: Cache key
+            compute: Function producing the value
+            
+        Returns:
+            Cached or freshly computed value
+        """
+        if key in self._values:
+            return self._values[key]
+        
+        version = self._version
+        value = compute()
+        self.set(key, value, version=version)
+        return value
+    
+    def invalidate(self) -> None:
+        """Drop every cached value and force a version re-check."""
+        with self._lock:
+            self._values.clear()
+            self._version = None
+
+
+def get_latest_contest_number(db: Session) -> int:
+    """
+    Get the latest contest number stored in the database.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Latest contest number (0 if there is no data)
+    """
+    return db.query(func.max(LotteryResult.contest_number)).scalar() or 0
+
+
+def read_contest_version(db: Session) -> ContestVersion:
+    """
+    Read the contest version from the database.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Latest contest number and result count ((0, 0) if there is no data)
+    """
+    latest, count = db.query(func.max(LotteryResult.contest_number), func.count(LotteryResult.id)).one()
+    return ContestVersion(latest or 0, count or 0)
+
+
+def refresh_contest_version(db: Session) -> bool:
+    """
+    Re-read the contest version from the database.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        True if new results were picked up (cache invalidated)
+    """
+    return get_contest_cache().set_version(read_contest_version(db))
+
+
+def get_contest_version(db: Session) -> ContestVersion:
+    """
+    Get the contest version, refreshing it from the database when stale.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Current contest version
+    """
+    cache = get_contest_cache()
+    if cache.is_stale(settings.contest_version_ttl_seconds):
+        refresh_contest_version(db)
+    return cache.version
+
+
+def get_cached_statistics(db: Session) -> Dict[str, Any]:
+    """
+    Get statistics for the current contest version (computed on a miss).
+    
+    With STATISTICS_BACKEND=sql they are aggregated in the database instead
+    of from the cached history.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Statistics dict from LotteryStatisticsService
+    """
+    if settings.statistics_backend == "sql":
+        get_contest_version(db)
+        return get_contest_cache().get_or_compute("statistics", LotteryStatisticsService(db).compute_statistics_sql)
+    
+    history = get_cached_history(db)
+    return get_contest_cache().get_or_compute(
+        "statistics",
+        lambda: LotteryStatisticsService.compute_statistics_from_history(history)
+    )
+
+
+def get_cached_history(db: Session) -> pd.DataFrame:
+    """
+    Get the history DataFrame for the current contest version (built on a miss).
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        History DataFrame, rebuilt from the cached draw matrix
+    """
+    return get_contest_cache().get_or_compute("history", lambda: get_cached_draw_matrix(db).to_history())
+
+
+def get_cached_draw_matrix(db: Session) -> DrawMatrix:
+    """
+    Get the draw arrays (contests, dates, masks...) for the current contest version.
+    
+    With SHARED_DRAW_MATRIX_ENABLED, the matrix published by another worker
+    for this version is mapped instead of loaded from the database; a
+    matrix loaded here is published for the others.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        DrawMatrix for the current contest version
+    """
+    version = get_contest_version(db)
+    return get_contest_cache().get_or_compute("draw_matrix", lambda: _load_draw_matrix(db, version))
+
+
+def _load_draw_matrix(db: Session, version: ContestVersion) -> DrawMatrix:
+    """Attach the shared matrix for a version, or load it from the database and share it."""
+    if settings.shared_draw_matrix_enabled:
+        matrix = attach_draw_matrix(str(version))
+        if matrix is not None:
+            return matrix
+    
+    arrays = LotteryStatisticsService(db).load_history_arrays()
+    matrix = DrawMatrix.from_numbers(arrays["contests"], arrays["dates"], arrays["numbers"])
+    
+    if settings.shared_draw_matrix_enabled:
+        try:
+            publish_draw_matrix(matrix)
+        except OSError as e:
+            logger.warning(f"Could not publish shared draw matrix: {e}")
+    return matrix
+
+
+def get_cached_windowed_frequencies(db: Session) -> Dict[int, Dict[int, int]]:
+    """
+    Get recent-window number frequencies for the current contest version.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Mapping of window size to {number: frequency}
+    """
+    history = get_cached_history(db)
+    stats_service = LotteryStatisticsService(db)
+    return get_contest_cache().get_or_compute(
+        "windowed_frequencies",
+        lambda: stats_service.compute_windowed_frequencies(history)
+    )
+
+
+def get_cached_strategy_plan(db: Session) -> Dict[str, Any]:
+    """
+    Get the strategy plan (number pools per strategy) for the current contest version.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Strategy plan from build_strategy_plan
+    """
+    statistics = get_cached_statistics(db)
+    history = get_cached_history(db)
+    windowed = get_cached_windowed_frequencies(db)
+    return get_contest_cache().get_or_compute(
+        "strategy_plan",
+        lambda: build_strategy_plan(
+            statistics,
+            history,
+            recent_frequencies=windowed.get(settings.recent_draws_window)
+        )
+    )
+
+
+def get_cached_latest_result(db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest lottery result for the current contest version.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Dict with contest, date and numbers, or None if there is no data
+    """
+    def load_latest():
+        result = db.query(LotteryResult).order_by(LotteryResult.contest_number.desc()).first()
+        if not result:
+            return None
+        return {
+            "contest": result.contest_number,
+            "date": result.draw_date.isoformat(),
+            "numbers": list(result.numbers),
+        }
+    
+    get_contest_version(db)
+    return get_contest_cache().get_or_compute("latest_result", load_latest)
+
+
+def get_cached_result_count(db: Session) -> int:
+    """
+    Get the number of stored results for the current contest version.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Total number of lottery results
+    """
+    get_contest_version(db)
+    return get_contest_cache().get_or_compute(
+        "result_count",
+        lambda: db.query(func.count(LotteryResult.id)).scalar() or 0
+    )
+
+
+async def get_cached_async(key: str, accessor: Callable[[Session], Any]) -> Any:
+    """
+    Serve a cached value from async code without blocking the event loop.
+    
+    A fresh hit is returned directly; otherwise the sync accessor (version
+    check, query, computation) runs in the threadpool with its own session.
+    Concurrent misses for the same key and version share a single run (see
+    get_single_flight), so a burst of cold requests costs one computation.
+    
+    Args:
+        key: Cache key the accessor stores its value under
+        accessor: Cached accessor, e.g. get_cached_statistics
+        
+    Returns:
+        The accessor's value
+    """
+    cache = get_contest_cache()
+    if not cache.is_stale(settings.contest_version_ttl_seconds):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    
+    return await get_single_flight().do((key, cache.version), lambda: run_in_session(accessor))
+
+
+async def get_contest_version_async() -> ContestVersion:
+    """Async get_contest_version: only touches the database when stale."""
+    cache = get_contest_cache()
+    if not cache.is_stale(settings.contest_version_ttl_seconds):
+        return cache.version
+    
+    return await get_single_flight().do(("contest_version", cache.version), lambda: run_in_session(get_contest_version))
+
+
+# Singleton instance
+_cache_instance = None
+
+def get_contest_cache() -> ContestCache:
+    """Get singleton instance of ContestCache."""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = ContestCache()
+    return _cache_instance
+
+
+_single_flight_instance = None
+
+def get_single_flight() -> SingleFlight:
+    """Get the SingleFlight coalescing cache misses (see get_cached_async)."""
+    global _single_flight_instance
+    if _single_flight_instance is None:
+        _single_flight_instance = SingleFlight()
+    return _single_flight_instance
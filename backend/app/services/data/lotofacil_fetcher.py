@@ -1,5 +1,6 @@
 """Data fetching service for Lotofácil results from Caixa API with LottoLookup fallback."""
 
+import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -17,10 +18,25 @@ logger = logging.getLogger(__name__)
 class LotofacilFetcher:
     """Service to fetch Lotofácil results from Caixa Econômica Federal API with fallback."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        request_delay: float = 0.5
+    ):
+        """
+        Initialize the fetcher.
+        
+        Args:
+            transport: httpx transport to use (e.g. a replay transport for
+                       offline runs); defaults to real network access
+            request_delay: Pause between contests when backfilling, to avoid
+                           upstream rate limiting
+        """
         self.base_url = settings.caixa_api_base_url
         self.fallback_url = "https://lottolookup.com.br/api"
         self.timeout = 30.0
+        self.transport = transport
+        self.request_delay = request_delay
     
     async def fetch_latest_result(self) -> Optional[Dict]:
         """
@@ -34,7 +50,7 @@ class LotofacilFetcher:
         url = f"{self.base_url}/lotofacil"
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
                 response = await client.get(url)
                 response.raise_for_status()
                 data = response.json()
@@ -54,7 +70,7 @@ class LotofacilFetcher:
         fallback_url = f"{self.fallback_url}/lotofacil/latest"
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
                 response = await client.get(fallback_url)
                 response.raise_for_status()
                 data = response.json()
@@ -82,7 +98,7 @@ class LotofacilFetcher:
         url = f"{self.base_url}/lotofacil/{contest_number}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
                 response = await client.get(url)
                 response.raise_for_status()
                 data = response.json()
@@ -102,7 +118,7 @@ class LotofacilFetcher:
         fallback_url = f"{self.fallback_url}/lotofacil/{contest_number}"
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
                 response = await client.get(fallback_url)
                 response.raise_for_status()
                 data = response.json()
@@ -144,8 +160,8 @@ class LotofacilFetcher:
                 logger.warning(f"Failed to fetch contest {contest_num}")
             
             # small delay to avoid rate limiting
-            if contest_num < to_contest:
-                await asyncio.sleep(0.5)
+            if contest_num < to_contest and self.request_delay:
+                await asyncio.sleep(self.request_delay)
         
         logger.info(f"Successfully fetched {len(results)}/{total_to_fetch} contests")
         return results
@@ -214,19 +230,45 @@ class LotofacilFetcher:
             logger.error(f"Error saving result to database: {e}")
             return False
     
-    async def update_database(self, db: Session) -> Dict[str, any]:
+    async def _run_post_ingest(self) -> None:
+        """
+        Run the post-ingest hooks (cache warm-up) after new contests were saved.
+        
+        The hooks query the database and compute statistics, so they run in
+        a worker thread, with their own session, off the event loop.
+        """
+        from app.core.database import SessionLocal
+        from app.services.pipelines.post_ingest import run_post_ingest_hooks
+        
+        def run():
+            db: Session = SessionLocal()
+            try:
+                run_post_ingest_hooks(db)
+            finally:
+                db.close()
+        
+        await asyncio.to_thread(run)
+    
+    async def update_database(
+        self,
+        db: Session,
+        latest_api_result: Optional[Dict] = None
+    ) -> Dict[str, any]:
         """
         Check for new results and update database.
         
         Args:
             db: Database session
+            latest_api_result: Latest result already fetched by the caller
+                               (avoids fetching it a second time)
             
         Returns:
             Dict with update status and statistics
         """
         try:
             # Get latest result from API
-            latest_api_result = await self.fetch_latest_result()
+            if latest_api_result is None:
+                latest_api_result = await self.fetch_latest_result()
             if not latest_api_result:
                 return {
                     "success": False,
@@ -243,6 +285,8 @@ class LotofacilFetcher:
             if not latest_db_result:
                 # Database is empty, save the latest result
                 success = self.save_result_to_db(latest_api_result, db)
+                if success:
+                    await self._run_post_ingest()
                 return {
                     "success": success,
                     "contests_added": 1 if success else 0,
@@ -271,6 +315,10 @@ class LotofacilFetcher:
                 if self.save_result_to_db(contest_data, db):
                     contests_added += 1
             
+            # Rebuild caches derived from the previous contest version
+            if contests_added:
+                await self._run_post_ingest()
+            
             return {
                 "success": True,
                 "contests_added": contests_added,
@@ -293,5 +341,12 @@ def get_fetcher() -> LotofacilFetcher:
     """Get singleton instance of LotofacilFetcher."""
     global _fetcher_instance
     if _fetcher_instance is None:
-        _fetcher_instance = LotofacilFetcher()
+        from app.services.data.replay_transport import create_transport
+        
+        transport = create_transport()
+        _fetcher_instance = LotofacilFetcher(
+            transport=transport,
+            # No need to be gentle with local fixtures
+            request_delay=0.0 if settings.fetcher_mode == "replay" else 0.5
+        )
     return _fetcher_instance
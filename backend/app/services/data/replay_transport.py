@@ -0,0 +1,173 @@
+"""
+Record/replay HTTP transports for LotofacilFetcher.
+
+`RecordingTransport` passes requests through to the real upstream APIs and
+stores every response under a fixtures directory. `ReplayTransport` serves
+those fixtures back without any network access, with optional per-host
+latency and error injection (e.g. a 403 from Caixa or a slow LottoLookup),
+so ingestion can be benchmarked and load-tested deterministically.
+
+Fixtures are JSON files laid out as ``<fixtures_dir>/<host>/<path>.json``.
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def fixture_path(fixtures_dir: Path, url: httpx.URL) -> Path:
+    """
+    Get the fixture file for a request URL.
+    
+    Args:
+        fixtures_dir: Root fixtures directory
+        url: Request URL
+        
+    Returns:
+        Path of the JSON fixture for that URL
+    """
+    path = url.path.strip("/") or "index"
+    return fixtures_dir / url.host / f"{path}.json"
+
+
+def save_fixture(fixtures_dir: Path, url: httpx.URL, status_code: int, body: bytes) -> Path:
+    """
+    Store a response as a fixture.
+    
+    Args:
+        fixtures_dir: Root fixtures directory
+        url: Request URL
+        status_code: Response status code
+        body: Raw response body (JSON)
+        
+    Returns:
+        Path of the written fixture
+    """
+    try:
+        content = json.loads(body) if body else None
+    except ValueError:
+        content = body.decode("utf-8", errors="replace")
+    
+    path = fixture_path(fixtures_dir, url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"status_code": status_code, "body": content}, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
+    return path
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport that forwards requests upstream and records the responses."""
+    
+    def __init__(self, fixtures_dir: Path, transport: httpx.AsyncBaseTransport = None):
+        """
+        Initialize the transport.
+        
+        Args:
+            fixtures_dir: Directory where responses are recorded
+            transport: Transport doing the real requests (defaults to httpx's)
+        """
+        self.fixtures_dir = Path(fixtures_dir)
+        self.transport = transport or httpx.AsyncHTTPTransport()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+        
+        path = save_fixture(self.fixtures_dir, request.url, response.status_code, body)
+        logger.info(f"Recorded {request.url} -> {path}")
+        
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request
+        )
+    
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Transport serving recorded fixtures, with latency and error injection."""
+    
+    def __init__(
+        self,
+        fixtures_dir: Path,
+        latency: Optional[Dict[str, float]] = None,
+        errors: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize the transport.
+        
+        Args:
+            fixtures_dir: Directory holding recorded fixtures
+            latency: Seconds of delay per host ("*" applies to every host).
+                     A delay at or above the client read timeout raises
+                     httpx.ReadTimeout, like a real slow upstream would.
+            errors: HTTP status to answer with per host (e.g. {"servicebus2.caixa.gov.br": 403})
+        """
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency or {}
+        self.errors = errors or {}
+        self.requests_served = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests_served += 1
+        host = request.url.host
+        
+        delay = self.latency.get(host, self.latency.get("*", 0))
+        if delay:
+            read_timeout = (request.extensions.get("timeout") or {}).get("read")
+            if read_timeout is not None and delay >= read_timeout:
+                await asyncio.sleep(read_timeout)
+                raise httpx.ReadTimeout(f"Replay: {host} timed out", request=request)
+            await asyncio.sleep(delay)
+        
+        status_code = self.errors.get(host, self.errors.get("*"))
+        if status_code:
+            return httpx.Response(status_code=status_code, json={"error": "injected"}, request=request)
+        
+        path = fixture_path(self.fixtures_dir, request.url)
+        if not path.exists():
+            return httpx.Response(status_code=404, json={"error": "no fixture"}, request=request)
+        
+        fixture = json.loads(path.read_text(encoding="utf-8"))
+        return httpx.Response(
+            status_code=fixture["status_code"],
+            json=fixture["body"],
+            request=request
+        )
+
+
+def create_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Create the fetcher transport for the configured FETCHER_MODE.
+    
+    Returns:
+        RecordingTransport ("record"), ReplayTransport ("replay"), or None
+        for the default live httpx transport ("live")
+    """
+    mode = settings.fetcher_mode.lower()
+    
+    if mode == "record":
+        return RecordingTransport(settings.fetcher_fixtures_dir)
+    if mode == "replay":
+        return ReplayTransport(
+            settings.fetcher_fixtures_dir,
+            latency=settings.replay_latency_seconds,
+            errors=settings.replay_errors
+        )
+    if mode != "live":
+        raise ValueError(f"Unknown FETCHER_MODE: {settings.fetcher_mode}")
+    return None
@@ -0,0 +1,213 @@
+"""
+Column-oriented view of the draw history.
+
+The history DataFrame is convenient for statistics but every vectorized
+query (ticket scoring, searches) needs the same few arrays: contest
+numbers, dates, the drawn numbers as bitmasks and a couple of per-draw
+features. DrawMatrix holds them, built once per contest version (see
+cache_service.get_cached_draw_matrix), and answers filter queries with a
+handful of array operations.
+
+It is also the canonical copy of the history: the DataFrame is rebuilt
+from it (to_history), and it can be shared between worker processes as
+memory-mapped files (see storage.shared_draw_matrix).
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.bitmask import masks_from_matrix, numbers_to_mask, popcount
+
+# Numbers tracked by the prefix counts (Lotofácil draws 1-25)
+MAX_NUMBER = 25
+
+
+def history_frame(contests: np.ndarray, dates: np.ndarray, numbers: np.ndarray) -> pd.DataFrame:
+    """
+    Build the history DataFrame (concurso, data, bola_1..bola_N) from arrays.
+    
+    Args:
+        contests: Contest numbers (n,)
+        dates: Draw dates, datetime64[D] (n,)
+        numbers: Drawn numbers (n, k)
+        
+    Returns:
+        DataFrame with dates as datetime.date and int64 number columns,
+        or an empty DataFrame when there are no contests
+    """
+    if len(contests) == 0:
+        return pd.DataFrame()
+    
+    data = {
+        'concurso': np.asarray(contests, dtype=np.int64),
+        'data': np.asarray(dates, dtype="datetime64[D]").astype(object),
+    }
+    for i in range(numbers.shape[1]):
+        data[f'bola_{i + 1}'] = numbers[:, i].astype(np.int64)
+    
+    return pd.DataFrame(data)
+
+
+@dataclass(frozen=True)
+class DrawMatrix:
+    """Per-draw arrays, ordered by contest number (all of length n)."""
+    contests: np.ndarray        # int64
+    dates: np.ndarray           # datetime64[D]
+    numbers: np.ndarray         # int16 (n, k), drawn numbers as stored
+    masks: np.ndarray           # uint32, bit n-1 set for each drawn number n
+    sums: np.ndarray            # int16, sum of the drawn numbers
+    even_counts: np.ndarray     # int8, how many drawn numbers are even
+    prefix_counts: np.ndarray   # int32 (n + 1, MAX_NUMBER), draws of each number before row i
+    
+    def __len__(self) -> int:
+        return len(self.contests)
+    
+    @classmethod
+    def empty(cls) -> "DrawMatrix":
+        """A matrix with no draws."""
+        return cls.from_numbers(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype="datetime64[D]"),
+            np.empty((0, 15), dtype=np.int16)
+        )
+    
+    @classmethod
+    def from_numbers(cls, contests: np.ndarray, dates: np.ndarray, numbers: np.ndarray) -> "DrawMatrix":
+        """
+        Build the matrix from raw arrays.
+        
+        Args:
+            contests: Contest numbers (n,)
+            dates: Draw dates (n,)
+            numbers: Drawn numbers (n, k)
+        
+        Returns:
+            DrawMatrix sorted by contest number
+        """
+        contests = np.asarray(contests, dtype=np.int64)
+        order = np.argsort(contests, kind="stable")
+        numbers = np.asarray(numbers, dtype=np.int16)[order]
+        masks = masks_from_matrix(numbers)
+        
+        drawn = (masks[:, None] >> np.arange(MAX_NUMBER, dtype=np.uint32)) & 1
+        prefix_counts = np.zeros((len(masks) + 1, MAX_NUMBER), dtype=np.int32)
+        np.cumsum(drawn, axis=0, out=prefix_counts[1:])
+        
+        return cls(
+            contests=contests[order],
+            dates=np.asarray(dates, dtype="datetime64[D]")[order],
+            numbers=numbers,
+            masks=masks,
+            sums=numbers.sum(axis=1, dtype=np.int16),
+            even_counts=(numbers % 2 == 0).sum(axis=1, dtype=np.int8),
+            prefix_counts=prefix_counts,
+        )
+    
+    @classmethod
+    def from_history(cls, history: pd.DataFrame) -> "DrawMatrix":
+        """
+        Build the matrix from a history DataFrame.
+        
+        Args:
+            history: DataFrame with 'concurso', 'data' and 'bola_*' columns
+        
+        Returns:
+            DrawMatrix sorted by contest number
+        """
+        if history.empty:
+            return cls.empty()
+        
+        number_columns = [col for col in history.columns if str(col).startswith("bola")]
+        return cls.from_numbers(
+            history["concurso"].to_numpy(),
+            pd.to_datetime(history["data"]).to_numpy().astype("datetime64[D]"),
+            history[number_columns].to_numpy()
+        )
+    
+    def to_history(self) -> pd.DataFrame:
+        """Rebuild the history DataFrame (same layout as get_history_dataframe)."""
+        return history_frame(self.contests, self.dates, self.numbers)
+    
+    def frequencies(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """
+        Count how often each number was drawn in rows [start, end).
+        
+        Args:
+            start: First row
+            end: Row after the last one (defaults to all rows)
+            
+        Returns:
+            int32 array; element n-1 is the count of number n
+        """
+        end = len(self) if end is None else end
+        return self.prefix_counts[end] - self.prefix_counts[start]
+    
+    def index_of(self, contest: int) -> Optional[int]:
+        """
+        Find the row of a contest.
+        
+        Args:
+            contest: Contest number
+        
+        Returns:
+            Row index, or None if the contest is not in the matrix
+        """
+        i = int(np.searchsorted(self.contests, contest))
+        if i < len(self.contests) and self.contests[i] == contest:
+            return i
+        return None
+    
+    def search(
+        self,
+        contains_all: Iterable[int] = (),
+        contains_any: Iterable[int] = (),
+        excludes: Iterable[int] = (),
+        sum_min: Optional[int] = None,
+        sum_max: Optional[int] = None,
+        even_count: Optional[int] = None,
+        ticket: Iterable[int] = (),
+        min_overlap: int = 0
+    ) -> np.ndarray:
+        """
+        Select the draws matching every given filter.
+        
+        Args:
+            contains_all: Numbers that must all be drawn
+            contains_any: Numbers of which at least one must be drawn
+            excludes: Numbers that must not be drawn
+            sum_min: Minimum sum of the drawn numbers
+            sum_max: Maximum sum of the drawn numbers
+            even_count: Exact number of even numbers drawn
+            ticket: Ticket to compare the draws with
+            min_overlap: Minimum numbers shared with the ticket
+            
+        Returns:
+            Boolean array, True for matching rows
+        """
+        selected = np.ones(len(self), dtype=bool)
+        
+        required = np.uint32(numbers_to_mask(contains_all))
+        if required:
+            selected &= (self.masks & required) == required
+        any_of = np.uint32(numbers_to_mask(contains_any))
+        if any_of:
+            selected &= (self.masks & any_of) != 0
+        excluded = np.uint32(numbers_to_mask(excludes))
+        if excluded:
+            selected &= (self.masks & excluded) == 0
+        
+        if sum_min is not None:
+            selected &= self.sums >= sum_min
+        if sum_max is not None:
+            selected &= self.sums <= sum_max
+        if even_count is not None:
+            selected &= self.even_counts == even_count
+        
+        ticket_mask = np.uint32(numbers_to_mask(ticket))
+        if ticket_mask and min_overlap > 0:
+            selected &= popcount(self.masks & ticket_mask) >= min_overlap
+        
+        return selected
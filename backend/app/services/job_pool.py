@@ -0,0 +1,372 @@
+"""
+Process pool for CPU-heavy analysis jobs.
+
+Suggestion generation and bulk ticket scoring are pure CPU work. In the
+threadpool they hold the GIL and slow down every other request of the
+worker, so JobPool runs them in a ProcessPoolExecutor owned by the app
+lifespan:
+
+- Worker processes are pre-loaded with the current history snapshot: the
+  shared draw matrix (see storage.shared_draw_matrix) is mapped when the
+  process starts and re-mapped when a job asks for a newer version, so
+  jobs only carry their own arguments.
+- Every job has a timeout; the caller gets JobTimeoutError (the process
+  finishes the job in the background but its result is dropped).
+- At most `max_pending` jobs are queued or running; beyond that, submit
+  raises PoolBusyError, which the API turns into a 503.
+- Long runs can be submitted as background jobs and polled by id. Their
+  records live in the database (see job_store), so any worker can answer
+  the poll, and expire after PROCESS_POOL_JOB_TTL_SECONDS.
+
+When the pool is not started (tests, PROCESS_POOL_WORKERS=0) the same
+jobs run in threads, one per queue slot, with the same limits.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services import job_store
+from app.services.draw_matrix import DrawMatrix
+from app.services.storage.shared_draw_matrix import attach_draw_matrix, matrix_version, published_versions
+
+logger = logging.getLogger(__name__)
+
+# A snapshot is passed to jobs by version when it is shared, else by value
+Snapshot = Union[str, DrawMatrix]
+
+
+class PoolBusyError(Exception):
+    """Raised when the job queue is full."""
+
+
+class JobTimeoutError(Exception):
+    """Raised when a job does not finish within its timeout."""
+
+
+# Worker side: the history snapshot of this process
+
+_worker_snapshot: Dict[str, Any] = {"version": None, "matrix": None, "history": None}
+
+
+def _init_worker(version: Optional[str]) -> None:
+    """Process initializer: map the latest published draw matrix."""
+    if version is None:
+        return
+    try:
+        _load_snapshot(version)
+    except Exception as e:
+        # A failing initializer would break the whole pool: load on first job instead
+        logger.warning(f"Could not pre-load draw matrix {version}: {e}")
+
+
+def _load_snapshot(snapshot: Snapshot) -> None:
+    """Make `snapshot` the current one of this process."""
+    if isinstance(snapshot, DrawMatrix):
+        matrix = snapshot
+    else:
+        matrix = attach_draw_matrix(snapshot)
+        if matrix is None:
+            raise LookupError(f"Draw matrix {snapshot} is not published")
+    
+    _worker_snapshot["version"] = matrix_version(matrix) if len(matrix) else None
+    _worker_snapshot["matrix"] = matrix
+    _worker_snapshot["history"] = None
+
+
+def worker_draw_matrix(snapshot: Snapshot) -> DrawMatrix:
+    """
+    Get the draw matrix of a snapshot inside a job.
+    
+    Args:
+        snapshot: Version of a published matrix, or the matrix itself
+    
+    Returns:
+        DrawMatrix (re-mapped only when the version changed)
+    """
+    if isinstance(snapshot, DrawMatrix) or snapshot != _worker_snapshot["version"]:
+        _load_snapshot(snapshot)
+    return _worker_snapshot["matrix"]
+
+
+def worker_history(snapshot: Snapshot) -> pd.DataFrame:
+    """Get the history DataFrame of a snapshot inside a job (built once per version)."""
+    matrix = worker_draw_matrix(snapshot)
+    if _worker_snapshot["history"] is None:
+        _worker_snapshot["history"] = matrix.to_history()
+    return _worker_snapshot["history"]
+
+
+def snapshot_of(matrix: DrawMatrix) -> Snapshot:
+    """
+    Reference a matrix for a job: by version if workers can map it, else by value.
+    
+    Args:
+        matrix: Cached draw matrix of the current contest version
+    
+    Returns:
+        Snapshot to pass to a job
+    """
+    if isinstance(matrix.masks, np.memmap) and len(matrix):
+        return matrix_version(matrix)
+    return matrix
+
+
+# Jobs (module-level so they can be pickled)
+
+def score_tickets_job(snapshot: Snapshot, tickets: List[List[int]]) -> str:
+    """
+    Score tickets over the snapshot's history.
+    
+    Returns the rendered JSON response: encoding thousands of scores is
+    CPU work too, better done here than on the event loop.
+    """
+    from app.services.ticket_scoring import distribution_response, hit_distribution, tickets_to_masks
+    matrix = worker_draw_matrix(snapshot)
+    counts = hit_distribution(tickets_to_masks(tickets), matrix.masks)
+    return distribution_response(tickets, counts, len(matrix)).model_dump_json()
+
+
+def generate_suggestions_job(
+    snapshot: Snapshot,
+    statistics: Dict[str, Any],
+    plan: Dict[str, Any],
+    strategy: str,
+    count: int
+) -> List[Dict]:
+    """Generate suggestions against the snapshot's history."""
+    from app.services.strategy_service import LotteryStrategyGenerator
+    generator = LotteryStrategyGenerator(statistics, worker_history(snapshot), plan=plan)
+    return generator.generate_suggestions(strategy, count)
+
+
+# Parent side
+
+class Slot:
+    """A queue slot reserved with JobPool.reserve, used by at most one job."""
+    
+    def __init__(self):
+        self.used = False
+
+
+class JobPool:
+    """Bounded process pool with per-job timeouts and background jobs."""
+    
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        """
+        Args:
+            workers: Worker processes (0 runs jobs in a thread instead)
+            max_pending: Jobs queued or running before submissions are refused
+            timeout_seconds: Default job timeout
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor = None
+        # One thread per queue slot, so jobs don't wait behind each other
+        self._fallback = ThreadPoolExecutor(max_workers=max(1, max_pending), thread_name_prefix="job-pool")
+        self._lock = threading.Lock()
+        self._pending = 0
+    
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+    
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running (including timed-out ones still running)."""
+        return self._pending
+    
+    @property
+    def is_busy(self) -> bool:
+        """Whether a submission would be refused right now."""
+        return self._pending >= self.max_pending
+    
+    def start(self) -> None:
+        """Start the worker processes, pre-loaded with the latest published snapshot."""
+        if self.started or self.workers <= 0:
+            return
+        
+        versions = published_versions() if settings.shared_draw_matrix_enabled else []
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(versions[-1] if versions else None,)
+        )
+        # Processes spawn on demand: start them now, not on the first request
+        for _ in range(self.workers):
+            self._executor.submit(os.getpid)
+        logger.info(f"Job pool started with {self.workers} worker processes")
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the workers, dropping queued jobs.
+        
+        Args:
+            wait: Block until running jobs finish and the processes exit
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+    
+    def _acquire(self) -> None:
+        """Take a queue slot, refusing it when the queue is full."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolBusyError(f"{self._pending} jobs pending")
+            self._pending += 1
+    
+    @contextmanager
+    def reserve(self) -> Iterator[Slot]:
+        """
+        Reserve a queue slot before doing work that must not be wasted on
+        a refused job (e.g. loading the data the job needs).
+        
+        Pass the slot to run(); it is given back if no job used it.
+        
+        Raises:
+            PoolBusyError: Too many jobs pending
+        """
+        self._acquire()
+        slot = Slot()
+        try:
+            yield slot
+        finally:
+            if not slot.used:
+                self._release(None)
+    
+    def _submit(self, fn: Callable, *args, slot: Optional[Slot] = None) -> Future:
+        """Queue a job in a reserved slot, or in a new one."""
+        if slot is not None and not slot.used:
+            slot.used = True
+        else:
+            self._acquire()
+        
+        executor = self._executor or self._fallback
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+    
+    def _release(self, _: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+    
+    async def run(self, fn: Callable, *args, timeout: float = None, slot: Optional[Slot] = None) -> Any:
+        """
+        Run a job and wait for its result.
+        
+        Args:
+            fn: Module-level job function
+            *args: Picklable job arguments
+            timeout: Seconds to wait (defaults to timeout_seconds)
+            slot: Slot from reserve() to run the job in
+        
+        Returns:
+            The job's result
+        
+        Raises:
+            PoolBusyError: Too many jobs pending
+            JobTimeoutError: The job did not finish in time
+        """
+        future = self._submit(fn, *args, slot=slot)
+        timeout = timeout or self.timeout_seconds
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise JobTimeoutError(f"Job {fn.__name__} timed out after {timeout}s")
+    
+    def submit_job(
+        self,
+        name: str,
+        fn: Callable,
+        *args,
+        timeout: float = None,
+        encode: Callable[[Any], str] = json.dumps
+    ) -> Dict[str, Any]:
+        """
+        Start a background job whose outcome is polled with job_store.get_job.
+        
+        Blocking (writes the job record): call it from a thread.
+        
+        Args:
+            name: Job type, reported by the status API
+            fn: Module-level job function
+            *args: Picklable job arguments
+            timeout: Seconds before the job is reported as timed out
+            encode: Turns the job's result into JSON text for the record
+        
+        Returns:
+            Status of the queued job
+        
+        Raises:
+            PoolBusyError: Too many jobs pending
+        """
+        job_id = uuid.uuid4().hex
+        timeout = timeout or self.timeout_seconds
+        
+        with self.reserve() as slot:
+            with SessionLocal() as db:
+                status = job_store.job_to_dict(job_store.create_job(db, job_id, name, timeout))
+            future = self._submit(fn, *args, slot=slot)
+        
+        def record(state: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+            try:
+                with SessionLocal() as db:
+                    job_store.finish_job(db, job_id, state, result=result, error=error)
+            except Exception as e:
+                logger.error(f"Could not record outcome of job {job_id}: {e}")
+        
+        def finish(future: Future) -> None:
+            if future.cancelled():
+                record("timeout", error=f"Timed out after {timeout}s")
+            elif future.exception() is not None:
+                record("failed", error=str(future.exception()))
+            else:
+                try:
+                    record("completed", result=encode(future.result()))
+                except Exception as e:
+                    record("failed", error=f"Could not encode result: {e}")
+        
+        def expire() -> None:
+            if not future.done() and not future.cancel():
+                # Already running: the result will be dropped
+                record("timeout", error=f"Timed out after {timeout}s")
+        
+        future.add_done_callback(finish)
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        return status
+
+
+# Singleton instance
+_pool_instance = None
+
+def get_job_pool() -> JobPool:
+    """Get singleton instance of JobPool (started by the app lifespan)."""
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = JobPool(
+            workers=settings.process_pool_workers,
+            max_pending=settings.process_pool_max_pending,
+            timeout_seconds=settings.process_pool_job_timeout_seconds
+        )
+    return _pool_instance
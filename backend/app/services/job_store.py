@@ -0,0 +1,140 @@
+"""
+Persistence of background jobs.
+
+The app runs several worker processes (gunicorn workers), and a poll for a
+job may land on any of them, so job records live in the database rather
+than in the memory of the worker that runs the job. Records (including
+their results) expire PROCESS_POOL_JOB_TTL_SECONDS after the job finishes
+and are purged on the next submission.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.lottery import BackgroundJob
+
+# States a job can still leave; finished states are final
+OPEN_STATES = ("queued",)
+
+
+def job_to_dict(job: BackgroundJob) -> Dict[str, Any]:
+    """Status as returned by the job API (result decoded from JSON)."""
+    return {
+        "job_id": job.job_id,
+        "name": job.name,
+        "status": job.status,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "result": json.loads(job.result) if job.result is not None else None,
+        "error": job.error,
+    }
+
+
+def create_job(db: Session, job_id: str, name: str, timeout: float) -> BackgroundJob:
+    """
+    Record a new queued job, purging expired ones.
+    
+    Args:
+        db: Database session
+        job_id: Id returned to the client
+        name: Job type
+        timeout: Job timeout; the record outlives it by the TTL even if
+            the worker running the job dies
+    
+    Returns:
+        The stored record
+    """
+    now = datetime.utcnow()
+    purge_expired_jobs(db, now)
+    
+    job = BackgroundJob(
+        job_id=job_id,
+        name=name,
+        status="queued",
+        created_at=now,
+        expires_at=now + timedelta(seconds=timeout + settings.process_pool_job_ttl_seconds),
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def finish_job(
+    db: Session,
+    job_id: str,
+    status: str,
+    result: Optional[str] = None,
+    error: Optional[str] = None
+) -> bool:
+    """
+    Record the outcome of a job, unless it was already recorded.
+    
+    Args:
+        db: Database session
+        job_id: Job id
+        status: completed, failed or timeout
+        result: JSON-encoded output of a completed job
+        error: Error message of a failed or timed-out job
+    
+    Returns:
+        True if the outcome was recorded
+    """
+    now = datetime.utcnow()
+    statement = (
+        update(BackgroundJob)
+        .where(BackgroundJob.job_id == job_id, BackgroundJob.status.in_(OPEN_STATES))
+        .values(
+            status=status,
+            result=result,
+            error=error,
+            finished_at=now,
+            expires_at=now + timedelta(seconds=settings.process_pool_job_ttl_seconds),
+        )
+    )
+    updated = db.execute(statement).rowcount
+    db.commit()
+    return updated > 0
+
+
+def purge_expired_jobs(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Delete expired job records.
+    
+    Args:
+        db: Database session
+        now: Reference time (defaults to now)
+    
+    Returns:
+        Number of records deleted
+    """
+    now = now or datetime.utcnow()
+    deleted = db.execute(delete(BackgroundJob).where(BackgroundJob.expires_at < now)).rowcount
+    db.commit()
+    return deleted
+
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a job's status.
+    
+    Args:
+        db: Async database session
+        job_id: Job id
+    
+    Returns:
+        Status dict, or None if the job is unknown or expired
+    """
+    result = await db.execute(
+        select(BackgroundJob).where(
+            BackgroundJob.job_id == job_id,
+            BackgroundJob.expires_at >= datetime.utcnow()
+        )
+    )
+    job = result.scalar_one_or_none()
+    return job_to_dict(job) if job is not None else None
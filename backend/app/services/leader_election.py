@@ -0,0 +1,52 @@
+"""
+Leader election between worker processes.
+
+Every gunicorn worker runs the same lifespan. Only the worker holding the
+leader lock syncs with the Caixa API and runs the scheduled update jobs;
+the others serve requests and pick up new contests through the contest
+version cache (see app.services.cache_service).
+"""
+
+import logging
+
+from app.core.locks import ProcessLock, create_lock
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_NAME = "lottery-data-leader"
+
+# Lock held by this process while it is the leader
+_leader_lock: ProcessLock = None
+
+
+def try_acquire_leadership() -> bool:
+    """
+    Try to become the leader without blocking.
+    
+    Returns:
+        True if this process is (now) the leader
+    """
+    global _leader_lock
+    if _leader_lock is None:
+        _leader_lock = create_lock(LEADER_LOCK_NAME)
+    
+    try:
+        acquired = _leader_lock.acquire(blocking=False)
+    except Exception as e:
+        logger.error(f"Leader election failed: {e}")
+        return False
+    
+    if acquired:
+        logger.info("This process is the leader for lottery data updates")
+    return acquired
+
+
+def is_leader() -> bool:
+    """Whether this process currently holds the leader lock."""
+    return _leader_lock is not None and _leader_lock.is_held
+
+
+def release_leadership() -> None:
+    """Release the leader lock (called on shutdown)."""
+    if _leader_lock is not None:
+        _leader_lock.release()
@@ -5,6 +5,7 @@ This module contains pipeline functions that orchestrate the various
 components of the lottery analysis system.
 """
 
+from app.services.pipelines.post_ingest import register_post_ingest_hook, run_post_ingest_hooks
 from app.services.pipelines.update_and_analyze import run_pipeline
 
-__all__ = ["run_pipeline"]
+__all__ = ["run_pipeline", "register_post_ingest_hook", "run_post_ingest_hooks"]
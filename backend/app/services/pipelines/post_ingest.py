@@ -0,0 +1,131 @@
+"""
+Post-ingest hooks - Pre-warm derived data after new contests land.
+
+Hooks run in registration order after a successful ingest (see
+LotofacilFetcher.update_database), off the request path, so the first
+requests after a draw are served from warm caches.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.cache_service import (
+    get_cached_draw_matrix,
+    get_cached_history,
+    get_cached_latest_result,
+    get_cached_result_count,
+    get_cached_statistics,
+    get_cached_strategy_plan,
+    get_cached_windowed_frequencies,
+    refresh_contest_version,
+)
+
+logger = logging.getLogger(__name__)
+
+PostIngestHook = Callable[[Session], None]
+
+# Registered hooks as (name, hook), in execution order
+_hooks: List[Tuple[str, PostIngestHook]] = []
+
+
+def register_post_ingest_hook(name: str) -> Callable[[PostIngestHook], PostIngestHook]:
+    """
+    Decorator registering a function to run after each successful ingest.
+    
+    Args:
+        name: Hook name (used in logs and timings); re-registering a name
+              replaces the previous hook
+        
+    Returns:
+        Decorator returning the hook unchanged
+    """
+    def decorator(hook: PostIngestHook) -> PostIngestHook:
+        for i, (existing, _) in enumerate(_hooks):
+            if existing == name:
+                _hooks[i] = (name, hook)
+                break
+        else:
+            _hooks.append((name, hook))
+        return hook
+    
+    return decorator
+
+
+def get_post_ingest_hooks() -> List[str]:
+    """Get the names of registered hooks, in execution order."""
+    return [name for name, _ in _hooks]
+
+
+def run_post_ingest_hooks(db: Session) -> Dict[str, float]:
+    """
+    Run every registered hook.
+    
+    A failing hook is logged and does not prevent the others from running.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        dict: Duration of each hook in milliseconds (None if it failed)
+    """
+    timings = {}
+    started = time.perf_counter()
+    
+    for name, hook in _hooks:
+        hook_started = time.perf_counter()
+        try:
+            hook(db)
+            timings[name] = round((time.perf_counter() - hook_started) * 1000, 2)
+        except Exception as e:
+            db.rollback()
+            timings[name] = None
+            logger.error(f"Post-ingest hook '{name}' failed: {e}")
+    
+    total_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Post-ingest hooks finished in {total_ms:.1f}ms: {timings}")
+    return timings
+
+
+# Default hooks: invalidate first, then rebuild every derived cache entry
+
+@register_post_ingest_hook("contest_version")
+def _refresh_contest_version(db: Session) -> None:
+    refresh_contest_version(db)
+
+
+@register_post_ingest_hook("draw_matrix")
+def _warm_draw_matrix(db: Session) -> None:
+    get_cached_draw_matrix(db)
+
+
+@register_post_ingest_hook("history")
+def _warm_history(db: Session) -> None:
+    get_cached_history(db)
+
+
+@register_post_ingest_hook("statistics")
+def _warm_statistics(db: Session) -> None:
+    get_cached_statistics(db)
+
+
+@register_post_ingest_hook("windowed_frequencies")
+def _warm_windowed_frequencies(db: Session) -> None:
+    get_cached_windowed_frequencies(db)
+
+
+@register_post_ingest_hook("strategy_plan")
+def _warm_strategy_plan(db: Session) -> None:
+    get_cached_strategy_plan(db)
+
+
+@register_post_ingest_hook("latest_result")
+def _warm_latest_result(db: Session) -> None:
+    get_cached_latest_result(db)
+
+
+@register_post_ingest_hook("result_count")
+def _warm_result_count(db: Session) -> None:
+    get_cached_result_count(db)
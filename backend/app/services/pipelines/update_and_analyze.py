@@ -8,7 +8,7 @@ loading data, updating it, and running analysis.
 from typing import Dict
 import asyncio
 
-from app.services.statistics_service import LotteryStatisticsService
+from app.services.cache_service import get_cached_statistics
 from app.services.data.lotofacil_fetcher import get_fetcher
 from app.core.database import SessionLocal
 
@@ -18,7 +18,8 @@ async def run_pipeline() -> Dict[str, any]:
     Execute the main lottery analysis pipeline.
     
     This function orchestrates the entire workflow:
-    1. Fetch latest results from API and update database
+    1. Fetch latest results from API and update database (new contests
+       trigger the post-ingest hooks, which pre-warm derived caches)
     2. Run statistical analysis from database
     3. Return results
     
@@ -41,10 +42,10 @@ async def run_pipeline() -> Dict[str, any]:
             print(f"Warning: Could not update database: {update_result.get('error')}")
             print("Proceeding with existing data...")
 
-        # Step 2: Run statistical analysis
+        # Step 2: Run statistical analysis (pre-warmed by the post-ingest
+        # hooks when new contests were added)
         print("\nComputing statistics from database...")
-        statistics_service = LotteryStatisticsService(db)
-        stats = statistics_service.compute_statistics()
+        stats = get_cached_statistics(db)
         print("Statistics computed successfully")
 
         return stats
@@ -1,79 +1,116 @@
 """
 Rate Limiting Service for free tier users.
+
+Counting is a single atomic statement per request:
+
+    INSERT ... ON CONFLICT (user_id, date)
+    DO UPDATE SET suggestions_count = suggestions_count + 1
+    WHERE suggestions_count < limit
+    RETURNING suggestions_count
+
+No row comes back once the limit is reached, so concurrent requests can
+never push a user past it. Premium status is served from the subscription
+cache, so a free user's request costs one round trip.
+
+With RATE_LIMIT_BACKEND=memory|redis, counting moves to the sliding-window
+limiter in usage_limiter and the database is only written in batches.
 """
 
 from datetime import date, datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.lottery import UserSuggestionUsage, UserSubscription
+from app.models.lottery import UserSuggestionUsage
 from app.core.config import settings
+from app.core.database import dialect_insert
+from app.services.subscription_service import get_subscription_status
+from app.services.usage_limiter import get_usage_limiter
 
 
 class RateLimitService:
     """Service for managing rate limits on suggestions."""
     
-    def __init__(self, db: Session):
-        """Initialize the service with database session."""
+    def __init__(self, db: AsyncSession):
+        """Initialize the service with an async database session."""
         self.db = db
     
-    def check_and_increment(self, user_id: str) -> tuple[bool, int]:
+    async def is_premium(self, user_id: str) -> bool:
         """
-        Check if user can generate suggestions and increment counter.
+        Check if user has active premium subscription.
+        
+        Served from the subscription cache; the subscription is only
+        queried on a miss.
         
         Args:
             user_id: User/device ID
             
         Returns:
-            Tuple of (can_generate, remaining_count)
+            True if premium, False otherwise
         """
-        # Check if user is premium
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == user_id
-        ).first()
+        status = await get_subscription_status(self.db, user_id)
+        return status.is_active
+    
+    async def _increment_usage(self, user_id: str) -> Optional[int]:
+        """
+        Atomically count one suggestion for today, unless the limit is reached.
         
-        is_premium = False
-        if subscription and subscription.is_premium:
-            # Check if subscription is still valid
-            if subscription.expires_at is None or subscription.expires_at > datetime.utcnow():
-                is_premium = True
+        Returns:
+            The new count, or None if the daily limit was already reached
+        """
+        now = datetime.utcnow()
+        usage = UserSuggestionUsage.__table__
+        
+        statement = dialect_insert(self.db)(usage).values(
+            user_id=user_id,
+            date=date.today(),
+            suggestions_count=1,
+            is_premium=False,
+            created_at=now,
+            updated_at=now,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[usage.c.user_id, usage.c.date],
+            set_={
+                "suggestions_count": usage.c.suggestions_count + 1,
+                "updated_at": now,
+            },
+            where=usage.c.suggestions_count < settings.rate_limit_suggestions_per_day,
+        ).returning(usage.c.suggestions_count)
+        
+        count = (await self.db.execute(statement)).scalar()
+        await self.db.commit()
+        return count
+    
+    async def check_and_increment(self, user_id: str) -> tuple[bool, int]:
+        """
+        Check if user can generate suggestions and increment counter.
         
+        Args:
+            user_id: User/device ID
+            
+        Returns:
+            Tuple of (can_generate, remaining_count)
+        """
         # Premium users have unlimited suggestions
-        if is_premium:
+        if await self.is_premium(user_id):
             return True, -1  # -1 indicates unlimited
         
-        # Check today's usage for free users
-        today = date.today()
-        usage = self.db.query(UserSuggestionUsage).filter(
-            UserSuggestionUsage.user_id == user_id,
-            UserSuggestionUsage.date == today
-        ).first()
-        
-        if not usage:
-            # Create new usage record
-            usage = UserSuggestionUsage(
-                user_id=user_id,
-                date=today,
-                suggestions_count=1,
-                is_premium=False
-            )
-            self.db.add(usage)
-            self.db.commit()
-            remaining = settings.rate_limit_suggestions_per_day - 1
-            return True, remaining
+        limiter = get_usage_limiter()
+        if limiter is not None:
+            count = await limiter.hit(user_id)
+        else:
+            count = await self._increment_usage(user_id)
         
         # Check if limit reached
-        if usage.suggestions_count >= settings.rate_limit_suggestions_per_day:
+        if count is None:
             return False, 0
         
-        # Increment counter
-        usage.suggestions_count += 1
-        usage.updated_at = datetime.utcnow()
-        self.db.commit()
-        
-        remaining = settings.rate_limit_suggestions_per_day - usage.suggestions_count
+        remaining = settings.rate_limit_suggestions_per_day - count
         return True, remaining
     
-    def get_remaining_count(self, user_id: str) -> int:
+    async def get_remaining_count(self, user_id: str) -> int:
         """
         Get remaining suggestions count for today.
         
@@ -83,50 +120,24 @@ class RateLimitService:
         Returns:
             Remaining count (-1 for premium/unlimited)
         """
-        # Check if premium
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == user_id
-        ).first()
+        if await self.is_premium(user_id):
+            return -1  # Unlimited
         
-        if subscription and subscription.is_premium:
-            if subscription.expires_at is None or subscription.expires_at > datetime.utcnow():
-                return -1  # Unlimited
+        limiter = get_usage_limiter()
+        if limiter is not None:
+            return await limiter.remaining(user_id)
         
         # Check today's usage
-        today = date.today()
-        usage = self.db.query(UserSuggestionUsage).filter(
-            UserSuggestionUsage.user_id == user_id,
-            UserSuggestionUsage.date == today
-        ).first()
+        result = await self.db.execute(
+            select(UserSuggestionUsage.suggestions_count).where(
+                UserSuggestionUsage.user_id == user_id,
+                UserSuggestionUsage.date == date.today()
+            )
+        )
+        count = result.scalar()
         
-        if not usage:
+        if count is None:
             return settings.rate_limit_suggestions_per_day
         
-        remaining = settings.rate_limit_suggestions_per_day - usage.suggestions_count
+        remaining = settings.rate_limit_suggestions_per_day - count
         return max(0, remaining)
-    
-    def is_premium(self, user_id: str) -> bool:
-        """
-        Check if user has active premium subscription.
-        
-        Args:
-            user_id: User/device ID
-            
-        Returns:
-            True if premium, False otherwise
-        """
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == user_id
-        ).first()
-        
-        if not subscription or not subscription.is_premium:
-            return False
-        
-        # Check expiration
-        if subscription.expires_at and subscription.expires_at <= datetime.utcnow():
-            # Subscription expired, update status
-            subscription.is_premium = False
-            self.db.commit()
-            return False
-        
-        return True
@@ -1,13 +1,19 @@
 """Scheduler service for automated lottery data updates."""
 
+import asyncio
 import logging
+from typing import Dict, List
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import SessionLocal
+from app.services.cache_service import get_latest_contest_number, refresh_contest_version
 from app.services.data.lotofacil_fetcher import get_fetcher
+from app.services.leader_election import is_leader, try_acquire_leadership
 
 logger = logging.getLogger(__name__)
 
@@ -15,62 +21,251 @@ logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
 
-async def update_lottery_data():
+class DrawPollingPolicy:
+    """
+    Retry policy for polling the upstream API after a draw.
+    
+    Polling starts near the expected draw time and backs off exponentially
+    until a new contest is published or the attempts run out, which bounds
+    the number of upstream calls per draw.
+    """
+    
+    def __init__(
+        self,
+        initial_delay_seconds: float = 60,
+        backoff_factor: float = 2.0,
+        max_delay_seconds: float = 900,
+        max_attempts: int = 16
+    ):
+        self.initial_delay_seconds = initial_delay_seconds
+        self.backoff_factor = backoff_factor
+        self.max_delay_seconds = max_delay_seconds
+        self.max_attempts = max_attempts
+    
+    @classmethod
+    def from_settings(cls) -> "DrawPollingPolicy":
+        """Build the policy from application settings."""
+        return cls(
+            initial_delay_seconds=settings.poll_initial_delay_seconds,
+            backoff_factor=settings.poll_backoff_factor,
+            max_delay_seconds=settings.poll_max_delay_seconds,
+            max_attempts=settings.poll_max_attempts,
+        )
+    
+    def delays(self) -> List[float]:
+        """
+        Delays to wait after each unsuccessful attempt.
+        
+        Returns:
+            One delay per attempt except the last one
+        """
+        delays = []
+        delay = self.initial_delay_seconds
+        for _ in range(self.max_attempts - 1):
+            delays.append(min(delay, self.max_delay_seconds))
+            delay *= self.backoff_factor
+        return delays
+
+
+async def poll_lottery_data(policy: DrawPollingPolicy = None) -> Dict[str, any]:
     """
-    Scheduled task to update lottery data from Caixa API.
-    This runs automatically based on the configured schedule.
+    Scheduled task to pick up a new draw from Caixa API.
+    
+    Polls the latest result with exponential backoff until a contest newer
+    than the database appears, then ingests it (which runs the post-ingest
+    hooks) and stops.
+    
+    Args:
+        policy: Polling policy (defaults to the configured one)
+        
+    Returns:
+        Dict with polling status and the update result, if any
     """
-    logger.info("Starting scheduled lottery data update...")
+    if not await asyncio.to_thread(is_leader):
+        logger.info("Not the leader, skipping lottery data polling")
+        return {"success": False, "error": "Not the leader"}
+    
+    policy = policy or DrawPollingPolicy.from_settings()
+    delays = policy.delays()
+    fetcher = get_fetcher()
     
     db: Session = SessionLocal()
     try:
-        fetcher = get_fetcher()
-        result = await fetcher.update_database(db)
+        known_contest = get_latest_contest_number(db)
+        logger.info(f"Polling for contest {known_contest + 1}...")
         
-        if result.get("success"):
-            logger.info(
-                f"✅ Lottery data update completed: {result.get('message')} "
-                f"(Latest contest: {result.get('latest_contest')})"
-            )
-        else:
-            logger.error(f"❌ Lottery data update failed: {result.get('error')}")
+        for attempt in range(1, policy.max_attempts + 1):
+            latest_api_result = await fetcher.fetch_latest_result()
+            latest_api_contest = (latest_api_result or {}).get("numero") or 0
             
+            if latest_api_contest > known_contest:
+                result = await fetcher.update_database(db, latest_api_result=latest_api_result)
+                if result.get("success"):
+                    logger.info(
+                        f"✅ Lottery data update completed after {attempt} attempt(s): "
+                        f"{result.get('message')} (Latest contest: {result.get('latest_contest')})"
+                    )
+                else:
+                    logger.error(f"❌ Lottery data update failed: {result.get('error')}")
+                return {**result, "attempts": attempt}
+            
+            if attempt < policy.max_attempts:
+                delay = delays[attempt - 1]
+                logger.info(
+                    f"Contest {known_contest + 1} not published yet "
+                    f"(attempt {attempt}/{policy.max_attempts}), retrying in {delay:.0f}s"
+                )
+                await asyncio.sleep(delay)
+        
+        logger.warning(
+            f"Contest {known_contest + 1} not published after {policy.max_attempts} attempts, "
+            f"giving up until the next draw"
+        )
+        return {
+            "success": False,
+            "attempts": policy.max_attempts,
+            "error": "No new contest published"
+        }
     except Exception as e:
         logger.error(f"Error in scheduled update: {e}")
+        return {"success": False, "error": str(e)}
     finally:
         db.close()
 
 
+async def refresh_contest_cache():
+    """
+    Pick up contests ingested by the leader.
+    
+    When the contest version moved, the post-ingest hooks rebuild this
+    worker's caches in the background instead of on the next request.
+    Runs in a worker thread so the rebuild never blocks the event loop.
+    """
+    from app.services.pipelines.post_ingest import run_post_ingest_hooks
+    
+    def run():
+        db: Session = SessionLocal()
+        try:
+            if refresh_contest_version(db):
+                run_post_ingest_hooks(db)
+        finally:
+            db.close()
+    
+    try:
+        await asyncio.to_thread(run)
+    except Exception as e:
+        logger.error(f"Error refreshing contest cache: {e}")
+
+
+async def compact_suggestion_usage():
+    """
+    Daily retention job: roll old usage rows into monthly aggregates.
+    
+    Runs in a worker thread; each batch is its own short transaction.
+    """
+    from app.services.usage_retention import run_usage_retention
+    
+    def run():
+        db: Session = SessionLocal()
+        try:
+            return run_usage_retention(db)
+        finally:
+            db.close()
+    
+    try:
+        return await asyncio.to_thread(run)
+    except Exception as e:
+        logger.error(f"Error in usage retention job: {e}")
+        return {"error": str(e)}
+
+
+async def elect_leader():
+    """
+    Periodic leader election.
+    
+    Followers keep trying to take the leader lock so that another worker
+    takes over the update jobs if the leader process exits. Checking and
+    taking the lock may wait on the database, so both run in a worker
+    thread.
+    """
+    if await asyncio.to_thread(is_leader):
+        return
+    
+    if await asyncio.to_thread(try_acquire_leadership):
+        setup_scheduler()
+
+
 def setup_scheduler():
     """
-    Configure and set up scheduled tasks.
-    Called during application startup.
+    Configure and set up the leader-only scheduled tasks.
+    Called once this process becomes the leader.
     """
     if not settings.scheduler_enabled:
         logger.info("Scheduler is disabled in settings")
         return
     
-    # Schedule daily lottery data update
+    # Poll for the new result on draw days, starting near the draw time
     scheduler.add_job(
-        update_lottery_data,
+        poll_lottery_data,
         CronTrigger(
+            day_of_week=settings.scheduler_draw_days,
             hour=settings.scheduler_update_hour,
-            minute=settings.scheduler_update_minute
+            minute=settings.scheduler_update_minute,
+            timezone=settings.scheduler_timezone
         ),
         id="update_lottery_data",
-        name="Update lottery results from Caixa API",
-        replace_existing=True
+        name="Poll Caixa API for the latest draw",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    
+    # Usage retention, once a day
+    scheduler.add_job(
+        compact_suggestion_usage,
+        CronTrigger(
+            hour=settings.usage_retention_hour,
+            minute=0,
+            timezone=settings.scheduler_timezone
+        ),
+        id="compact_suggestion_usage",
+        name="Roll old suggestion usage into monthly aggregates",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
     )
     
     logger.info(
-        f"📅 Scheduled lottery data update at "
-        f"{settings.scheduler_update_hour:02d}:{settings.scheduler_update_minute:02d} daily"
+        f"📅 Scheduled lottery data polling at "
+        f"{settings.scheduler_update_hour:02d}:{settings.scheduler_update_minute:02d} "
+        f"({settings.scheduler_draw_days}, {settings.scheduler_timezone})"
     )
 
 
 def start_scheduler():
-    """Start the scheduler."""
-    setup_scheduler()
+    """
+    Start the scheduler.
+    
+    Every worker runs the leader election and cache refresh jobs; the
+    update jobs are only added by the worker that wins the election (see
+    setup_scheduler).
+    """
+    scheduler.add_job(
+        elect_leader,
+        IntervalTrigger(seconds=settings.leader_election_interval_seconds),
+        id="elect_leader",
+        name="Leader election for lottery data updates",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        refresh_contest_cache,
+        IntervalTrigger(seconds=settings.contest_version_ttl_seconds),
+        id="refresh_contest_cache",
+        name="Pick up new contests and rebuild caches",
+        replace_existing=True
+    )
+    if is_leader():
+        setup_scheduler()
     scheduler.start()
     logger.info("✅ Scheduler started")
 
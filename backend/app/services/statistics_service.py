@@ -1,15 +1,25 @@
 """
 Lottery Statistics Service - Adapted from existing codebase.
 
-This service computes statistical analysis of lottery data.
+This service computes statistical analysis of lottery data, either in
+pandas from the loaded history or, with STATISTICS_BACKEND=sql, in the
+database: every figure in the summary derives from the per-number
+frequencies, so two small aggregate queries replace transferring every
+row (unnest() on PostgreSQL, json_each() on SQLite).
 """
 
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List
+import numpy as np
 import pandas as pd
+from sqlalchemy import Integer, cast, func, select, true
 from sqlalchemy.orm import Session
 
 from app.models.lottery import LotteryResult
 from app.core.config import settings
+from app.services.draw_matrix import history_frame
+
+# Rows fetched per round trip when streaming the history
+HISTORY_FETCH_SIZE = 1000
 
 
 class LotteryStatisticsService:
@@ -23,41 +33,103 @@ class LotteryStatisticsService:
         """Initialize the service with database session."""
         self.db = db
     
-    def get_history_dataframe(self) -> pd.DataFrame:
+    def iter_history_chunks(self, batch_size: int = HISTORY_FETCH_SIZE) -> Iterator[Dict[str, np.ndarray]]:
         """
-        Load lottery history from database into DataFrame.
+        Stream the history as column arrays, in contest order.
+        
+        Only the three needed columns are selected, as plain Core rows
+        (no ORM objects, no identity map), and fetched `batch_size` at a
+        time through a server-side cursor where the driver supports one.
+        
+        Args:
+            batch_size: Rows per chunk
+            
+        Yields:
+            dict with contests (int64[n]), dates (datetime64[D][n]) and
+            numbers (int16[n, k])
+        """
+        query = (
+            select(LotteryResult.contest_number, LotteryResult.draw_date, LotteryResult.numbers)
+            .order_by(LotteryResult.contest_number)
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in self.db.execute(query).partitions():
+            contests, dates, numbers = zip(*rows)
+            yield {
+                "contests": np.array(contests, dtype=np.int64),
+                "dates": np.array(dates, dtype="datetime64[D]"),
+                "numbers": np.array(numbers, dtype=np.int16),
+            }
+    
+    def load_history_arrays(self, batch_size: int = HISTORY_FETCH_SIZE) -> Dict[str, np.ndarray]:
+        """
+        Load the whole history into preallocated NumPy arrays.
         
+        Args:
+            batch_size: Rows fetched per round trip
+            
         Returns:
-            DataFrame with lottery history
+            dict with contests, dates and numbers arrays (see iter_history_chunks)
         """
-        results = self.db.query(LotteryResult).order_by(LotteryResult.contest_number).all()
+        capacity = self.db.execute(select(func.count(LotteryResult.id))).scalar() or 0
+        width = settings.numbers_per_game
+        contests = np.empty(capacity, dtype=np.int64)
+        dates = np.empty(capacity, dtype="datetime64[D]")
+        numbers = np.empty((capacity, width), dtype=np.int16)
         
-        if not results:
-            return pd.DataFrame()
+        size = 0
+        for chunk in self.iter_history_chunks(batch_size):
+            end = size + len(chunk["contests"])
+            if end > capacity:
+                # Contests ingested between the count and the read
+                capacity = max(end, capacity * 2)
+                contests = np.resize(contests, capacity)
+                dates = np.resize(dates, capacity)
+                numbers = np.resize(numbers, (capacity, width))
+            contests[size:end] = chunk["contests"]
+            dates[size:end] = chunk["dates"]
+            numbers[size:end] = chunk["numbers"]
+            size = end
         
-        # Convert to DataFrame format similar to original
-        data = []
-        for result in results:
-            row = {
-                'concurso': result.contest_number,
-                'data': result.draw_date,
-            }
-            # Add number columns
-            for i, num in enumerate(result.numbers, start=1):
-                row[f'bola_{i}'] = num
-            data.append(row)
+        return {"contests": contests[:size], "dates": dates[:size], "numbers": numbers[:size]}
+    
+    def get_history_dataframe(self) -> pd.DataFrame:
+        """
+        Load lottery history from database into DataFrame.
         
-        return pd.DataFrame(data)
+        Returns:
+            DataFrame with lottery history
+        """
+        arrays = self.load_history_arrays()
+        return history_frame(arrays["contests"], arrays["dates"], arrays["numbers"])
     
-    def compute_statistics(self) -> Dict[str, any]:
+    def compute_statistics(self, backend: str = None) -> Dict[str, any]:
         """
         Compute comprehensive statistics from the lottery history.
         
+        Args:
+            backend: "pandas" or "sql" (defaults to settings.statistics_backend)
+        
         Returns:
             dict: A structured dictionary containing statistics
         """
-        history = self.get_history_dataframe()
+        if (backend or settings.statistics_backend) == "sql":
+            return self.compute_statistics_sql()
+        return self.compute_statistics_from_history(self.get_history_dataframe())
+    
+    @staticmethod
+    def compute_statistics_from_history(history: pd.DataFrame) -> Dict[str, any]:
+        """
+        Compute comprehensive statistics from an already loaded history.
+        
+        Pure CPU work (no database access), so it can run on any thread.
         
+        Args:
+            history: DataFrame from get_history_dataframe
+            
+        Returns:
+            dict: A structured dictionary containing statistics
+        """
         if history.empty:
             return {
                 "error": "No data available for analysis",
@@ -87,14 +159,89 @@ class LotteryStatisticsService:
             date_range = {"first_draw": "N/A", "last_draw": "N/A"}
 
         # Number frequency analysis
-        all_numbers = []
-        for col in number_columns:
-            all_numbers.extend(history[col].dropna().tolist())
-
-        number_frequencies = pd.Series(all_numbers).value_counts().to_dict()
+        all_numbers = pd.Series(history[number_columns].to_numpy().ravel()).dropna()
+        number_frequencies = {int(num): int(freq) for num, freq in all_numbers.value_counts().items()}
+        
+        # Average sum of drawn numbers per contest
+        sums = history[number_columns].sum(axis=1)
+        average_sum = float(sums.mean())
         
-        # Most and least common numbers
-        sorted_frequencies = sorted(number_frequencies.items(), key=lambda x: x[1], reverse=True)
+        return LotteryStatisticsService.summarize_frequencies(
+            number_frequencies, total_contests, date_range, average_sum
+        )
+    
+    def get_number_frequencies(self) -> Dict[int, int]:
+        """
+        Count how often each number was drawn, aggregated in the database.
+        
+        Returns:
+            dict: {number: frequency}, most frequent first
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            number = func.unnest(LotteryResult.numbers).column_valued("number")
+            source = LotteryResult.__table__
+        else:
+            # json_each() reads the row on its left: an implicit lateral join
+            elements = func.json_each(LotteryResult.numbers).table_valued("value")
+            number = cast(elements.c.value, Integer)
+            source = LotteryResult.__table__.join(elements, true())
+        
+        frequency = func.count().label("frequency")
+        query = (
+            select(number, frequency)
+            .select_from(source)
+            .group_by(number)
+            .order_by(frequency.desc(), number)
+        )
+        return {int(num): int(freq) for num, freq in self.db.execute(query)}
+    
+    def compute_statistics_sql(self) -> Dict[str, Any]:
+        """
+        Compute the same statistics as compute_statistics_from_history with
+        aggregate queries, without loading the history.
+        
+        Returns:
+            dict: A structured dictionary containing statistics
+        """
+        total_contests, first_draw, last_draw = self.db.execute(
+            select(func.count(LotteryResult.id), func.min(LotteryResult.draw_date), func.max(LotteryResult.draw_date))
+        ).one()
+        
+        if not total_contests:
+            return {
+                "error": "No data available for analysis",
+                "total_contests": 0,
+            }
+        
+        number_frequencies = self.get_number_frequencies()
+        average_sum = sum(num * freq for num, freq in number_frequencies.items()) / total_contests
+        date_range = {"first_draw": str(first_draw), "last_draw": str(last_draw)}
+        
+        return self.summarize_frequencies(number_frequencies, total_contests, date_range, average_sum)
+    
+    @staticmethod
+    def summarize_frequencies(
+        number_frequencies: Dict[int, int],
+        total_contests: int,
+        date_range: Dict[str, str],
+        average_sum: float
+    ) -> Dict[str, Any]:
+        """
+        Build the statistics summary from per-number frequencies.
+        
+        Args:
+            number_frequencies: {number: frequency}, most frequent first
+            total_contests: Number of contests analyzed
+            date_range: First and last draw dates
+            average_sum: Average sum of the drawn numbers per contest
+            
+        Returns:
+            dict: A structured dictionary containing statistics
+        """
+        total_numbers = sum(number_frequencies.values())
+        
+        # Most and least common numbers (ties in number order, whatever the backend)
+        sorted_frequencies = sorted(number_frequencies.items(), key=lambda x: (-x[1], x[0]))
         most_common = [
             {"number": int(num), "frequency": int(freq)} 
             for num, freq in sorted_frequencies[:10]
@@ -103,37 +250,32 @@ class LotteryStatisticsService:
             {"number": int(num), "frequency": int(freq)} 
             for num, freq in sorted_frequencies[-10:]
         ]
-
-        # Average sum of drawn numbers per contest
-        sums = history[number_columns].sum(axis=1)
-        average_sum = float(sums.mean())
         
         # Even/Odd distribution
-        even_count = sum(1 for num in all_numbers if num % 2 == 0)
-        odd_count = len(all_numbers) - even_count
+        even_count = sum(freq for num, freq in number_frequencies.items() if num % 2 == 0)
+        odd_count = total_numbers - even_count
         even_odd_distribution = {
             "even": even_count,
             "odd": odd_count,
-            "even_percentage": round(even_count / len(all_numbers) * 100, 2),
-            "odd_percentage": round(odd_count / len(all_numbers) * 100, 2),
+            "even_percentage": round(even_count / total_numbers * 100, 2),
+            "odd_percentage": round(odd_count / total_numbers * 100, 2),
         }
-
+        
         # Number range distribution
         range_size = (settings.lottery_max_number - settings.lottery_min_number + 1) // 3
-        ranges = {
-            f"{settings.lottery_min_number}-{settings.lottery_min_number + range_size - 1}": 0,
-            f"{settings.lottery_min_number + range_size}-{settings.lottery_min_number + 2*range_size - 1}": 0,
-            f"{settings.lottery_min_number + 2*range_size}-{settings.lottery_max_number}": 0,
-        }
+        low_label = f"{settings.lottery_min_number}-{settings.lottery_min_number + range_size - 1}"
+        mid_label = f"{settings.lottery_min_number + range_size}-{settings.lottery_min_number + 2*range_size - 1}"
+        high_label = f"{settings.lottery_min_number + 2*range_size}-{settings.lottery_max_number}"
+        ranges = {low_label: 0, mid_label: 0, high_label: 0}
         
-        for num in all_numbers:
+        for num, freq in number_frequencies.items():
             if settings.lottery_min_number <= num < settings.lottery_min_number + range_size:
-                ranges[f"{settings.lottery_min_number}-{settings.lottery_min_number + range_size - 1}"] += 1
+                ranges[low_label] += freq
             elif settings.lottery_min_number + range_size <= num < settings.lottery_min_number + 2*range_size:
-                ranges[f"{settings.lottery_min_number + range_size}-{settings.lottery_min_number + 2*range_size - 1}"] += 1
+                ranges[mid_label] += freq
             else:
-                ranges[f"{settings.lottery_min_number + 2*range_size}-{settings.lottery_max_number}"] += 1
-
+                ranges[high_label] += freq
+        
         return {
             "total_contests": total_contests,
             "date_range": date_range,
@@ -143,5 +285,37 @@ class LotteryStatisticsService:
             "average_sum": average_sum,
             "even_odd_distribution": even_odd_distribution,
             "number_range_distribution": ranges,
-            "total_numbers_analyzed": len(all_numbers),
+            "total_numbers_analyzed": total_numbers,
         }
+    
+    def compute_windowed_frequencies(
+        self,
+        history: pd.DataFrame = None,
+        windows: List[int] = None
+    ) -> Dict[int, Dict[int, int]]:
+        """
+        Compute number frequencies over the most recent draws.
+        
+        Args:
+            history: History DataFrame (loaded from the database if omitted)
+            windows: Window sizes in draws (defaults to recent_draws_window, 50 and 100)
+            
+        Returns:
+            dict: Mapping of window size to {number: frequency}
+        """
+        if history is None:
+            history = self.get_history_dataframe()
+        windows = windows or [settings.recent_draws_window, 50, 100]
+        
+        if history.empty:
+            return {window: {} for window in windows}
+        
+        number_columns = [col for col in history.columns if str(col).startswith("bola")]
+        
+        windowed = {}
+        for window in windows:
+            recent = history.tail(min(window, len(history)))[number_columns]
+            counts = pd.Series(recent.values.ravel()).dropna().astype(int).value_counts()
+            windowed[window] = {int(num): int(freq) for num, freq in counts.items()}
+        
+        return windowed
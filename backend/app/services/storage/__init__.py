@@ -5,5 +5,19 @@ This module contains classes for managing the persistence of lottery data.
 """
 
 from app.services.storage.history_repository import LotteryHistoryRepository
+from app.services.storage.results_repository import (
+    count_draws_containing,
+    draws_with_min_hits,
+    find_draw_by_numbers,
+    find_draws_containing,
+    hit_distribution,
+)
 
-__all__ = ["LotteryHistoryRepository"]
+__all__ = [
+    "LotteryHistoryRepository",
+    "count_draws_containing",
+    "draws_with_min_hits",
+    "find_draw_by_numbers",
+    "find_draws_containing",
+    "hit_distribution",
+]
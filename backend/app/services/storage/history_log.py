@@ -0,0 +1,184 @@
+"""
+Append-only binary history log.
+
+New results are appended as fixed-width records instead of rewriting the
+whole Excel workbook:
+
+    header:  4s magic "LFHL", uint16 format version, 10 bytes reserved
+    record:  uint32 contest number, int32 draw date (proleptic ordinal),
+             uint32 mask of the drawn numbers (see app.core.bitmask)
+
+Appends are O(1) and fsync'd. A record torn by an interrupted write is
+ignored by readers and truncated on the next append, so the log never
+ends up corrupt. Readers memory-map the file.
+"""
+
+import logging
+import os
+import struct
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Set
+
+import numpy as np
+import pandas as pd
+
+from app.core.bitmask import matrix_from_masks, numbers_to_mask, popcount
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LFHL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sH10x")
+RECORD = struct.Struct("<IiI")
+RECORD_DTYPE = np.dtype([("contest", "<u4"), ("ordinal", "<i4"), ("mask", "<u4")])
+
+# Numbers per draw and their range
+DRAW_SIZE = 15
+MAX_NUMBER = 25
+
+
+def validate_draw(numbers: Iterable[int]) -> List[int]:
+    """
+    Check that numbers form a valid draw.
+    
+    Args:
+        numbers: Drawn numbers
+    
+    Returns:
+        The numbers as ints
+    
+    Raises:
+        ValueError: Unless there are exactly 15 distinct numbers between 1 and 25
+    """
+    numbers = [int(number) for number in numbers]
+    if len(numbers) != DRAW_SIZE or len(set(numbers)) != DRAW_SIZE:
+        raise ValueError(f"A draw must have exactly {DRAW_SIZE} distinct numbers, got {numbers}")
+    if not all(1 <= number <= MAX_NUMBER for number in numbers):
+        raise ValueError(f"Drawn numbers must be between 1 and {MAX_NUMBER}, got {numbers}")
+    return numbers
+
+
+class HistoryLog:
+    """
+    Append-only log of lottery results.
+    
+    Duplicate checks go through an in-memory index of contest numbers,
+    loaded once from the log and kept up to date by append().
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the log.
+        
+        Args:
+            path: Log file path (created on first append)
+        """
+        self.path = Path(path)
+        self._index: Set[int] = None
+
+    def _record_count(self) -> int:
+        """Number of complete records in the file."""
+        if not self.path.exists():
+            return 0
+        return max(0, (self.path.stat().st_size - HEADER.size) // RECORD.size)
+
+    def read(self) -> np.ndarray:
+        """
+        Memory-map the complete records.
+        
+        Returns:
+            Read-only structured array with fields contest, ordinal and mask
+        """
+        count = self._record_count()
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        
+        self._check_header()
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+
+    def _check_header(self) -> None:
+        with open(self.path, "rb") as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a history log (or unsupported version): {self.path}")
+
+    @property
+    def contests(self) -> Set[int]:
+        """Contest numbers in the log (in-memory index)."""
+        if self._index is None:
+            self._index = set(self.read()["contest"].tolist())
+        return self._index
+
+    def __contains__(self, contest: int) -> bool:
+        return int(contest) in self.contests
+
+    def __len__(self) -> int:
+        return self._record_count()
+
+    def append(self, contest: int, draw_date: date, numbers: Iterable[int]) -> None:
+        """
+        Append a result and fsync it.
+        
+        Args:
+            contest: Contest number
+            draw_date: Draw date
+            numbers: Drawn numbers
+        
+        Raises:
+            ValueError: If the numbers are not a valid draw or the contest
+                is already in the log.
+        """
+        numbers = validate_draw(numbers)
+        if contest in self:
+            raise ValueError(f"Contest {contest} already exists in the history log.")
+
+        record = RECORD.pack(int(contest), draw_date.toordinal(), numbers_to_mask(numbers))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+            else:
+                # Drop a record torn by an interrupted append
+                complete = HEADER.size + self._record_count() * RECORD.size
+                if f.tell() != complete:
+                    f.truncate(complete)
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.contests.add(int(contest))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Decode the log into a history DataFrame.
+        
+        Records that don't hold exactly 15 numbers (written before append
+        validated its input) are skipped with a warning.
+        
+        Returns:
+            pd.DataFrame with columns concurso, data, bola_1..bola_15
+        """
+        records = self.read()
+        valid = popcount(records["mask"]) == DRAW_SIZE
+        if not valid.all():
+            logger.warning(
+                f"Skipping invalid records in {self.path}: contests "
+                f"{records['contest'][~valid].tolist()}"
+            )
+            records = records[valid]
+        df = pd.DataFrame({
+            "concurso": records["contest"].astype(np.int64),
+            "data": [date.fromordinal(int(ordinal)) for ordinal in records["ordinal"]],
+        })
+        if len(records):
+            numbers = matrix_from_masks(records["mask"], width=DRAW_SIZE)
+            for i in range(numbers.shape[1]):
+                df[f"bola_{i + 1}"] = numbers[:, i].astype(np.int64)
+        return df
+
+    def clear(self) -> None:
+        """Remove the log (after its records were exported into the workbook)."""
+        self.path.unlink(missing_ok=True)
+        self._index = set()
@@ -3,15 +3,36 @@ Lottery History Repository - Handles reading and writing historical lottery data
 
 This module provides the LotteryHistoryRepository class for managing
 the historical lottery dataset stored in Excel format.
+
+The workbook is parsed by streaming it through openpyxl's read-only mode
+(see xlsx_stream) into typed columns. The parsed history is kept in a
+columnar sidecar cache (.npz under data/processed) keyed by the source
+file's path, size and modification time. Any change to the workbook
+invalidates the cache automatically.
+
+Results appended later go to a history log under data/history. Unlike the
+cache, the log is the only copy of those results until they are exported
+into the workbook, so it is kept out of the processed (disposable) data.
 """
 
+import json
+import os
+import shutil
+import tempfile
+import zlib
 from datetime import date
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Set
 
+import numpy as np
 import pandas as pd
 
 from app.core.config import settings
+from app.services.storage.history_log import HistoryLog, validate_draw
+from app.services.storage.xlsx_stream import iter_contest_records, records_to_arrays
+
+# Bump when the parsed layout changes so older sidecar caches are ignored
+CACHE_FORMAT = 2
 
 
 class LotteryHistoryRepository:
@@ -21,22 +42,117 @@ class LotteryHistoryRepository:
     This class handles:
     - Loading the historical dataset from Excel
     - Checking if a contest already exists
-    - Appending new results without duplication
+    - Appending new results without duplication (to an append-only log)
     """
 
-    def __init__(self, file_path: Path = None):
+    def __init__(
+        self,
+        file_path: Path = None,
+        cache_dir: Path = None,
+        use_cache: bool = True,
+        log_dir: Path = None
+    ):
         """
         Initialize the repository.
         
         Args:
             file_path: Path to the Excel file containing lottery history.
                       Defaults to the configured lottery_history_file from settings.
+            cache_dir: Directory for the columnar sidecar cache.
+                      Defaults to the processed data directory.
+            use_cache: Whether to read/write the sidecar cache.
+            log_dir: Directory for the history log.
+                    Defaults to the history log directory (data/history).
         """
-        self.file_path = file_path or settings.lottery_history_file
+        self.file_path = Path(file_path or settings.lottery_history_file)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.use_cache = use_cache
+        self.log_dir = Path(log_dir) if log_dir else None
+        self._log = None
+        self._contest_index: Optional[Set[int]] = None
+
+    @property
+    def log(self) -> HistoryLog:
+        """Append-only log holding results added after the workbook."""
+        if self._log is None:
+            log_dir = self.log_dir or settings.history_log_dir
+            log_path = log_dir / f"{self._file_id()}.history.log"
+            # Logs used to be kept next to the sidecar cache
+            legacy_path = (self.cache_dir or settings.processed_data_dir) / log_path.name
+            if legacy_path.exists() and not log_path.exists():
+                log_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(legacy_path), str(log_path))
+            self._log = HistoryLog(log_path)
+        return self._log
+
+    @property
+    def cache_path(self) -> Path:
+        """Sidecar cache file for this history file."""
+        cache_dir = self.cache_dir or settings.processed_data_dir
+        return cache_dir / f"{self._file_id()}.history.npz"
+
+    def _file_id(self) -> str:
+        """File name stem identifying this history file (name and path hash)."""
+        path_key = zlib.crc32(str(self.file_path.resolve()).encode("utf-8"))
+        return f"{self.file_path.stem}.{path_key:08x}"
+
+    def _source_key(self) -> Dict[str, any]:
+        """Identity of the current source file (path, size, mtime)."""
+        stat = self.file_path.stat()
+        return {
+            "path": str(self.file_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _read_cache(self) -> Optional[pd.DataFrame]:
+        """Load the history from the sidecar cache if it matches the source file."""
+        cache_path = self.cache_path
+        if not cache_path.exists():
+            return None
+
+        try:
+            with np.load(cache_path, allow_pickle=False) as cached:
+                meta = json.loads(str(cached["__meta__"]))
+                if meta.get("format") != CACHE_FORMAT or meta["source"] != self._source_key():
+                    return None
+
+                data = {}
+                for i, column in enumerate(meta["columns"]):
+                    values = cached[f"col_{i}"]
+                    # Text columns are stored as fixed-width unicode
+                    data[column] = values.astype(object) if values.dtype.kind == "U" else values
+                return pd.DataFrame(data, columns=meta["columns"])
+        except Exception:
+            # Corrupt or outdated cache format: fall back to parsing the workbook
+            return None
+
+    def _write_cache(self, df: pd.DataFrame) -> None:
+        """Store the parsed history in the sidecar cache (atomically)."""
+        arrays = {}
+        for i, column in enumerate(df.columns):
+            series = df[column]
+            if series.dtype == object:
+                if not series.map(lambda value: isinstance(value, str)).all():
+                    # Mixed object columns can't be stored without pickling
+                    return
+                arrays[f"col_{i}"] = series.to_numpy(dtype=str)
+            else:
+                arrays[f"col_{i}"] = series.to_numpy()
+
+        meta = {"format": CACHE_FORMAT, "source": self._source_key(), "columns": [str(col) for col in df.columns]}
+        cache_path = self.cache_path
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp.npz")
+        np.savez(tmp_path, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, cache_path)
 
     def load_history(self) -> pd.DataFrame:
         """
-        Load the historical lottery data from Excel.
+        Load the historical lottery data.
+        
+        Workbook rows are served from the sidecar cache when the workbook
+        hasn't changed since it was cached; otherwise the workbook is parsed
+        and the cache rebuilt. Results from the history log follow them.
         
         Returns:
             pd.DataFrame: DataFrame containing the historical lottery data.
@@ -52,51 +168,62 @@ class LotteryHistoryRepository:
                 f"Please ensure the file exists in the data/raw/ directory."
             )
 
+        df = self._load_workbook()
+        return self._merge_log(df)
+
+    def _load_workbook(self) -> pd.DataFrame:
+        """Load the workbook rows, from the sidecar cache when it is fresh."""
+        if self.use_cache:
+            cached = self._read_cache()
+            if cached is not None:
+                return cached
+
+        df = self._parse_workbook()
+
+        if self.use_cache:
+            try:
+                self._write_cache(df)
+            except OSError:
+                pass  # Read-only deployments just don't get the cache
+
+        return df
+
+    def _merge_log(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Append the results stored in the history log to the workbook rows."""
+        if len(self.log) == 0:
+            return df
+
+        log_df = self.log.to_dataframe()
+        log_df["data"] = pd.to_datetime(log_df["data"])
+        log_df = log_df.astype({col: dtype for col, dtype in df.dtypes.items() if col in log_df.columns})
+
+        return pd.concat([df, log_df], ignore_index=True)
+
+    def _parse_workbook(self) -> pd.DataFrame:
+        """
+        Parse the Excel workbook in a single streaming pass.
+        
+        Returns:
+            pd.DataFrame: Parsed history with typed columns 'concurso',
+                         'data' (datetime64) and 'bola_1'..'bola_N'.
+        
+        Raises:
+            ValueError: If the file is empty or has an invalid format.
+        """
         try:
-            # Try loading with skiprows=6 first (Lotofácil format from asloterias.com.br - header on line 7)
-            # Then fallback to skiprows=0 for standard format
-            df = None
-            
-            for skip in [6, 0]:
-                try:
-                    temp_df = pd.read_excel(self.file_path, skiprows=skip)
-                    # Normalize column names
-                    temp_df.columns = [str(col).strip().lower() for col in temp_df.columns]
-                    
-                    # Check if any column contains 'concurso'
-                    if any('concurso' in col for col in temp_df.columns):
-                        df = temp_df
-                        break
-                except Exception as e:
-                    continue
-            
-            if df is None:
-                raise ValueError("Could not find valid lottery data format in file")
-                
+            arrays = records_to_arrays(iter_contest_records(self.file_path))
+        except ValueError:
+            raise
         except Exception as e:
             raise ValueError(f"Failed to read Excel file: {e}")
 
-        if df.empty:
+        if len(arrays["contests"]) == 0:
             raise ValueError("The lottery history file is empty.")
 
-        # Validate that we have at least the basic columns
-        # Check if any column name contains 'concurso'
-        has_concurso = any('concurso' in str(col).lower() for col in df.columns)
-        
-        if not has_concurso:
-            raise ValueError(
-                "Invalid file format: 'concurso' column not found. "
-                f"Found columns: {df.columns.tolist()}\n"
-                "Expected columns: concurso, data, and number columns."
-            )
-        
-        # Rename first column to 'concurso' if it contains 'concurso'
-        for i, col in enumerate(df.columns):
-            if 'concurso' in str(col).lower():
-                df.columns.values[i] = 'concurso'
-                break
-
-        return df
+        data = {"concurso": arrays["contests"], "data": arrays["dates"].astype("datetime64[ns]")}
+        for i in range(arrays["numbers"].shape[1]):
+            data[f"bola_{i + 1}"] = arrays["numbers"][:, i]
+        return pd.DataFrame(data)
 
     def has_concurso(self, concurso: int) -> bool:
         """
@@ -108,14 +235,21 @@ class LotteryHistoryRepository:
         Returns:
             bool: True if the contest exists, False otherwise.
         """
-        df = self.load_history()
-        return concurso in df["concurso"].values
+        return int(concurso) in self._get_contest_index()
+
+    def _get_contest_index(self) -> Set[int]:
+        """In-memory index of contest numbers (workbook and log), built once."""
+        if self._contest_index is None:
+            self._contest_index = set(self.load_history()["concurso"].astype(int).tolist())
+        return self._contest_index
 
     def append_result(self, result: Dict[str, any]) -> None:
         """
-        Append a new lottery result to the history file.
+        Append a new lottery result to the history.
         
-        This method safely appends a new result without creating duplicates.
+        The result is appended to the binary history log (O(1), fsync'd)
+        rather than rewriting the workbook; use export_to_excel to fold the
+        log back into a spreadsheet.
         If the contest already exists, it will not be added again.
         
         Args:
@@ -135,7 +269,8 @@ class LotteryHistoryRepository:
         if not required_keys.issubset(result.keys()):
             raise ValueError(f"Result must contain keys: {required_keys}")
 
-        concurso = result["concurso"]
+        concurso = int(result["concurso"])
+        numbers = validate_draw(result["numeros"])
 
         # Check for duplicates
         if self.has_concurso(concurso):
@@ -144,20 +279,41 @@ class LotteryHistoryRepository:
                 "Duplicate entries are not allowed."
             )
 
-        # Load existing data
-        df = self.load_history()
+        draw_date = pd.to_datetime(result["data"], dayfirst=True).date()
+        self.log.append(concurso, draw_date, numbers)
+        self._contest_index.add(concurso)
 
-        # Create new row (this is a simplified version - actual implementation
-        # would need to match the exact column structure of the Excel file)
-        new_row = {
-            "concurso": concurso,
-            "data": result["data"],
-        }
+    def export_to_excel(self, output_path: Path = None) -> Path:
+        """
+        Write the full history (workbook plus log) to an Excel file.
+        
+        The file is written next to its destination, fsync'd and renamed
+        into place, so an interrupted export leaves the previous file
+        intact. Exporting onto the source workbook folds the log into it;
+        the log is only cleared once the new workbook is in place.
+        
+        Args:
+            output_path: Destination file. Defaults to the source workbook.
+        
+        Returns:
+            Path: The written file.
+        """
+        output_path = Path(output_path or self.file_path)
+        df = self.load_history()
 
-        # Add number columns (assuming they're named like bola_1, bola_2, etc.)
-        for i, num in enumerate(result["numeros"], start=1):
-            new_row[f"bola_{i}"] = num
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{output_path.stem}.", suffix=".xlsx", dir=output_path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                df.to_excel(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            if output_path.exists():
+                shutil.copymode(output_path, tmp_name)
+            os.replace(tmp_name, output_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
 
-        # Append and save
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        df.to_excel(self.file_path, index=False)
+        if output_path.resolve() == self.file_path.resolve():
+            self.log.clear()
+        return output_path
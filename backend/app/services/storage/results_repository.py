@@ -0,0 +1,125 @@
+"""
+Set queries over stored lottery results, evaluated in the database.
+
+Every result carries `numbers_mask` (bit n-1 set for number n), so
+"draws containing these numbers" and "how many numbers a ticket shares
+with each draw" are bitwise expressions the database evaluates itself;
+only the answer leaves it, not every row.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.bitmask import numbers_to_mask
+from app.core.sql_bitmask import bit_count
+from app.models.lottery import LotteryResult
+
+
+def _contains(numbers: Iterable[int]):
+    """WHERE clause: the draw includes every number in `numbers`."""
+    mask = numbers_to_mask(numbers)
+    return LotteryResult.numbers_mask.op("&")(mask) == mask
+
+
+def find_draws_containing(db: Session, numbers: Iterable[int], limit: Optional[int] = None) -> List[LotteryResult]:
+    """
+    Get the draws that include all of `numbers`, newest first.
+    
+    Args:
+        db: Database session
+        numbers: Numbers that must all have been drawn
+        limit: Maximum number of draws to return
+        
+    Returns:
+        Matching results
+    """
+    query = (
+        select(LotteryResult)
+        .where(_contains(numbers))
+        .order_by(LotteryResult.contest_number.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return list(db.execute(query).scalars().all())
+
+
+def count_draws_containing(db: Session, numbers: Iterable[int]) -> int:
+    """
+    Count the draws that include all of `numbers` (e.g. a pair or triple).
+    
+    Args:
+        db: Database session
+        numbers: Numbers that must all have been drawn
+        
+    Returns:
+        Number of matching draws
+    """
+    return db.execute(
+        select(func.count(LotteryResult.id)).where(_contains(numbers))
+    ).scalar() or 0
+
+
+def find_draw_by_numbers(db: Session, numbers: Iterable[int]) -> Optional[LotteryResult]:
+    """
+    Find a draw with exactly these numbers (uses the numbers_mask index).
+    
+    Args:
+        db: Database session
+        numbers: The full set of drawn numbers
+        
+    Returns:
+        The most recent matching result, or None if never drawn
+    """
+    return db.execute(
+        select(LotteryResult)
+        .where(LotteryResult.numbers_mask == numbers_to_mask(numbers))
+        .order_by(LotteryResult.contest_number.desc())
+        .limit(1)
+    ).scalars().first()
+
+
+def hit_distribution(db: Session, numbers: Iterable[int]) -> Dict[int, int]:
+    """
+    How many past draws shared exactly k numbers with a ticket, for each k.
+    
+    Args:
+        db: Database session
+        numbers: Ticket numbers
+        
+    Returns:
+        Mapping of hits to number of draws (hits with no draws are omitted)
+    """
+    hits = bit_count(LotteryResult.numbers_mask.op("&")(numbers_to_mask(numbers))).label("hits")
+    rows = db.execute(
+        select(hits, func.count(LotteryResult.id))
+        .where(LotteryResult.numbers_mask.is_not(None))
+        .group_by(hits)
+        .order_by(hits)
+    ).all()
+    return {int(row[0]): int(row[1]) for row in rows}
+
+
+def draws_with_min_hits(db: Session, numbers: Iterable[int], min_hits: int, limit: Optional[int] = None) -> List[Dict[str, int]]:
+    """
+    Get the draws sharing at least `min_hits` numbers with a ticket, newest first.
+    
+    Args:
+        db: Database session
+        numbers: Ticket numbers
+        min_hits: Minimum number of shared numbers
+        limit: Maximum number of draws to return
+        
+    Returns:
+        List of {"contest_number", "hits"}
+    """
+    hits = bit_count(LotteryResult.numbers_mask.op("&")(numbers_to_mask(numbers))).label("hits")
+    query = (
+        select(LotteryResult.contest_number, hits)
+        .where(hits >= min_hits)
+        .order_by(LotteryResult.contest_number.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return [{"contest_number": row[0], "hits": int(row[1])} for row in db.execute(query).all()]
@@ -0,0 +1,172 @@
+"""
+Draw matrix shared between worker processes through memory-mapped files.
+
+Every worker used to load the history from the database and keep its own
+copy of the derived arrays. Instead, the first process to build the
+DrawMatrix for a contest version publishes it under
+
+    data/processed/draw_matrix/v<FORMAT>/<latest contest>-<draws>/<field>.npy
+
+and every other worker (including ones started later) maps those files
+read-only. The pages live once in the OS page cache however many workers
+attach, and a new worker skips the initial database load entirely.
+
+Versions are immutable: new results (a new contest, or older contests
+backfilled) publish a new directory (written to a temporary one, then
+renamed into place) and workers swap when their contest cache moves to
+the new version. The directories outlive restarts, so a matrix is only
+attached if it has exactly the draws the database reports. Old versions
+are pruned; workers still mapping them keep their pages until they let go.
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import fields
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.draw_matrix import DrawMatrix
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the DrawMatrix fields or the directory names change
+SHARED_FORMAT = 2
+
+# Published versions kept on disk (the current one and its predecessor)
+KEEP_VERSIONS = 2
+
+
+_VERSION_PATTERN = re.compile(r"^(\d+)-(\d+)$")
+
+
+def matrix_version(matrix: DrawMatrix) -> str:
+    """Version of a matrix: "<latest contest>-<number of draws>"."""
+    return f"{int(matrix.contests[-1])}-{len(matrix)}"
+
+
+def parse_version(version: str) -> Optional[Tuple[int, int]]:
+    """Split a version into (latest contest, number of draws); None if malformed."""
+    match = _VERSION_PATTERN.match(version)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def shared_matrix_dir(root: Path = None) -> Path:
+    """Directory holding the published versions of the current format."""
+    root = root or settings.processed_data_dir / "draw_matrix"
+    return root / f"v{SHARED_FORMAT}"
+
+
+def published_versions(root: Path = None) -> List[str]:
+    """
+    List the published versions, oldest first.
+    
+    Args:
+        root: Base directory (defaults to data/processed/draw_matrix)
+    
+    Returns:
+        Versions with a complete published matrix
+    """
+    directory = shared_matrix_dir(root)
+    if not directory.exists():
+        return []
+    names = [path.name for path in directory.iterdir() if parse_version(path.name)]
+    return sorted(names, key=parse_version)
+
+
+def publish_draw_matrix(matrix: DrawMatrix, root: Path = None) -> Optional[Path]:
+    """
+    Publish a matrix under its version (latest contest and number of draws).
+    
+    Safe to call from several processes at once: the first rename wins and
+    the others discard their copy.
+    
+    Args:
+        matrix: Matrix to publish
+        root: Base directory (defaults to data/processed/draw_matrix)
+    
+    Returns:
+        Directory of the published version, or None for an empty matrix
+    """
+    if len(matrix) == 0:
+        return None
+    
+    directory = shared_matrix_dir(root)
+    target = directory / matrix_version(matrix)
+    if target.exists():
+        return target
+    
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=directory))
+    try:
+        for field in fields(DrawMatrix):
+            np.save(staging / f"{field.name}.npy", np.ascontiguousarray(getattr(matrix, field.name)))
+        os.rename(staging, target)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(staging, ignore_errors=True)
+        if not target.exists():
+            raise
+    else:
+        logger.info(f"Published shared draw matrix {target.name}")
+    
+    prune_draw_matrices(root)
+    return target
+
+
+def attach_draw_matrix(version: str, root: Path = None) -> Optional[DrawMatrix]:
+    """
+    Map a published matrix read-only.
+    
+    Args:
+        version: "<latest contest>-<number of draws>", as read from the database
+        root: Base directory (defaults to data/processed/draw_matrix)
+    
+    Returns:
+        DrawMatrix backed by the shared files, or None if the version was
+        not published (or was pruned meanwhile) or its files don't hold
+        the draws the version describes
+    """
+    expected = parse_version(version)
+    if expected is None:
+        raise ValueError(f"Invalid draw matrix version: {version!r}")
+    
+    source = shared_matrix_dir(root) / version
+    try:
+        arrays = {
+            field.name: np.load(source / f"{field.name}.npy", mmap_mode="r")
+            for field in fields(DrawMatrix)
+        }
+    except (FileNotFoundError, ValueError) as e:
+        if source.exists():
+            logger.warning(f"Could not attach shared draw matrix {source}: {e}")
+        return None
+    
+    matrix = DrawMatrix(**arrays)
+    if len(matrix) == 0 or (int(matrix.contests[-1]), len(matrix)) != expected:
+        logger.warning(f"Shared draw matrix {source} does not hold the draws of version {version}, ignoring it")
+        return None
+    return matrix
+
+
+def prune_draw_matrices(root: Path = None, keep: int = KEEP_VERSIONS) -> List[str]:
+    """
+    Remove all but the `keep` latest published versions.
+    
+    Args:
+        root: Base directory (defaults to data/processed/draw_matrix)
+        keep: Versions to keep
+    
+    Returns:
+        Removed versions
+    """
+    directory = shared_matrix_dir(root)
+    removed = published_versions(root)[:-keep] if keep else published_versions(root)
+    for version in removed:
+        shutil.rmtree(directory / version, ignore_errors=True)
+    return removed
@@ -0,0 +1,168 @@
+"""
+Streaming reader for lottery history workbooks.
+
+Reads the asloterias.com.br export (title rows, then a header row with
+"Concurso", "Data" and "bola N" columns) as well as plain sheets whose
+first row is the header, using openpyxl's read-only mode. The header is
+found in the same forward pass that yields the contests, so the file is
+never read twice, and rows are yielded lazily as typed records: peak
+memory does not grow with the file size.
+"""
+
+from array import array
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from openpyxl import load_workbook
+
+
+class ContestRecord(NamedTuple):
+    """A single contest read from the workbook."""
+    concurso: int
+    data: date
+    numeros: List[int]
+
+
+def _parse_header(row: Tuple) -> Optional[Tuple[int, int, List[int]]]:
+    """
+    Locate the contest, date and number columns in a candidate header row.
+    
+    Returns:
+        (contest index, date index, number indexes), or None if the row
+        is not the header
+    """
+    cells = [str(cell).strip().lower() if cell is not None else "" for cell in row]
+    
+    contest_index = next((i for i, cell in enumerate(cells) if "concurso" in cell), None)
+    if contest_index is None:
+        return None
+    
+    date_index = next((i for i, cell in enumerate(cells) if cell.startswith("data")), None)
+    number_indexes = [i for i, cell in enumerate(cells) if cell.startswith("bola")]
+    if not number_indexes:
+        # Fall back to every other non-empty column
+        number_indexes = [
+            i for i, cell in enumerate(cells)
+            if cell and i not in (contest_index, date_index)
+        ]
+    return contest_index, date_index, number_indexes
+
+
+def _parse_date(value) -> Optional[date]:
+    """Parse a draw date cell (datetime or "DD/MM/YYYY" text)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(value.strip(), fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def iter_contest_records(file_path: Path) -> Iterator[ContestRecord]:
+    """
+    Lazily yield the contests of a history workbook, in file order.
+    
+    Rows that are not complete contests (blank lines, footers) are skipped.
+    
+    Args:
+        file_path: Path to the .xlsx file
+        
+    Yields:
+        ContestRecord for each contest row
+        
+    Raises:
+        ValueError: If no header row with a 'concurso' column is found.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        
+        header = None
+        for row in rows:
+            header = _parse_header(row)
+            if header is not None:
+                break
+        
+        if header is None:
+            raise ValueError(
+                "Invalid file format: 'concurso' column not found. "
+                "Expected columns: concurso, data, and number columns."
+            )
+        
+        contest_index, date_index, number_indexes = header
+        for row in rows:
+            if len(row) <= max(number_indexes):
+                continue
+            
+            contest = row[contest_index]
+            draw_date = _parse_date(row[date_index]) if date_index is not None else None
+            numbers = [row[i] for i in number_indexes]
+            
+            if not isinstance(contest, (int, float)) or draw_date is None:
+                continue
+            if not all(isinstance(number, (int, float)) for number in numbers):
+                continue
+            
+            yield ContestRecord(int(contest), draw_date, [int(number) for number in numbers])
+    finally:
+        workbook.close()
+
+
+def records_to_arrays(records: Iterable[ContestRecord]) -> Dict[str, np.ndarray]:
+    """
+    Pack records into typed arrays (no per-value Python objects kept).
+    
+    Args:
+        records: Contest records, e.g. from iter_contest_records
+        
+    Returns:
+        dict with:
+            - contests (int64[n]): contest numbers
+            - dates (datetime64[D][n]): draw dates
+            - numbers (int16[n, k]): drawn numbers, in file order
+    """
+    contests = array("q")
+    ordinals = array("q")
+    numbers = array("h")
+    width = 0
+    
+    for record in records:
+        contests.append(record.concurso)
+        ordinals.append(record.data.toordinal())
+        numbers.extend(record.numeros)
+        width = len(record.numeros)
+    
+    # date.toordinal() counts from 0001-01-01 (day 1); datetime64[D] from 1970-01-01
+    epoch_ordinal = date(1970, 1, 1).toordinal()
+    return {
+        "contests": np.frombuffer(contests, dtype=np.int64).copy(),
+        "dates": (np.frombuffer(ordinals, dtype=np.int64) - epoch_ordinal).astype("datetime64[D]"),
+        "numbers": np.frombuffer(numbers, dtype=np.int16).reshape(len(contests), width).copy(),
+    }
+
+
+def iter_record_chunks(file_path: Path, chunk_size: int) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream a workbook as typed array chunks of at most `chunk_size` contests.
+    
+    Args:
+        file_path: Path to the .xlsx file
+        chunk_size: Contests per chunk
+        
+    Yields:
+        Arrays from records_to_arrays
+    """
+    records = iter_contest_records(file_path)
+    while True:
+        chunk = records_to_arrays(islice(records, chunk_size))
+        if len(chunk["contests"]) == 0:
+            return
+        yield chunk
@@ -15,6 +15,50 @@ from app.schemas.lottery import StrategyType
 from app.core.config import settings
 
 
+def build_strategy_plan(
+    statistics: Dict[str, any],
+    history: pd.DataFrame,
+    recent_frequencies: Dict[int, int] = None
+) -> Dict[str, List]:
+    """
+    Pre-compute the number pools every strategy draws from.
+    
+    The plan only depends on the contest version, so it can be built once
+    after ingest and shared by every generator instance.
+    
+    Args:
+        statistics: Statistical analysis from LotteryStatisticsService
+        history: Historical lottery data DataFrame
+        recent_frequencies: Frequencies over the recent draws window
+                            (computed from history if omitted)
+        
+    Returns:
+        dict: Number pools and weights used by the strategies
+    """
+    number_frequencies = statistics.get("number_frequencies", {})
+    total_weight = sum(number_frequencies.values())
+    
+    if recent_frequencies is None:
+        recent_frequencies = {}
+        if not history.empty:
+            recent_draws = history.tail(min(settings.recent_draws_window, len(history)))
+            number_columns = [col for col in recent_draws.columns if str(col).startswith("bola")]
+            recent_numbers = []
+            for col in number_columns:
+                recent_numbers.extend(recent_draws[col].dropna().tolist())
+            recent_frequencies = pd.Series(recent_numbers).value_counts().to_dict()
+    
+    recent_hot = sorted(recent_frequencies.items(), key=lambda x: x[1], reverse=True)
+    
+    return {
+        "hot_numbers": [item["number"] for item in statistics.get("most_common_numbers", [])],
+        "cold_numbers": [item["number"] for item in statistics.get("least_common_numbers", [])],
+        "weighted_numbers": list(number_frequencies.keys()),
+        "weighted_probabilities": [w / total_weight for w in number_frequencies.values()] if total_weight else [],
+        "recent_hot_numbers": [int(num) for num, _ in recent_hot[:10]],
+    }
+
+
 class LotteryStrategyGenerator:
     """
     Service for generating lottery number suggestions using various strategies.
@@ -22,17 +66,24 @@ class LotteryStrategyGenerator:
     Adapted from the original app/analysis/strategy_generator.py
     """
     
-    def __init__(self, statistics: Dict[str, any], history: pd.DataFrame):
+    def __init__(
+        self,
+        statistics: Dict[str, any],
+        history: pd.DataFrame,
+        plan: Dict[str, List] = None
+    ):
         """
         Initialize the strategy generator.
         
         Args:
             statistics: Statistical analysis from LotteryStatisticsService
             history: Historical lottery data DataFrame
+            plan: Pre-computed strategy plan (see build_strategy_plan)
         """
         self.statistics = statistics
         self.history = history
         self.number_frequencies = statistics.get("number_frequencies", {})
+        self.plan = plan or build_strategy_plan(statistics, history)
     
     def generate_suggestions(
         self,
@@ -80,8 +131,8 @@ class LotteryStrategyGenerator:
     
     def _balanced_strategy(self) -> List[int]:
         """Balanced strategy: Mix of hot and cold numbers with even distribution."""
-        hot_numbers = [item["number"] for item in self.statistics["most_common_numbers"][:10]]
-        cold_numbers = [item["number"] for item in self.statistics["least_common_numbers"][:10]]
+        hot_numbers = self.plan["hot_numbers"][:10]
+        cold_numbers = self.plan["cold_numbers"][:10]
         
         # Select 5 hot, 5 cold, 5 random
         selected = set()
@@ -97,7 +148,7 @@ class LotteryStrategyGenerator:
     
     def _hot_numbers_strategy(self) -> List[int]:
         """Hot numbers strategy: Prioritize most frequently drawn numbers."""
-        hot_numbers = [item["number"] for item in self.statistics["most_common_numbers"]]
+        hot_numbers = self.plan["hot_numbers"]
         
         # Take top numbers and add some randomness
         selected = set(hot_numbers[:min(12, len(hot_numbers))])
@@ -114,7 +165,7 @@ class LotteryStrategyGenerator:
     
     def _cold_numbers_strategy(self) -> List[int]:
         """Cold numbers strategy: Prioritize least frequently drawn numbers."""
-        cold_numbers = [item["number"] for item in self.statistics["least_common_numbers"]]
+        cold_numbers = self.plan["cold_numbers"]
         
         # Take least common numbers and add some randomness
         selected = set(cold_numbers[:min(12, len(cold_numbers))])
@@ -131,12 +182,8 @@ class LotteryStrategyGenerator:
     
     def _weighted_random_strategy(self) -> List[int]:
         """Weighted random strategy: Random selection weighted by historical frequency."""
-        numbers = list(self.number_frequencies.keys())
-        weights = list(self.number_frequencies.values())
-        
-        # Normalize weights
-        total_weight = sum(weights)
-        probabilities = [w / total_weight for w in weights]
+        numbers = self.plan["weighted_numbers"]
+        probabilities = self.plan["weighted_probabilities"]
         
         # Select numbers with weighted probability
         selected = set()
@@ -148,25 +195,12 @@ class LotteryStrategyGenerator:
     
     def _recent_patterns_strategy(self) -> List[int]:
         """Recent patterns strategy: Analyze recent draws for trends."""
-        if self.history.empty:
+        # Recent hot numbers come from the plan (recent draws window)
+        recent_hot = self.plan["recent_hot_numbers"]
+        if not recent_hot:
             return self._balanced_strategy()
         
-        # Get recent draws
-        recent_window = min(10, len(self.history))
-        recent_draws = self.history.tail(recent_window)
-        
-        # Identify number columns
-        number_columns = [col for col in recent_draws.columns if str(col).startswith("bola")]
-        
-        # Count frequencies in recent draws
-        recent_numbers = []
-        for col in number_columns:
-            recent_numbers.extend(recent_draws[col].dropna().tolist())
-        
-        recent_freq = pd.Series(recent_numbers).value_counts()
-        
         # Mix recent hot numbers with some random
-        recent_hot = recent_freq.head(10).index.tolist()
         selected = set(random.sample(recent_hot, min(10, len(recent_hot))))
         
         # Fill remaining
@@ -178,8 +212,8 @@ class LotteryStrategyGenerator:
     
     def _calculate_metadata(self, numbers: List[int]) -> Dict:
         """Calculate metadata about a suggestion."""
-        hot_numbers = set(item["number"] for item in self.statistics["most_common_numbers"][:10])
-        cold_numbers = set(item["number"] for item in self.statistics["least_common_numbers"][:10])
+        hot_numbers = set(self.plan["hot_numbers"][:10])
+        cold_numbers = set(self.plan["cold_numbers"][:10])
         
         hot_count = len([n for n in numbers if n in hot_numbers])
         cold_count = len([n for n in numbers if n in cold_numbers])
@@ -0,0 +1,110 @@
+"""
+In-process cache of user subscription status.
+
+Premium checks run on every suggestion request, so the subscription row is
+cached per user:
+
+- Bounded: least recently used entries are evicted past
+  SUBSCRIPTION_CACHE_MAX_ENTRIES
+- TTL: entries are re-read after SUBSCRIPTION_CACHE_TTL_SECONDS, which also
+  bounds how long another worker's update can go unnoticed
+- Negative caching: users without a subscription row are cached too
+- Expiry is evaluated lazily, in memory, whenever a status is read
+
+SubscriptionService invalidates a user's entry as soon as their
+subscription is updated or cancelled.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+from app.core.config import settings
+
+
+class SubscriptionStatus(NamedTuple):
+    """Cached subscription fields (exists=False for users without a row)."""
+    exists: bool
+    is_premium: bool
+    expires_at: Optional[datetime]
+    
+    @property
+    def is_active(self) -> bool:
+        """Whether the subscription grants premium right now."""
+        return self.is_premium and (self.expires_at is None or self.expires_at > datetime.utcnow())
+
+
+NO_SUBSCRIPTION = SubscriptionStatus(exists=False, is_premium=False, expires_at=None)
+
+
+class SubscriptionCache:
+    """LRU + TTL cache of SubscriptionStatus per user."""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[SubscriptionStatus, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, user_id: str) -> Optional[SubscriptionStatus]:
+        """
+        Get a user's cached status.
+        
+        Returns:
+            SubscriptionStatus (NO_SUBSCRIPTION for cached unknown users),
+            or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or time.monotonic() - entry[1] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+    
+    def set(self, user_id: str, status: SubscriptionStatus) -> None:
+        """Cache a user's status, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[user_id] = (status, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Forget one user (or everyone)."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+    
+    def invalidate_many(self, user_ids: Iterable[str]) -> None:
+        """Forget several users at once (single lock acquisition)."""
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton instance
+_cache_instance = None
+
+def get_subscription_cache() -> SubscriptionCache:
+    """Get singleton instance of SubscriptionCache."""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = SubscriptionCache(
+            max_entries=settings.subscription_cache_max_entries,
+            ttl_seconds=settings.subscription_cache_ttl_seconds
+        )
+    return _cache_instance
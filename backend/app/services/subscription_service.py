@@ -3,50 +3,114 @@ Subscription management service.
 """
 
 from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.lottery import UserSubscription
-from app.schemas.lottery import UpdateSubscriptionRequest, UserSubscriptionStatus
+from app.core.database import UPSERT_CHUNK_SIZE, dialect_insert
+from app.schemas.lottery import SubscriptionEvent, UpdateSubscriptionRequest, UserSubscriptionStatus
+from app.services.subscription_cache import (
+    NO_SUBSCRIPTION,
+    SubscriptionStatus,
+    get_subscription_cache,
+)
+
+
+async def get_subscription_status(db: AsyncSession, user_id: str) -> SubscriptionStatus:
+    """
+    Get a user's subscription status, from the cache when possible.
+    
+    Args:
+        db: Async database session (only used on a cache miss)
+        user_id: User/device ID
+        
+    Returns:
+        SubscriptionStatus (NO_SUBSCRIPTION if the user has no row)
+    """
+    cache = get_subscription_cache()
+    status = cache.get(user_id)
+    if status is not None:
+        return status
+    
+    result = await db.execute(
+        select(UserSubscription.is_premium, UserSubscription.expires_at)
+        .where(UserSubscription.user_id == user_id)
+    )
+    row = result.first()
+    status = SubscriptionStatus(True, bool(row.is_premium), row.expires_at) if row else NO_SUBSCRIPTION
+    cache.set(user_id, status)
+    return status
+
+
+def collapse_events(events: List[SubscriptionEvent]) -> Dict[str, SubscriptionEvent]:
+    """
+    Keep only the latest event per user.
+    
+    Events are ordered by event_timestamp, ties going to the later one in
+    the batch. An event without a timestamp only supersedes another event
+    without a timestamp (the later one in the batch wins), never a
+    timestamped one; apply_events holds the stored state to the same rule.
+    
+    Args:
+        events: Subscription events, in delivery order
+        
+    Returns:
+        Mapping of user_id to its latest event
+    """
+    latest: Dict[str, SubscriptionEvent] = {}
+    for event in events:
+        current = latest.get(event.user_id)
+        if current is None or _supersedes(event.event_timestamp, current.event_timestamp):
+            latest[event.user_id] = event
+    return latest
+
+
+def _supersedes(timestamp: Optional[datetime], current: Optional[datetime]) -> bool:
+    """Whether an event at `timestamp` replaces a state set at `current` (see collapse_events)."""
+    if current is None:
+        return True
+    return timestamp is not None and timestamp >= current
 
 
 class SubscriptionService:
     """Service for managing user subscriptions."""
     
-    def __init__(self, db: Session):
-        """Initialize the service with database session."""
+    def __init__(self, db: AsyncSession):
+        """Initialize the service with an async database session."""
         self.db = db
     
-    def get_subscription(self, user_id: str) -> UserSubscriptionStatus:
+    async def _get(self, user_id: str) -> Optional[UserSubscription]:
+        """Get the user's subscription row, if any."""
+        result = await self.db.execute(
+            select(UserSubscription).where(UserSubscription.user_id == user_id)
+        )
+        return result.scalars().first()
+    
+    async def get_subscription(self, user_id: str) -> UserSubscriptionStatus:
         """
         Get user subscription status.
         
+        Read-only: users without a subscription are reported as free
+        (no row is created). Expired subscriptions are reported as not
+        premium.
+        
         Args:
             user_id: User/device ID
             
         Returns:
             UserSubscriptionStatus
         """
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == user_id
-        ).first()
-        
-        if not subscription:
-            # Create default free subscription
-            subscription = UserSubscription(
-                user_id=user_id,
-                is_premium=False
-            )
-            self.db.add(subscription)
-            self.db.commit()
-            self.db.refresh(subscription)
+        status = await get_subscription_status(self.db, user_id)
         
         return UserSubscriptionStatus(
-            user_id=subscription.user_id,
-            is_premium=subscription.is_premium,
-            expires_at=subscription.expires_at
+            user_id=user_id,
+            is_premium=status.is_active,
+            expires_at=status.expires_at
         )
     
-    def update_subscription(self, request: UpdateSubscriptionRequest) -> UserSubscriptionStatus:
+    async def update_subscription(self, request: UpdateSubscriptionRequest) -> UserSubscriptionStatus:
         """
         Update user subscription status.
         
@@ -58,9 +122,7 @@ class SubscriptionService:
         Returns:
             Updated UserSubscriptionStatus
         """
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == request.user_id
-        ).first()
+        subscription = await self._get(request.user_id)
         
         if not subscription:
             subscription = UserSubscription(user_id=request.user_id)
@@ -71,8 +133,9 @@ class SubscriptionService:
         subscription.expires_at = request.expires_at
         subscription.updated_at = datetime.utcnow()
         
-        self.db.commit()
-        self.db.refresh(subscription)
+        await self.db.commit()
+        await self.db.refresh(subscription)
+        get_subscription_cache().invalidate(request.user_id)
         
         return UserSubscriptionStatus(
             user_id=subscription.user_id,
@@ -80,7 +143,7 @@ class SubscriptionService:
             expires_at=subscription.expires_at
         )
     
-    def cancel_subscription(self, user_id: str) -> UserSubscriptionStatus:
+    async def cancel_subscription(self, user_id: str) -> UserSubscriptionStatus:
         """
         Cancel user subscription.
         
@@ -90,19 +153,101 @@ class SubscriptionService:
         Returns:
             Updated UserSubscriptionStatus
         """
-        subscription = self.db.query(UserSubscription).filter(
-            UserSubscription.user_id == user_id
-        ).first()
+        subscription = await self._get(user_id)
         
         if subscription:
             subscription.is_premium = False
             subscription.expires_at = None
             subscription.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(subscription)
+            await self.db.commit()
+            await self.db.refresh(subscription)
+            get_subscription_cache().invalidate(user_id)
         
         return UserSubscriptionStatus(
             user_id=user_id,
             is_premium=False,
             expires_at=None
         )
+    
+    async def apply_events(self, events: List[SubscriptionEvent]) -> List[UserSubscriptionStatus]:
+        """
+        Apply many subscription events in one transaction.
+        
+        Events are collapsed to the latest state per user and written with
+        multi-row upserts (ON CONFLICT (user_id) DO UPDATE); the cached
+        status of every affected user is then dropped in one step.
+        
+        A stored row is only overwritten by an event at least as recent as
+        the one it came from, so a replayed or delayed batch never rolls
+        back newer state.
+        
+        Args:
+            events: Subscription events (e.g. a RevenueCat webhook replay)
+            
+        Returns:
+            The resulting status of each affected user
+        """
+        latest = collapse_events(events)
+        if not latest:
+            return []
+        
+        now = datetime.utcnow()
+        subscriptions = UserSubscription.__table__
+        rows = [
+            {
+                "user_id": user_id,
+                "is_premium": event.is_premium,
+                "subscription_id": event.subscription_id,
+                "expires_at": event.expires_at,
+                "event_timestamp": event.event_timestamp,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for user_id, event in latest.items()
+        ]
+        
+        try:
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                statement = dialect_insert(self.db)(subscriptions).values(rows[start:start + UPSERT_CHUNK_SIZE])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[subscriptions.c.user_id],
+                    set_={
+                        "is_premium": statement.excluded.is_premium,
+                        "subscription_id": statement.excluded.subscription_id,
+                        "expires_at": statement.excluded.expires_at,
+                        "event_timestamp": statement.excluded.event_timestamp,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                    # Same rule as _supersedes (a NULL excluded timestamp compares as false)
+                    where=or_(
+                        subscriptions.c.event_timestamp.is_(None),
+                        statement.excluded.event_timestamp >= subscriptions.c.event_timestamp,
+                    ),
+                )
+                await self.db.execute(statement)
+            await self.db.commit()
+            
+            # Skipped (outdated) events leave the stored state: report that
+            stored = {}
+            user_ids = list(latest)
+            for start in range(0, len(user_ids), UPSERT_CHUNK_SIZE):
+                result = await self.db.execute(
+                    select(subscriptions.c.user_id, subscriptions.c.is_premium, subscriptions.c.expires_at)
+                    .where(subscriptions.c.user_id.in_(user_ids[start:start + UPSERT_CHUNK_SIZE]))
+                )
+                stored.update((row.user_id, row) for row in result)
+        except Exception:
+            await self.db.rollback()
+            raise
+        finally:
+            # Also on failure: a partially applied batch must not leave stale entries
+            get_subscription_cache().invalidate_many(latest)
+        
+        return [
+            UserSubscriptionStatus(
+                user_id=user_id,
+                is_premium=bool(stored[user_id].is_premium),
+                expires_at=stored[user_id].expires_at
+            )
+            for user_id in latest
+        ]
@@ -0,0 +1,138 @@
+"""
+Ticket scoring - hit counts of user tickets against the draw history.
+
+Tickets and draws are bitmasks (see app.core.bitmask), so the hits of a
+ticket in a draw are popcount(ticket & draw). Scoring many tickets
+against the full history is a (tickets x contests) grid of those, computed
+block by block so memory stays bounded whatever the request size.
+"""
+
+from typing import Iterable, List
+
+import numpy as np
+
+from app.core.bitmask import numbers_to_mask, popcount
+from app.schemas.lottery import TicketScore, TicketScoreResponse
+
+# Prize tiers: 11 to 15 hits
+MIN_PRIZE_HITS = 11
+MAX_HITS = 15
+
+# Grid cells (ticket x draw pairs) evaluated per block: a few MB of temporaries
+BLOCK_CELLS = 1_000_000
+
+
+def tickets_to_masks(tickets: Iterable[Iterable[int]]) -> np.ndarray:
+    """
+    Encode tickets as bitmasks.
+    
+    Tickets may have 15 to 20 numbers, so they can't go through
+    masks_from_matrix (which expects a rectangular matrix).
+    
+    Args:
+        tickets: Ticket numbers
+    
+    Returns:
+        uint32 array with one mask per ticket
+    """
+    masks = [numbers_to_mask(ticket) for ticket in tickets]
+    return np.array(masks, dtype=np.uint32)
+
+
+def score_against_draw(ticket_masks: np.ndarray, draw_mask: int) -> np.ndarray:
+    """
+    Count the hits of every ticket in a single draw.
+    
+    Args:
+        ticket_masks: uint32 ticket masks
+        draw_mask: Mask of the drawn numbers
+    
+    Returns:
+        uint8 array of hits per ticket
+    """
+    return popcount(np.asarray(ticket_masks, dtype=np.uint32) & np.uint32(draw_mask))
+
+
+def hit_distribution(
+    ticket_masks: np.ndarray,
+    draw_masks: np.ndarray,
+    min_hits: int = MIN_PRIZE_HITS,
+    block_cells: int = BLOCK_CELLS
+) -> np.ndarray:
+    """
+    Count, for every ticket, the draws where it got each number of hits.
+    
+    Args:
+        ticket_masks: uint32 ticket masks (t,)
+        draw_masks: uint32 draw masks (d,)
+        min_hits: Lowest hit count to report
+        block_cells: Upper bound on ticket x draw pairs evaluated at once
+    
+    Returns:
+        int64 array (t, MAX_HITS - min_hits + 1); column j counts the draws
+        with min_hits + j hits
+    """
+    ticket_masks = np.asarray(ticket_masks, dtype=np.uint32)
+    draw_masks = np.asarray(draw_masks, dtype=np.uint32)
+    levels = MAX_HITS - min_hits + 1
+    counts = np.zeros((len(ticket_masks), levels), dtype=np.int64)
+    if len(ticket_masks) == 0 or len(draw_masks) == 0:
+        return counts
+    
+    # Blocks span whole rows of draws when possible, else split the draws too
+    draws_per_block = min(len(draw_masks), max(1, block_cells))
+    tickets_per_block = max(1, block_cells // draws_per_block)
+    
+    for t_start in range(0, len(ticket_masks), tickets_per_block):
+        tickets = ticket_masks[t_start:t_start + tickets_per_block, None]
+        block_counts = counts[t_start:t_start + tickets_per_block]
+        for d_start in range(0, len(draw_masks), draws_per_block):
+            hits = popcount(tickets & draw_masks[None, d_start:d_start + draws_per_block])
+            rows, cols = np.nonzero(hits >= min_hits)
+            if len(rows) == 0:
+                continue
+            # Flattened (ticket, level) bins, counted in one bincount
+            bins = rows * levels + (hits[rows, cols].astype(np.int64) - min_hits)
+            block_counts += np.bincount(bins, minlength=block_counts.size).reshape(block_counts.shape)
+    
+    return counts
+
+
+def distribution_to_dicts(counts: np.ndarray, min_hits: int = MIN_PRIZE_HITS) -> List[dict]:
+    """
+    Convert hit_distribution output to one {hits: draws} dict per ticket.
+    
+    Args:
+        counts: Array from hit_distribution
+        min_hits: min_hits it was computed with
+    
+    Returns:
+        List of dicts with every level from min_hits to MAX_HITS
+    """
+    levels = list(range(min_hits, min_hits + counts.shape[1]))
+    return [dict(zip(levels, row)) for row in counts.tolist()]
+
+
+def distribution_response(
+    tickets: List[List[int]],
+    counts: np.ndarray,
+    contests_scored: int
+) -> TicketScoreResponse:
+    """
+    Build the API response for hit distributions over the whole history.
+    
+    Args:
+        tickets: Ticket numbers, in request order
+        counts: hit_distribution output for those tickets
+        contests_scored: Number of draws the tickets were scored against
+        
+    Returns:
+        TicketScoreResponse with one distribution per ticket
+    """
+    return TicketScoreResponse(
+        contests_scored=contests_scored,
+        scores=[
+            TicketScore(numbers=ticket, distribution=distribution)
+            for ticket, distribution in zip(tickets, distribution_to_dicts(counts))
+        ]
+    )
@@ -0,0 +1,306 @@
+"""
+Sliding-window suggestion limiter with write-behind persistence.
+
+Optional replacement for the per-request database upsert in
+RateLimitService (RATE_LIMIT_BACKEND=memory|redis):
+
+- Counting happens in a sliding window of RATE_LIMIT_WINDOW_SECONDS, either
+  in process memory (single worker, and the local fake used by tests) or
+  in Redis (shared, so the limit holds across workers and restarts)
+- Accepted suggestions are aggregated per (user_id, date) in memory and
+  flushed to UserSuggestionUsage in batches every
+  RATE_LIMIT_FLUSH_INTERVAL_SECONDS, so `/suggestions` never waits on the
+  database for rate limiting
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from datetime import date, datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import UPSERT_CHUNK_SIZE, dialect_insert
+from app.models.lottery import UserSuggestionUsage
+
+logger = logging.getLogger(__name__)
+
+
+class WindowBackend(ABC):
+    """Storage for per-user hit timestamps inside a sliding window."""
+    
+    @abstractmethod
+    async def hit(self, user_id: str, limit: int, window_seconds: float) -> Optional[int]:
+        """
+        Record a hit unless `limit` hits already fall inside the window.
+        
+        Args:
+            user_id: User/device ID
+            limit: Maximum hits per window
+            window_seconds: Window length
+            
+        Returns:
+            Hits in the window including this one, or None if rejected
+        """
+    
+    @abstractmethod
+    async def count(self, user_id: str, window_seconds: float) -> int:
+        """Hits currently inside the window."""
+    
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class MemoryWindowBackend(WindowBackend):
+    """Per-process backend; exact (one timestamp per accepted hit)."""
+    
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._hits: Dict[str, Deque[float]] = defaultdict(deque)
+    
+    def _trim(self, hits: Deque[float], now: float, window_seconds: float) -> None:
+        while hits and hits[0] <= now - window_seconds:
+            hits.popleft()
+    
+    async def hit(self, user_id: str, limit: int, window_seconds: float) -> Optional[int]:
+        now = self.clock()
+        with self._lock:
+            hits = self._hits[user_id]
+            self._trim(hits, now, window_seconds)
+            if len(hits) >= limit:
+                return None
+            hits.append(now)
+            return len(hits)
+    
+    async def count(self, user_id: str, window_seconds: float) -> int:
+        now = self.clock()
+        with self._lock:
+            hits = self._hits.get(user_id)
+            if not hits:
+                return 0
+            self._trim(hits, now, window_seconds)
+            return len(hits)
+
+
+# KEYS[1] = sorted set of hit timestamps; ARGV = now, window, limit, member
+_REDIS_HIT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1] - ARGV[2])
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], math.ceil(ARGV[2] * 1000))
+return count + 1
+"""
+
+
+class RedisWindowBackend(WindowBackend):
+    """Shared backend: one sorted set per user, updated atomically by a Lua script."""
+    
+    def __init__(self, url: str, prefix: str = "suggestions:window:", clock: Callable[[], float] = time.time):
+        import redis.asyncio as redis
+        
+        self.prefix = prefix
+        self.clock = clock
+        self._client = redis.from_url(url)
+        self._hit_script = self._client.register_script(_REDIS_HIT_SCRIPT)
+        self._sequence = 0
+    
+    async def hit(self, user_id: str, limit: int, window_seconds: float) -> Optional[int]:
+        now = self.clock()
+        self._sequence += 1
+        # Unique member so identical timestamps from different workers all count
+        member = f"{now:.6f}:{id(self)}:{self._sequence}"
+        count = await self._hit_script(
+            keys=[self.prefix + user_id],
+            args=[now, window_seconds, limit, member]
+        )
+        return None if int(count) < 0 else int(count)
+    
+    async def count(self, user_id: str, window_seconds: float) -> int:
+        key = self.prefix + user_id
+        now = self.clock()
+        return int(await self._client.zcount(key, f"({now - window_seconds}", "+inf"))
+    
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class UsageWriteBehind:
+    """Aggregates accepted suggestions per (user_id, date) until flushed."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, date], int] = defaultdict(int)
+    
+    def record(self, user_id: str, day: Optional[date] = None) -> None:
+        """Count one suggestion for `user_id` on `day` (today by default)."""
+        with self._lock:
+            self._pending[(user_id, day or date.today())] += 1
+    
+    @property
+    def pending(self) -> int:
+        """Number of (user, date) rows waiting to be flushed."""
+        return len(self._pending)
+    
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Add the pending counts to UserSuggestionUsage.
+        
+        Rows are upserted in chunks of UPSERT_CHUNK_SIZE, each committed on
+        its own, so a backlog built up during an outage never exceeds the
+        driver's bound-parameter limit. If a chunk fails, it and the chunks
+        after it are re-queued, so nothing is lost.
+        
+        Args:
+            db: Async database session
+            
+        Returns:
+            Number of (user, date) rows written
+        """
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(int)
+        if not batch:
+            return 0
+        
+        items = list(batch.items())
+        written = 0
+        for start in range(0, len(items), UPSERT_CHUNK_SIZE):
+            chunk = items[start:start + UPSERT_CHUNK_SIZE]
+            try:
+                await db.execute(self._upsert(db, chunk))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                with self._lock:
+                    for key, count in items[start:]:
+                        self._pending[key] += count
+                raise
+            written += len(chunk)
+        
+        return written
+    
+    @staticmethod
+    def _upsert(db: AsyncSession, chunk: List[Tuple[Tuple[str, date], int]]):
+        """Statement adding a chunk of ((user_id, date), count) to the usage rows."""
+        now = datetime.utcnow()
+        usage = UserSuggestionUsage.__table__
+        statement = dialect_insert(db)(usage).values([
+            {
+                "user_id": user_id,
+                "date": day,
+                "suggestions_count": count,
+                "is_premium": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (user_id, day), count in chunk
+        ])
+        return statement.on_conflict_do_update(
+            index_elements=[usage.c.user_id, usage.c.date],
+            set_={
+                "suggestions_count": usage.c.suggestions_count + statement.excluded.suggestions_count,
+                "updated_at": now,
+            },
+        )
+
+
+class UsageLimiter:
+    """Sliding-window limiter plus the write-behind buffer it feeds."""
+    
+    def __init__(self, backend: WindowBackend, limit: int, window_seconds: float):
+        self.backend = backend
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.write_behind = UsageWriteBehind()
+    
+    async def hit(self, user_id: str) -> Optional[int]:
+        """
+        Count a suggestion request.
+        
+        Returns:
+            Requests in the window including this one, or None if the limit is reached
+        """
+        count = await self.backend.hit(user_id, self.limit, self.window_seconds)
+        if count is not None:
+            self.write_behind.record(user_id)
+        return count
+    
+    async def remaining(self, user_id: str) -> int:
+        """Requests still allowed in the current window."""
+        return max(0, self.limit - await self.backend.count(user_id, self.window_seconds))
+
+
+async def flush_usage(limiter: UsageLimiter) -> int:
+    """Flush the limiter's pending usage with a fresh async session."""
+    from app.core.database import AsyncSessionLocal
+    
+    async with AsyncSessionLocal() as db:
+        return await limiter.write_behind.flush(db)
+
+
+async def run_usage_flusher(limiter: UsageLimiter, interval_seconds: float) -> None:
+    """
+    Flush pending usage every `interval_seconds` until cancelled.
+    
+    Runs in every worker (each one flushes what it counted); a final flush
+    on cancellation keeps shutdowns from dropping counts.
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                rows = await flush_usage(limiter)
+                if rows:
+                    logger.debug(f"Flushed suggestion usage for {rows} users")
+            except Exception as e:
+                logger.error(f"Suggestion usage flush failed (will retry): {e}")
+    finally:
+        try:
+            await asyncio.shield(flush_usage(limiter))
+        except Exception as e:
+            logger.error(f"Final suggestion usage flush failed: {e}")
+
+
+def create_usage_limiter() -> Optional[UsageLimiter]:
+    """
+    Build the limiter selected by RATE_LIMIT_BACKEND.
+    
+    Returns:
+        UsageLimiter, or None for the default database backend
+    """
+    backend_name = settings.rate_limit_backend.lower()
+    
+    if backend_name == "database":
+        return None
+    if backend_name == "memory":
+        backend = MemoryWindowBackend()
+    elif backend_name == "redis":
+        if not settings.redis_url:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        backend = RedisWindowBackend(settings.redis_url)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.rate_limit_backend}")
+    
+    logger.info(f"Suggestion limiter: {backend_name} sliding window of {settings.rate_limit_window_seconds}s")
+    return UsageLimiter(backend, settings.rate_limit_suggestions_per_day, settings.rate_limit_window_seconds)
+
+
+# Singleton instance
+_limiter_instance = None
+_limiter_created = False
+
+def get_usage_limiter() -> Optional[UsageLimiter]:
+    """Get singleton instance of the configured UsageLimiter (None if disabled)."""
+    global _limiter_instance, _limiter_created
+    if not _limiter_created:
+        _limiter_instance = create_usage_limiter()
+        _limiter_created = True
+    return _limiter_instance
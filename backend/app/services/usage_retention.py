@@ -0,0 +1,256 @@
+"""
+Retention for the daily suggestion usage table.
+
+The rate limiter only ever reads today's row, so daily rows older than
+USAGE_RETENTION_DAYS are rolled up into `user_suggestion_usage_monthly`
+(one row per user and month) and deleted. Work is done in batches of
+USAGE_RETENTION_BATCH_SIZE rows, each rolled up and deleted in its own
+short transaction, so the job never holds long locks on the hot table.
+
+On PostgreSQL the table can optionally be range-partitioned by date
+(scripts/partition_usage_table.py). When it is, the job also creates the
+partitions for the coming months and drops partitions emptied by the
+rollup, keeping the hot partition small.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.lottery import UserSuggestionUsage, UserSuggestionUsageMonthly
+
+logger = logging.getLogger(__name__)
+
+USAGE_TABLE = UserSuggestionUsage.__tablename__
+
+# Catches rows dated beyond the monthly partitions (see create_month_partition)
+DEFAULT_PARTITION = f"{USAGE_TABLE}_default"
+
+
+def month_start(day: date) -> date:
+    """First day of `day`'s month."""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` months after `day`'s month."""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def rollup_old_usage(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    today: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Roll daily usage rows older than the retention window into monthly rows.
+    
+    Args:
+        db: Database session
+        retention_days: Daily rows newer than this many days are kept
+        batch_size: Rows rolled up and deleted per transaction
+        max_batches: Stop after this many batches (None: until done)
+        today: Reference date (defaults to today)
+        
+    Returns:
+        dict with rows_rolled_up, monthly_rows_touched and batches
+    """
+    retention_days = settings.usage_retention_days if retention_days is None else retention_days
+    batch_size = batch_size or settings.usage_retention_batch_size
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    
+    usage = UserSuggestionUsage.__table__
+    monthly = UserSuggestionUsageMonthly.__table__
+    totals = {"rows_rolled_up": 0, "monthly_rows_touched": 0, "batches": 0}
+    
+    while max_batches is None or totals["batches"] < max_batches:
+        rows = db.execute(
+            select(usage.c.id, usage.c.user_id, usage.c.date, usage.c.suggestions_count)
+            .where(usage.c.date < cutoff)
+            .order_by(usage.c.date, usage.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        # (user_id, month) -> [suggestions, active days]
+        aggregates = defaultdict(lambda: [0, 0])
+        for row in rows:
+            aggregate = aggregates[(row.user_id, month_start(row.date))]
+            aggregate[0] += row.suggestions_count or 0
+            aggregate[1] += 1
+        
+        now = datetime.utcnow()
+        statement = dialect_insert(db)(monthly).values([
+            {
+                "user_id": user_id,
+                "month": month,
+                "suggestions_count": suggestions,
+                "active_days": days,
+                "updated_at": now,
+            }
+            for (user_id, month), (suggestions, days) in aggregates.items()
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[monthly.c.user_id, monthly.c.month],
+            set_={
+                "suggestions_count": monthly.c.suggestions_count + statement.excluded.suggestions_count,
+                "active_days": monthly.c.active_days + statement.excluded.active_days,
+                "updated_at": now,
+            },
+        )
+        
+        try:
+            db.execute(statement)
+            db.execute(delete(usage).where(usage.c.id.in_([row.id for row in rows])))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        totals["rows_rolled_up"] += len(rows)
+        totals["monthly_rows_touched"] += len(aggregates)
+        totals["batches"] += 1
+    
+    return totals
+
+
+def is_partitioned(db: Session) -> bool:
+    """Whether the usage table is a partitioned table (PostgreSQL only)."""
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": USAGE_TABLE}).scalar()
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding `month`."""
+    return f"{USAGE_TABLE}_p{month:%Y%m}"
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def create_month_partition(db: Session, month: date) -> None:
+    """
+    Create the partition for `month` if missing.
+    
+    PostgreSQL refuses to create a partition over rows the default
+    partition already holds for its range, so with a default partition
+    the new one is created detached, that month's rows are moved into it
+    and it is then attached. Inserts into the default partition wait
+    until the transaction ends.
+    """
+    name = partition_name(month)
+    if _table_exists(db, name):
+        return
+    
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    if not _table_exists(db, DEFAULT_PARTITION):
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {USAGE_TABLE} FOR VALUES {bounds}"))
+        return
+    
+    db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    db.execute(text(f"CREATE TABLE {name} (LIKE {USAGE_TABLE} INCLUDING DEFAULTS)"))
+    moved = db.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE date >= '{month.isoformat()}' AND date < '{add_months(month, 1).isoformat()}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    db.execute(text(f"ALTER TABLE {USAGE_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    if moved:
+        logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+
+
+def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Create partitions from the current month up to `months_ahead` months ahead.
+    
+    Each partition is created in its own transaction, so a failure leaves
+    the ones before it in place.
+    
+    Returns:
+        Names of the partitions ensured
+    """
+    months_ahead = settings.usage_partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(today or date.today())
+    
+    names = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        try:
+            create_month_partition(db, month)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        names.append(partition_name(month))
+    return names
+
+
+def drop_empty_partitions(db: Session, before: date) -> List[str]:
+    """
+    Drop partitions that end on or before `before` and hold no rows.
+    
+    Returns:
+        Names of the dropped partitions
+    """
+    partitions = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": USAGE_TABLE}).scalars().all()
+    
+    dropped = []
+    for name in sorted(partitions):
+        suffix = name.rsplit("_p", 1)[-1]
+        if not (len(suffix) == 6 and suffix.isdigit()):
+            continue  # Not one of ours (e.g. a default partition)
+        month = date(int(suffix[:4]), int(suffix[4:]), 1)
+        if add_months(month, 1) > before:
+            continue
+        if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    db.commit()
+    return dropped
+
+
+def run_usage_retention(db: Session, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Full retention pass: partition upkeep (if partitioned) and the rollup.
+    
+    Args:
+        db: Database session
+        today: Reference date (defaults to today)
+        
+    Returns:
+        dict with the rollup totals and partition changes
+    """
+    today = today or date.today()
+    partitioned = is_partitioned(db)
+    result = {"partitioned": partitioned}
+    
+    if partitioned:
+        result["partitions_ensured"] = ensure_future_partitions(db, today=today)
+    
+    result.update(rollup_old_usage(db, today=today))
+    
+    if partitioned:
+        cutoff = today - timedelta(days=settings.usage_retention_days)
+        result["partitions_dropped"] = drop_empty_partitions(db, before=cutoff)
+    
+    logger.info(f"Usage retention: {result}")
+    return result
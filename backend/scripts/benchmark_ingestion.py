@@ -0,0 +1,143 @@
+"""
+Ingestion benchmark - Run LotofacilFetcher.update_database fully offline.
+
+Upstream responses are served by ReplayTransport from recorded fixtures
+(FETCHER_MODE=record captures real ones) or from synthetic fixtures
+generated by this script, so runs are deterministic and need no network.
+
+Examples:
+    python scripts/benchmark_ingestion.py --synthesize 500 --start-from 1
+    python scripts/benchmark_ingestion.py --caixa-error 403 --latency lottolookup.com.br=0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+CAIXA_HOST = "servicebus2.caixa.gov.br"
+LOTTOLOOKUP_HOST = "lottolookup.com.br"
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark offline lottery data ingestion")
+    parser.add_argument("--fixtures", type=Path, default=None,
+                        help="Fixtures directory (defaults to FETCHER_FIXTURES_DIR)")
+    parser.add_argument("--synthesize", type=int, default=0, metavar="N",
+                        help="Write synthetic fixtures for contests 1..N before running")
+    parser.add_argument("--start-from", type=int, default=1, metavar="CONTEST",
+                        help="Seed the database with contests up to CONTEST (backfill the rest)")
+    parser.add_argument("--database-url", default=None,
+                        help="Database to ingest into (defaults to a throwaway SQLite file)")
+    parser.add_argument("--caixa-error", type=int, default=None, metavar="STATUS",
+                        help="Make Caixa answer every request with STATUS (e.g. 403)")
+    parser.add_argument("--latency", action="append", default=[], metavar="HOST=SECONDS",
+                        help="Inject latency for a host ('*' for all), may be repeated")
+    return parser.parse_args()
+
+
+def synthesize_fixtures(fixtures_dir: Path, contests: int, seed: int = 42) -> None:
+    """Write deterministic fake responses for contests 1..N on both upstream hosts."""
+    from app.core.config import settings
+    from app.services.data.replay_transport import save_fixture
+    
+    rng = random.Random(seed)
+    first_draw = date(2003, 9, 29)
+    caixa_base = settings.caixa_api_base_url.rstrip("/")
+    
+    for contest in range(1, contests + 1):
+        payload = {
+            "numero": contest,
+            "dataApuracao": (first_draw + timedelta(days=contest)).strftime("%d/%m/%Y"),
+            "listaDezenas": [f"{n:02d}" for n in sorted(rng.sample(range(1, 26), 15))],
+        }
+        body = json.dumps(payload).encode("utf-8")
+        save_fixture(fixtures_dir, httpx.URL(f"{caixa_base}/lotofacil/{contest}"), 200, body)
+        save_fixture(fixtures_dir, httpx.URL(f"https://{LOTTOLOOKUP_HOST}/api/lotofacil/{contest}"), 200, body)
+        if contest == contests:
+            save_fixture(fixtures_dir, httpx.URL(f"{caixa_base}/lotofacil"), 200, body)
+            save_fixture(fixtures_dir, httpx.URL(f"https://{LOTTOLOOKUP_HOST}/api/lotofacil/latest"), 200, body)
+    
+    print(f"Synthesized fixtures for {contests} contests in {fixtures_dir}")
+
+
+async def run_benchmark(args) -> None:
+    """Seed the database, run one update_database pass and report timings."""
+    from app.core.config import settings
+    from app.core.database import SessionLocal, init_db
+    from app.models.lottery import LotteryResult
+    from app.services.data.lotofacil_fetcher import LotofacilFetcher
+    from app.services.data.replay_transport import ReplayTransport
+    
+    fixtures_dir = args.fixtures or settings.fetcher_fixtures_dir
+    if args.synthesize:
+        synthesize_fixtures(fixtures_dir, args.synthesize)
+    
+    latency = {}
+    for item in args.latency:
+        host, _, seconds = item.partition("=")
+        latency[host] = float(seconds)
+    errors = {CAIXA_HOST: args.caixa_error} if args.caixa_error else {}
+    
+    transport = ReplayTransport(fixtures_dir, latency=latency, errors=errors)
+    fetcher = LotofacilFetcher(transport=transport, request_delay=0.0)
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        # Seed the database so update_database has something to backfill
+        for contest in range(1, args.start_from + 1):
+            data = await fetcher.fetch_contest(contest)
+            if data:
+                fetcher.save_result_to_db(data, db)
+        transport.requests_served = 0
+        
+        started = time.perf_counter()
+        result = await fetcher.update_database(db)
+        elapsed = time.perf_counter() - started
+        total = db.query(LotteryResult).count()
+    finally:
+        db.close()
+    
+    added = result.get("contests_added", 0)
+    print("\n" + "=" * 60)
+    print("  INGESTION BENCHMARK (offline replay)")
+    print("=" * 60)
+    print(f"  Result:            {result.get('message') or result.get('error')}")
+    print(f"  Contests added:    {added}")
+    print(f"  Contests in DB:    {total}")
+    print(f"  Upstream requests: {transport.requests_served}")
+    print(f"  Elapsed:           {elapsed:.3f}s")
+    if added:
+        print(f"  Throughput:        {added / elapsed:.1f} contests/s")
+    print("=" * 60 + "\n")
+
+
+def main():
+    """Main benchmark function."""
+    args = parse_args()
+    
+    # Configure before importing the app (settings are read at import time)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+    
+    asyncio.run(run_benchmark(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Export the lottery history (workbook plus append-only log) to Excel.
+
+New results are appended to a binary log instead of rewriting the
+workbook. Run this to get a spreadsheet with everything, or with
+--in-place to fold the log back into the source workbook.
+
+Usage:
+    python scripts/export_history_xlsx.py [--file PATH] [--output PATH | --in-place]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.storage import LotteryHistoryRepository
+
+
+def main():
+    """Main export function."""
+    parser = argparse.ArgumentParser(description="Export lottery history to Excel")
+    parser.add_argument("--file", type=Path, default=None, help="Source workbook (defaults to settings)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--output", type=Path, default=None, help="Destination workbook")
+    group.add_argument("--in-place", action="store_true",
+                       help="Rewrite the source workbook and clear the log")
+    args = parser.parse_args()
+
+    repository = LotteryHistoryRepository(args.file)
+    if not args.in_place and args.output is None:
+        args.output = settings.processed_data_dir / f"{repository.file_path.stem}_export.xlsx"
+
+    pending = len(repository.log)
+    output = repository.export_to_excel(None if args.in_place else args.output)
+
+    print(f"Exported {len(repository.load_history())} contests ({pending} from the log) to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
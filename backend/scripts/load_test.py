@@ -0,0 +1,114 @@
+"""
+Load test - Measure throughput and latency of the API under concurrency.
+
+Fires a fixed number of requests at each concurrency level and reports
+requests/s and latency percentiles, so a handler that blocks the event loop
+shows up as throughput that stops scaling with concurrency.
+
+Start the API first (several workers or one, as deployed), e.g.:
+    uvicorn app.main:app --port 8000
+
+Examples:
+    python scripts/load_test.py
+    python scripts/load_test.py --path /api/v1/history?page=50 --concurrency 1 16 64
+    python scripts/load_test.py --path /api/v1/statistics --no-etag
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/v1/results/latest",
+    "/api/v1/history?page_size=50",
+    "/api/v1/results/3000",
+    "/api/v1/statistics",
+]
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Load test the lottery API")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", action="append", dest="paths", default=None,
+                        help="Path to request (repeatable, defaults to the main GET endpoints)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64],
+                        help="Concurrency levels to test")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per level and path")
+    parser.add_argument("--no-etag", action="store_true",
+                        help="Always send unconditional requests (default revalidates with If-None-Match)")
+    return parser.parse_args()
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int, total: int, use_etag: bool) -> Dict[str, float]:
+    """
+    Send `total` requests to `path` from `concurrency` concurrent workers.
+    
+    Returns:
+        dict with rps, p50/p95/p99 latency (ms), errors and not_modified counts
+    """
+    latencies: List[float] = []
+    counts = {"errors": 0, "not_modified": 0}
+    remaining = total
+    etag = None
+    
+    async def worker():
+        nonlocal remaining, etag
+        while remaining > 0:
+            remaining -= 1
+            headers = {"If-None-Match": etag} if use_etag and etag else {}
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+            except httpx.HTTPError:
+                counts["errors"] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            
+            if response.status_code == 304:
+                counts["not_modified"] += 1
+            elif response.status_code >= 400:
+                counts["errors"] += 1
+            elif "etag" in response.headers:
+                etag = response.headers["etag"]
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        **counts,
+    }
+
+
+async def main():
+    """Run every path at every concurrency level and print a table."""
+    args = parse_args()
+    paths = args.paths or DEFAULT_PATHS
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        # Warm the server-side caches
+        for path in paths:
+            await client.get(path)
+        
+        for path in paths:
+            print(f"\n{path}")
+            print(f"  {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'304':>5} {'err':>5}")
+            for concurrency in args.concurrency:
+                result = await run_level(client, path, concurrency, args.requests, not args.no_etag)
+                print(f"  {concurrency:>5} {result['rps']:>9.1f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+                      f"{result['p99']:>8.1f} {result['not_modified']:>5} {result['errors']:>5}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Convert user_suggestion_usage into a table range-partitioned by date (PostgreSQL).
+
+Optional: keeps the hot partition (current month) small, and lets the
+retention job drop whole emptied partitions instead of leaving dead rows.
+Run it once, during a quiet period; it runs in a single transaction:
+
+1. The current table (and its indexes) is renamed to *_legacy
+2. A partitioned table with the same columns is created, with a
+   (id, date) primary key (the partition key must be part of it), the
+   unique (user_id, date) index and the date index
+3. Monthly partitions are created from the oldest row up to
+   USAGE_PARTITION_MONTHS_AHEAD months ahead, plus a default partition
+   for later dates (the retention job moves its rows into each month's
+   partition when it creates it)
+4. Rows are copied over and the legacy table is dropped (unless --keep-legacy)
+
+Usage:
+    python scripts/partition_usage_table.py [--dry-run] [--keep-legacy]
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.usage_retention import DEFAULT_PARTITION, USAGE_TABLE, add_months, month_start, partition_name
+
+LEGACY_TABLE = f"{USAGE_TABLE}_legacy"
+SEQUENCE = f"{USAGE_TABLE}_id_seq"
+
+
+def build_statements(connection, keep_legacy: bool) -> list:
+    """Build the conversion SQL for the current database state."""
+    oldest = connection.execute(text(f"SELECT MIN(date) FROM {USAGE_TABLE}")).scalar() or date.today()
+    indexes = connection.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+    ), {"table": USAGE_TABLE}).scalars().all()
+    
+    statements = [f"ALTER TABLE {USAGE_TABLE} RENAME TO {LEGACY_TABLE}"]
+    statements += [f"ALTER INDEX {name} RENAME TO {name}_legacy" for name in indexes]
+    statements += [
+        f"ALTER SEQUENCE {SEQUENCE} OWNED BY NONE",
+        f"""CREATE TABLE {USAGE_TABLE} (
+            id INTEGER NOT NULL DEFAULT nextval('{SEQUENCE}'),
+            user_id VARCHAR NOT NULL,
+            date DATE NOT NULL,
+            suggestions_count INTEGER,
+            is_premium BOOLEAN,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)""",
+        f"ALTER SEQUENCE {SEQUENCE} OWNED BY {USAGE_TABLE}.id",
+        f"CREATE UNIQUE INDEX uq_{USAGE_TABLE}_user_date ON {USAGE_TABLE} (user_id, date)",
+        f"CREATE INDEX ix_{USAGE_TABLE}_date ON {USAGE_TABLE} (date)",
+        f"CREATE INDEX ix_{USAGE_TABLE}_id ON {USAGE_TABLE} (id)",
+    ]
+    
+    month = month_start(oldest)
+    last = add_months(month_start(date.today()), settings.usage_partition_months_ahead)
+    while month <= last:
+        statements.append(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF {USAGE_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+    statements.append(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {USAGE_TABLE} DEFAULT")
+    
+    statements.append(
+        f"INSERT INTO {USAGE_TABLE} (id, user_id, date, suggestions_count, is_premium, created_at, updated_at) "
+        f"SELECT id, user_id, date, suggestions_count, is_premium, created_at, updated_at FROM {LEGACY_TABLE}"
+    )
+    if not keep_legacy:
+        statements.append(f"DROP TABLE {LEGACY_TABLE}")
+    return statements
+
+
+def main():
+    """Run the conversion."""
+    parser = argparse.ArgumentParser(description="Partition user_suggestion_usage by month (PostgreSQL)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the SQL without running it")
+    parser.add_argument("--keep-legacy", action="store_true", help=f"Keep {LEGACY_TABLE} after copying")
+    args = parser.parse_args()
+    
+    if engine.dialect.name != "postgresql":
+        print(f"Partitioning requires PostgreSQL (database is {engine.dialect.name})")
+        sys.exit(1)
+    
+    with engine.connect() as connection, connection.begin():
+        already = connection.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+        ), {"table": USAGE_TABLE}).scalar()
+        if already:
+            print(f"{USAGE_TABLE} is already partitioned")
+            return
+        
+        statements = build_statements(connection, args.keep_legacy)
+        for statement in statements:
+            print(statement + ";")
+            if not args.dry_run:
+                connection.execute(text(statement))
+    
+    if args.dry_run:
+        print("\nDry run: nothing changed")
+    else:
+        print(f"\n{USAGE_TABLE} is now partitioned by month")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Shared pytest configuration: run the API against a local SQLite database."""
+
+import os
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_test_db = Path(tempfile.mkdtemp()) / "lottery_adviser_test.db"
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_test_db}")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("STARTUP_SYNC_ENABLED", "false")
+os.environ.setdefault("SHARED_DRAW_MATRIX_ENABLED", "false")
+os.environ.setdefault("PROCESS_POOL_WORKERS", "0")
+
+
+def random_draws(n: int, seed: int = 0, size: int = 15) -> np.ndarray:
+    """`n` random sets of `size` distinct numbers between 1 and 25, one per row."""
+    rng = np.random.default_rng(seed)
+    return np.argsort(rng.random((n, 25)), axis=1)[:, :size] + 1
+
+
+@pytest.fixture
+def db():
+    """Database session on a freshly initialized schema; tables are emptied afterwards."""
+    from app.core.database import Base, SessionLocal, init_db
+    from app.services.cache_service import get_contest_cache
+    from app.services.subscription_cache import get_subscription_cache
+    
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
+        get_contest_cache().invalidate()
+        get_subscription_cache().invalidate()
+
+
+@pytest.fixture
+def seed_results(db):
+    """
+    Insert lottery results: seed_results(draws) stores draws[i] as contest
+    i + 1 (a {contest: numbers} dict is stored as given, in its order), one
+    day apart from `first_date`. Returns the session.
+    """
+    from app.models.lottery import LotteryResult
+    
+    def seed(draws, first_date: date = date(2026, 1, 1)):
+        items = draws.items() if isinstance(draws, dict) else enumerate(draws, start=1)
+        for contest, numbers in items:
+            db.add(LotteryResult(
+                contest_number=int(contest),
+                draw_date=first_date + timedelta(days=int(contest) - 1),
+                numbers=[int(number) for number in numbers]
+            ))
+        db.commit()
+        return db
+    
+    return seed
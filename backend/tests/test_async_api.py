@@ -0,0 +1,65 @@
+"""Tests for the async request path (async sessions, work off the event loop)."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import to_async_url
+from app.main import app
+from app.services import cache_service
+
+
+@pytest.fixture
+def seeded(seed_results):
+    return seed_results([range(contest, contest + 15) for contest in range(1, 4)])
+
+
+def test_async_url_mapping():
+    assert to_async_url("postgresql://u:p@host/db?sslmode=require") == "postgresql+asyncpg://u:p@host/db?ssl=require"
+    assert to_async_url("sqlite:///./lottery.db") == "sqlite+aiosqlite:///./lottery.db"
+
+
+def test_subscription_lifecycle(db):
+    client = TestClient(app)
+    
+    assert client.get("/api/v1/subscriptions/u1").json()["is_premium"] is False
+    updated = client.post("/api/v1/subscriptions/update", json={"user_id": "u1", "is_premium": True})
+    assert updated.json()["is_premium"] is True
+    assert client.get("/api/v1/subscriptions/u1").json()["is_premium"] is True
+    assert client.delete("/api/v1/subscriptions/u1").json()["is_premium"] is False
+
+
+def test_suggestions_are_rate_limited(seeded):
+    client = TestClient(app)
+    request = {"user_id": "free-user", "strategy": "balanced", "count": 1}
+    
+    remaining = [client.post("/api/v1/suggestions", json=request).json()["remaining_today"] for _ in range(3)]
+    
+    assert remaining == [2, 1, 0]
+    assert client.post("/api/v1/suggestions", json=request).status_code == 429
+
+
+def test_slow_statistics_do_not_block_other_requests(seeded, monkeypatch):
+    def slow_statistics(db):
+        time.sleep(0.5)
+        return {"error": "slow"}
+    monkeypatch.setattr(cache_service, "get_cached_statistics", slow_statistics)
+    monkeypatch.setattr("app.api.v1.lottery.get_cached_statistics", slow_statistics)
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            finished = {}
+            
+            async def timed(name, path):
+                await client.get(path)
+                finished[name] = time.perf_counter()
+            
+            await asyncio.gather(timed("statistics", "/api/v1/statistics"), timed("result", "/api/v1/results/2"))
+            return finished
+    
+    finished = asyncio.run(scenario())
+    assert finished["result"] < finished["statistics"]
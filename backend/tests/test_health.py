@@ -0,0 +1,85 @@
+"""Tests for liveness/readiness probes and non-blocking startup."""
+
+import time
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal, init_db
+from app.main import app
+from app.models.lottery import LotteryResult
+
+
+def _wait_for_initial_sync(client: TestClient, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.json()["initial_sync"] != "pending":
+            return response
+        time.sleep(0.05)
+    raise AssertionError("initial sync did not finish")
+
+
+def test_liveness_does_not_need_database():
+    with TestClient(app) as client:
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+        _wait_for_initial_sync(client)
+
+
+def test_readiness_after_startup():
+    with TestClient(app) as client:
+        response = _wait_for_initial_sync(client)
+        body = response.json()
+        assert response.status_code == 200, body
+        assert body["ready"] is True
+        assert body["database"] == "healthy"
+        assert body["initial_sync"] == "disabled"
+        assert body["startup_seconds"] is not None
+
+
+def test_readiness_reports_existing_data():
+    with TestClient(app) as client:
+        _wait_for_initial_sync(client)
+        db = SessionLocal()
+        try:
+            db.add(LotteryResult(
+                contest_number=1,
+                draw_date=date(2003, 9, 29),
+                numbers=list(range(1, 16))
+            ))
+            db.commit()
+        finally:
+            db.close()
+        
+        try:
+            response = client.get("/health/ready")
+            assert response.json()["has_data"] is True
+        finally:
+            db = SessionLocal()
+            db.query(LotteryResult).delete()
+            db.commit()
+            db.close()
+
+
+def test_database_initialization_is_retried(monkeypatch):
+    from app import main
+    from app.core.config import settings
+    
+    attempts = []
+    
+    def flaky_init_db():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise ConnectionError("database not reachable yet")
+        init_db()
+    
+    monkeypatch.setattr(main, "init_db", flaky_init_db)
+    monkeypatch.setattr(settings, "startup_db_retry_initial_seconds", 0.01)
+    
+    with TestClient(app) as client:
+        response = _wait_for_initial_sync(client)
+        assert response.status_code == 200, response.json()
+        assert response.json()["database"] == "healthy"
+    assert len(attempts) == 3
@@ -0,0 +1,70 @@
+"""Tests for /api/v1/history pagination."""
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.lottery import LotteryResult
+
+
+@pytest.fixture
+def client(db):
+    for contest in range(1, 26):
+        db.add(LotteryResult(
+            contest_number=contest,
+            draw_date=date(2026, 1, 1) + timedelta(days=contest),
+            numbers=list(range(1, 16)),
+        ))
+    db.commit()
+    # No lifespan: the db fixture already initialized the schema
+    return TestClient(app)
+
+
+def _contests(response):
+    return [r["contest_number"] for r in response.json()["results"]]
+
+
+def test_offset_pages_expose_a_cursor(client):
+    response = client.get("/api/v1/history", params={"page": 1, "page_size": 10})
+    body = response.json()
+    
+    assert response.status_code == 200
+    assert _contests(response) == list(range(25, 15, -1))
+    assert body["total"] == 25
+    assert body["total_pages"] == 3
+    assert body["next_before"] == 16
+
+
+def test_cursor_walks_every_contest_once(client):
+    seen = []
+    before = None
+    while True:
+        params = {"page_size": 10}
+        if before is not None:
+            params["before"] = before
+        body = client.get("/api/v1/history", params=params).json()
+        seen.extend(r["contest_number"] for r in body["results"])
+        before = body["next_before"]
+        if before is None:
+            break
+    
+    assert seen == list(range(25, 0, -1))
+
+
+def test_last_full_page_has_no_cursor(client):
+    body = client.get("/api/v1/history", params={"before": 6, "page_size": 5}).json()
+    
+    assert [r["contest_number"] for r in body["results"]] == [5, 4, 3, 2, 1]
+    assert body["next_before"] is None
+
+
+def test_total_is_cached_per_contest_version(client, db):
+    assert client.get("/api/v1/history").json()["total"] == 25
+    
+    db.query(LotteryResult).filter(LotteryResult.contest_number == 1).delete()
+    db.commit()
+    
+    # Same latest contest: the cached total is still served
+    assert client.get("/api/v1/history").json()["total"] == 25
@@ -0,0 +1,63 @@
+"""Tests for the column-only, streamed history load."""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_draws
+
+from app.models.lottery import LotteryResult
+from app.services.statistics_service import LotteryStatisticsService
+
+
+@pytest.fixture
+def seeded(seed_results):
+    draws = random_draws(50, seed=5)
+    # Inserted out of order: the load must come back in contest order
+    order = np.random.default_rng(5).permutation(50) + 1
+    return seed_results({int(contest): draws[contest - 1] for contest in order}, first_date=date(2024, 1, 2))
+
+
+def _orm_dataframe(db):
+    """The history frame as the ORM-based loader used to build it."""
+    rows = []
+    for result in db.query(LotteryResult).order_by(LotteryResult.contest_number).all():
+        row = {'concurso': result.contest_number, 'data': result.draw_date}
+        for i, num in enumerate(result.numbers, start=1):
+            row[f'bola_{i}'] = num
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_dataframe_matches_orm_load(seeded):
+    pd.testing.assert_frame_equal(LotteryStatisticsService(seeded).get_history_dataframe(), _orm_dataframe(seeded))
+
+
+def test_streamed_chunks(seeded):
+    chunks = list(LotteryStatisticsService(seeded).iter_history_chunks(batch_size=16))
+    
+    assert [len(chunk["contests"]) for chunk in chunks] == [16, 16, 16, 2]
+    assert np.concatenate([chunk["contests"] for chunk in chunks]).tolist() == list(range(1, 51))
+    assert chunks[0]["dates"][0] == np.datetime64("2024-01-02")
+    assert chunks[0]["numbers"].shape == (16, 15)
+
+
+def test_arrays_grow_past_the_initial_count(seeded, monkeypatch):
+    service = LotteryStatisticsService(seeded)
+    extra = {
+        "contests": np.array([51], dtype=np.int64),
+        "dates": np.array(["2024-02-21"], dtype="datetime64[D]"),
+        "numbers": np.arange(1, 16, dtype=np.int16)[None, :],
+    }
+    original = service.iter_history_chunks
+    monkeypatch.setattr(service, "iter_history_chunks", lambda batch_size: [*original(batch_size), extra])
+    
+    arrays = service.load_history_arrays()
+    
+    assert arrays["contests"].tolist() == list(range(1, 52))
+    assert arrays["numbers"][-1].tolist() == list(range(1, 16))
+
+
+def test_empty_history(db):
+    assert LotteryStatisticsService(db).get_history_dataframe().empty
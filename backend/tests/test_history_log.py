@@ -0,0 +1,72 @@
+"""Tests for the append-only binary history log."""
+
+from datetime import date
+
+import pytest
+
+from app.core.bitmask import numbers_to_mask
+from app.services.storage.history_log import RECORD, HistoryLog
+
+
+def test_append_and_read_back(tmp_path):
+    log = HistoryLog(tmp_path / "history.log")
+    log.append(3576, date(2026, 1, 1), [3, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 25])
+    log.append(3577, date(2026, 1, 2), range(11, 26))
+    
+    records = HistoryLog(tmp_path / "history.log").read()
+    assert records["contest"].tolist() == [3576, 3577]
+    
+    df = log.to_dataframe()
+    assert df["data"].tolist() == [date(2026, 1, 1), date(2026, 1, 2)]
+    assert df.iloc[0][[f"bola_{i}" for i in range(1, 16)]].tolist() == list(range(1, 15)) + [25]
+
+
+def test_duplicates_are_rejected_through_the_index(tmp_path):
+    log = HistoryLog(tmp_path / "history.log")
+    log.append(1, date(2003, 9, 29), range(1, 16))
+    
+    reopened = HistoryLog(tmp_path / "history.log")
+    assert 1 in reopened
+    with pytest.raises(ValueError):
+        reopened.append(1, date(2003, 9, 29), range(1, 16))
+
+
+def test_torn_record_is_ignored_and_truncated(tmp_path):
+    path = tmp_path / "history.log"
+    log = HistoryLog(path)
+    log.append(1, date(2003, 9, 29), range(1, 16))
+    
+    # Simulate a crash in the middle of writing the next record
+    with open(path, "ab") as f:
+        f.write(b"\x02\x00\x00")
+    
+    assert len(HistoryLog(path)) == 1
+    
+    log = HistoryLog(path)
+    log.append(2, date(2003, 10, 1), range(11, 26))
+    assert log.read()["contest"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("numbers", [
+    range(1, 15),                               # too few
+    list(range(1, 15)) + [14],                  # duplicate
+    list(range(1, 15)) + [26],                  # out of range
+])
+def test_invalid_draws_are_rejected_before_writing(tmp_path, numbers):
+    path = tmp_path / "history.log"
+    with pytest.raises(ValueError):
+        HistoryLog(path).append(1, date(2003, 9, 29), numbers)
+    assert not path.exists()
+
+
+def test_invalid_records_are_skipped_when_decoding(tmp_path):
+    path = tmp_path / "history.log"
+    log = HistoryLog(path)
+    log.append(1, date(2003, 9, 29), range(1, 16))
+    
+    # A short record written before append validated its input
+    with open(path, "ab") as f:
+        f.write(RECORD.pack(2, date(2003, 10, 1).toordinal(), numbers_to_mask(range(1, 15))))
+    
+    df = HistoryLog(path).to_dataframe()
+    assert df["concurso"].tolist() == [1]
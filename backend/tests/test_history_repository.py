@@ -0,0 +1,126 @@
+"""Tests for the Excel history repository and its sidecar cache."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.services.storage.history_log import HistoryLog
+from app.services.storage.history_repository import LotteryHistoryRepository
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    path = tmp_path / "history.xlsx"
+    rows = []
+    for contest in range(1, 6):
+        row = {"concurso": contest, "data": f"0{contest}/01/2026"}
+        row.update({f"bola_{i}": ((contest + i) % 25) + 1 for i in range(1, 16)})
+        rows.append(row)
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return path
+
+
+def _repository(history_file, tmp_path):
+    return LotteryHistoryRepository(history_file, cache_dir=tmp_path, log_dir=tmp_path / "history")
+
+
+def test_second_load_is_served_from_sidecar_cache(history_file, tmp_path, monkeypatch):
+    repo = _repository(history_file, tmp_path)
+    first = repo.load_history()
+    assert repo.cache_path.exists()
+    
+    def fail_parse():
+        raise AssertionError("workbook parsed again")
+    monkeypatch.setattr(repo, "_parse_workbook", fail_parse)
+    
+    pd.testing.assert_frame_equal(repo.load_history(), first)
+
+
+def test_cache_is_invalidated_when_file_changes(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    repo.load_history()
+    
+    df = pd.read_excel(history_file)
+    df.iloc[:3].to_excel(history_file, index=False)
+    
+    assert len(repo.load_history()) == 3
+
+
+def test_parsed_columns_are_typed(history_file, tmp_path):
+    history = _repository(history_file, tmp_path).load_history()
+    
+    assert history["concurso"].dtype == "int64"
+    assert history["data"].dtype == "datetime64[ns]"
+    assert history["data"].iloc[0] == pd.Timestamp(2026, 1, 1)
+    assert history["bola_1"].dtype == "int16"
+
+
+def test_append_goes_to_log_without_rewriting_workbook(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    mtime = history_file.stat().st_mtime_ns
+    
+    repo.append_result({"concurso": 6, "data": date(2026, 1, 6), "numeros": list(range(11, 26))})
+    
+    assert history_file.stat().st_mtime_ns == mtime
+    history = _repository(history_file, tmp_path).load_history()
+    assert len(history) == 6
+    last = history.iloc[-1]
+    assert last["concurso"] == 6
+    assert last["data"] == pd.Timestamp(2026, 1, 6)
+    assert [last[f"bola_{i}"] for i in range(1, 16)] == list(range(11, 26))
+
+
+def test_export_folds_log_into_workbook(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    repo.append_result({"concurso": 6, "data": date(2026, 1, 6), "numeros": list(range(1, 16))})
+    
+    repo.export_to_excel()
+    
+    assert len(repo.log) == 0
+    assert pd.read_excel(history_file)["concurso"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert list(tmp_path.glob(".history.*")) == []
+
+
+def test_failed_export_keeps_workbook_and_log(history_file, tmp_path, monkeypatch):
+    repo = _repository(history_file, tmp_path)
+    repo.append_result({"concurso": 6, "data": date(2026, 1, 6), "numeros": list(range(1, 16))})
+    
+    def fail_midway(self, f, **kwargs):
+        f.write(b"partial")
+        raise OSError("disk full")
+    monkeypatch.setattr(pd.DataFrame, "to_excel", fail_midway)
+    
+    with pytest.raises(OSError):
+        repo.export_to_excel()
+    
+    monkeypatch.undo()
+    assert len(repo.log) == 1
+    assert pd.read_excel(history_file)["concurso"].tolist() == [1, 2, 3, 4, 5]
+    assert list(tmp_path.glob(".history.*")) == []
+
+
+def test_log_is_kept_out_of_the_cache_directory(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    repo.append_result({"concurso": 6, "data": date(2026, 1, 6), "numeros": list(range(1, 16))})
+    
+    assert repo.log.path.parent == tmp_path / "history"
+    assert repo.cache_path.parent == tmp_path
+
+
+def test_legacy_log_next_to_the_cache_is_moved(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    legacy_path = repo.cache_path.with_name(repo.cache_path.name.replace(".npz", ".log"))
+    HistoryLog(legacy_path).append(6, date(2026, 1, 6), range(1, 16))
+    
+    history = _repository(history_file, tmp_path).load_history()
+    
+    assert history["concurso"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert not legacy_path.exists()
+
+
+def test_append_rejects_duplicates(history_file, tmp_path):
+    repo = _repository(history_file, tmp_path)
+    
+    with pytest.raises(ValueError, match="already exists"):
+        repo.append_result({"concurso": 3, "data": date(2026, 1, 3), "numeros": list(range(1, 16))})
@@ -0,0 +1,83 @@
+"""Tests for ETag / 304 handling on contest-versioned endpoints."""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import etag_matches, make_etag
+from app.main import app
+from app.models.lottery import LotteryResult
+from app.services import cache_service
+from app.services.cache_service import ContestVersion
+
+
+@pytest.fixture
+def client(db):
+    db.add(LotteryResult(contest_number=7, draw_date=date(2026, 1, 7), numbers=list(range(1, 16))))
+    db.commit()
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/results/latest",
+    "/api/v1/statistics",
+    "/api/v1/history",
+    "/api/v1/results/7",
+])
+def test_matching_etag_gets_304(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.headers["etag"] == make_etag(ContestVersion(7, 1))
+    assert "max-age" in first.headers["cache-control"]
+    
+    second = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_304_does_not_run_the_endpoint(client, monkeypatch):
+    etag = client.get("/api/v1/statistics").headers["etag"]
+    
+    def fail(db):
+        raise AssertionError("statistics computed")
+    monkeypatch.setattr("app.api.v1.lottery.get_cached_statistics", fail)
+    
+    assert client.get("/api/v1/statistics", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_new_contest_changes_etag(client, db):
+    etag = client.get("/api/v1/results/latest").headers["etag"]
+    
+    db.add(LotteryResult(contest_number=8, draw_date=date(2026, 1, 8), numbers=list(range(2, 17))))
+    db.commit()
+    cache_service.refresh_contest_version(db)
+    
+    response = client.get("/api/v1/results/latest", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["contest"] == 8
+    assert response.headers["etag"] == make_etag(ContestVersion(8, 2))
+
+
+def test_etag_matching_rules():
+    etag = make_etag(ContestVersion(3, 3))
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(make_etag(ContestVersion(3, 2)), etag)
+    assert not etag_matches(None, etag)
+
+
+def test_backfill_changes_etag(client, db):
+    etag = client.get("/api/v1/statistics").headers["etag"]
+    
+    # An older contest arrives after the latest one
+    db.add(LotteryResult(contest_number=5, draw_date=date(2026, 1, 5), numbers=list(range(3, 18))))
+    db.commit()
+    cache_service.refresh_contest_version(db)
+    
+    response = client.get("/api/v1/statistics", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == make_etag(ContestVersion(7, 2))
+    assert response.json()["total_contests"] == 2
@@ -0,0 +1,173 @@
+"""Tests for the process pool running CPU-heavy jobs."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from conftest import random_draws
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.main import app
+from app.services import job_pool, job_store
+from app.services.draw_matrix import DrawMatrix
+from app.services.job_pool import JobPool, JobTimeoutError, PoolBusyError, score_tickets_job, snapshot_of
+from app.services.storage.shared_draw_matrix import attach_draw_matrix, publish_draw_matrix
+from app.services.ticket_scoring import distribution_response, hit_distribution, tickets_to_masks
+
+
+def _matrix(rows=300):
+    numbers = random_draws(rows, seed=9)
+    return DrawMatrix.from_numbers(np.arange(1, rows + 1), np.full(rows, "2026-01-01", dtype="datetime64[D]"), numbers)
+
+
+@pytest.fixture
+def seeded(seed_results):
+    return seed_results([range(1, 16), range(11, 26)])
+
+
+def test_jobs_run_in_worker_processes():
+    matrix = _matrix()
+    tickets = random_draws(50, seed=1).tolist()
+    pool = JobPool(workers=1, max_pending=4, timeout_seconds=60)
+    pool.start()
+    try:
+        content = asyncio.run(pool.run(score_tickets_job, snapshot_of(matrix), tickets))
+    finally:
+        pool.shutdown(wait=True)
+    
+    expected = distribution_response(tickets, hit_distribution(tickets_to_masks(tickets), matrix.masks), len(matrix))
+    assert content == expected.model_dump_json()
+    assert pool.pending == 0
+
+
+def test_shared_snapshot_is_passed_by_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    matrix = _matrix()
+    publish_draw_matrix(matrix)
+    shared = attach_draw_matrix("300-300")
+    
+    assert snapshot_of(shared) == "300-300"
+    assert snapshot_of(matrix) is matrix
+    tickets = [list(range(1, 16))]
+    assert job_pool.score_tickets_job("300-300", tickets) == job_pool.score_tickets_job(matrix, tickets)
+
+
+def test_timeout_and_backpressure():
+    pool = JobPool(workers=0, max_pending=1, timeout_seconds=0.05)
+    
+    async def scenario():
+        with pytest.raises(JobTimeoutError):
+            await pool.run(time.sleep, 0.3)
+        # The timed-out job still occupies the queue until it really ends
+        assert pool.is_busy
+        with pytest.raises(PoolBusyError):
+            await pool.run(time.sleep, 0)
+        await asyncio.sleep(0.4)
+        return await pool.run(sum, [1, 2])
+    
+    assert asyncio.run(scenario()) == 3
+    assert pool.pending == 0
+
+
+def test_busy_pool_returns_503_without_using_the_daily_limit(seeded, monkeypatch):
+    busy = JobPool(workers=0, max_pending=0, timeout_seconds=1)
+    monkeypatch.setattr(job_pool, "_pool_instance", busy)
+    client = TestClient(app)
+    
+    response = client.post("/api/v1/suggestions", json={"user_id": "u1", "count": 1})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    
+    monkeypatch.setattr(job_pool, "_pool_instance", JobPool(workers=0, max_pending=4, timeout_seconds=10))
+    response = client.post("/api/v1/suggestions", json={"user_id": "u1", "count": 1})
+    assert response.status_code == 200
+    assert response.json()["remaining_today"] == settings.rate_limit_suggestions_per_day - 1
+
+
+def test_timed_out_job_does_not_use_the_daily_limit(seeded, monkeypatch):
+    monkeypatch.setattr(job_pool, "_pool_instance", JobPool(workers=0, max_pending=4, timeout_seconds=0.05))
+    monkeypatch.setattr("app.api.v1.lottery.generate_suggestions_job", lambda *args: time.sleep(0.3))
+    client = TestClient(app)
+    
+    assert client.post("/api/v1/suggestions", json={"user_id": "u1", "count": 1}).status_code == 504
+    
+    monkeypatch.setattr("app.api.v1.lottery.generate_suggestions_job", job_pool.generate_suggestions_job)
+    monkeypatch.setattr(job_pool, "_pool_instance", JobPool(workers=0, max_pending=4, timeout_seconds=10))
+    response = client.post("/api/v1/suggestions", json={"user_id": "u1", "count": 1})
+    assert response.status_code == 200
+    assert response.json()["remaining_today"] == settings.rate_limit_suggestions_per_day - 1
+
+
+def test_thread_fallback_runs_jobs_concurrently():
+    pool = JobPool(workers=0, max_pending=2, timeout_seconds=1)
+    # Each job waits for the other: a single thread would time out
+    barrier = threading.Barrier(2, timeout=0.5)
+    
+    async def scenario():
+        return await asyncio.gather(pool.run(barrier.wait), pool.run(barrier.wait))
+    
+    assert sorted(asyncio.run(scenario())) == [0, 1]
+
+
+def test_reserved_slot_is_used_or_given_back():
+    pool = JobPool(workers=0, max_pending=1, timeout_seconds=1)
+    
+    async def scenario():
+        with pool.reserve() as slot:
+            # The reservation holds the only slot
+            with pytest.raises(PoolBusyError):
+                await pool.run(sum, [1])
+            result = await pool.run(sum, [1, 2], slot=slot)
+        with pool.reserve():
+            pass
+        return result
+    
+    assert asyncio.run(scenario()) == 3
+    assert pool.pending == 0
+
+
+def test_background_ticket_scoring(seeded, monkeypatch):
+    monkeypatch.setattr(job_pool, "_pool_instance", JobPool(workers=0, max_pending=4, timeout_seconds=10))
+    client = TestClient(app)
+    payload = {"tickets": [list(range(1, 16)), list(range(6, 21))]}
+    
+    submitted = client.post("/api/v1/tickets/score", json={**payload, "background": True})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    
+    # Job records are in the database: a poll answered by another worker finds it
+    monkeypatch.setattr(job_pool, "_pool_instance", JobPool(workers=0, max_pending=4, timeout_seconds=10))
+    
+    for _ in range(100):
+        status = client.get(f"/api/v1/jobs/{job_id}").json()
+        if status["status"] == "completed":
+            break
+        time.sleep(0.01)
+    
+    assert status["name"] == "ticket_score"
+    assert status["result"] == client.post("/api/v1/tickets/score", json=payload).json()
+    assert client.get("/api/v1/jobs/unknown").status_code == 404
+
+
+def test_job_records_expire(seeded):
+    pool = JobPool(workers=0, max_pending=4, timeout_seconds=10)
+    job_id = pool.submit_job("sum", sum, [1, 2])["job_id"]
+    client = TestClient(app)
+    
+    for _ in range(100):
+        status = client.get(f"/api/v1/jobs/{job_id}").json()
+        if status["status"] == "completed":
+            break
+        time.sleep(0.01)
+    assert status["result"] == 3
+    
+    with SessionLocal() as db:
+        # A finished job is not updated again
+        assert not job_store.finish_job(db, job_id, "timeout")
+        assert job_store.purge_expired_jobs(db, datetime.utcnow() + timedelta(hours=2)) == 1
+    assert client.get(f"/api/v1/jobs/{job_id}").status_code == 404
@@ -0,0 +1,137 @@
+"""Tests for inter-process locks, leader election and contest-versioned caching."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.locks import FileLock, PostgresAdvisoryLock, ProcessLock, create_lock
+from app.main import app
+from app.services import leader_election, scheduler
+from app.services.cache_service import ContestCache
+from app.services.leader_election import LEADER_LOCK_NAME
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    first = FileLock("leader", directory=tmp_path)
+    second = FileLock("leader", directory=tmp_path)
+    
+    assert first.acquire() is True
+    assert second.acquire() is False
+    
+    first.release()
+    assert second.acquire() is True
+    second.release()
+
+
+class FakeConnection:
+    """Connection answering every lock query with True until it drops."""
+    
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+    
+    def execute(self, statement, params=None):
+        if not self.alive:
+            raise OperationalError(str(statement), params, Exception("server closed the connection"))
+        return SimpleNamespace(scalar=lambda: True)
+    
+    def commit(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+
+
+def test_advisory_lock_is_reacquired_after_connection_loss():
+    connections = []
+    
+    def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+    
+    lock = PostgresAdvisoryLock("leader", engine=SimpleNamespace(connect=connect))
+    assert lock.acquire() is True
+    assert lock.is_held is True
+    
+    connections[0].alive = False
+    assert lock.is_held is False
+    assert connections[0].closed
+    
+    assert lock.acquire() is True
+    assert len(connections) == 2
+    assert lock.is_held is True
+
+
+def test_leader_election_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    
+    def try_acquire_leadership():
+        threads.append(threading.current_thread())
+        return False
+    monkeypatch.setattr(scheduler, "is_leader", lambda: False)
+    monkeypatch.setattr(scheduler, "try_acquire_leadership", try_acquire_leadership)
+    
+    asyncio.run(scheduler.elect_leader())
+    
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_create_lock_uses_file_lock_on_sqlite():
+    assert isinstance(create_lock("anything"), FileLock)
+
+
+def test_follower_skips_startup_sync(monkeypatch):
+    other_worker = create_lock(LEADER_LOCK_NAME)
+    assert other_worker.acquire()
+    monkeypatch.setattr(settings, "startup_sync_enabled", True)
+    
+    try:
+        with TestClient(app) as client:
+            deadline = time.monotonic() + 5
+            while app.state.initial_sync in ("pending", "running") and time.monotonic() < deadline:
+                time.sleep(0.05)
+            
+            assert app.state.initial_sync == "follower"
+            assert app.state.is_leader is False
+            assert client.get("/health/ready").status_code == 200
+    finally:
+        other_worker.release()
+        leader_election.release_leadership()
+
+
+def test_contest_cache_invalidates_on_new_version():
+    cache = ContestCache()
+    cache.set_version(3576)
+    
+    assert cache.get_or_compute("statistics", lambda: "v3576") == "v3576"
+    assert cache.get_or_compute("statistics", lambda: "recomputed") == "v3576"
+    
+    assert cache.set_version(3577) is True
+    assert cache.get("statistics") is None
+    assert cache.get_or_compute("statistics", lambda: "v3577") == "v3577"
+
+
+def test_contest_cache_drops_values_computed_for_old_version():
+    cache = ContestCache()
+    cache.set_version(1)
+    cache.set_version(2)
+    
+    cache.set("statistics", "stale", version=1)
+    assert cache.get("statistics") is None
+
+
+def test_incomplete_lock_backend_fails_at_construction():
+    class NoRelease(ProcessLock):
+        is_held = False
+        
+        def acquire(self, blocking=False):
+            return True
+    
+    with pytest.raises(TypeError):
+        NoRelease("leader")
@@ -0,0 +1,74 @@
+"""Tests for the post-ingest hook pipeline."""
+
+import asyncio
+import threading
+from datetime import date
+
+from app.models.lottery import LotteryResult
+from app.services.cache_service import get_contest_cache
+from app.services.pipelines import post_ingest
+from app.services.pipelines.post_ingest import (
+    get_post_ingest_hooks,
+    register_post_ingest_hook,
+    run_post_ingest_hooks,
+)
+from app.services.scheduler import refresh_contest_cache
+
+
+def _add_contest(db, contest_number, numbers):
+    db.add(LotteryResult(contest_number=contest_number, draw_date=date(2026, 1, contest_number), numbers=numbers))
+    db.commit()
+
+
+def test_hooks_prewarm_every_derived_cache(db):
+    _add_contest(db, 1, list(range(1, 16)))
+    _add_contest(db, 2, list(range(11, 26)))
+    
+    timings = run_post_ingest_hooks(db)
+    
+    assert list(timings) == get_post_ingest_hooks()
+    assert all(duration is not None for duration in timings.values())
+    
+    cache = get_contest_cache()
+    assert cache.version == (2, 2)
+    assert cache.get("statistics")["total_contests"] == 2
+    assert len(cache.get("history")) == 2
+    assert cache.get("latest_result") == {"contest": 2, "date": "2026-01-02", "numbers": list(range(11, 26))}
+    assert cache.get("windowed_frequencies")[10][15] == 2
+    assert set(cache.get("strategy_plan")["recent_hot_numbers"]) <= set(range(1, 26))
+
+
+def test_failing_hook_does_not_stop_the_others(db, monkeypatch):
+    monkeypatch.setattr(post_ingest, "_hooks", list(post_ingest._hooks))
+    calls = []
+    
+    @register_post_ingest_hook("broken")
+    def broken(db):
+        raise RuntimeError("boom")
+    
+    @register_post_ingest_hook("after_broken")
+    def after_broken(db):
+        calls.append("after_broken")
+    
+    timings = run_post_ingest_hooks(db)
+    
+    assert timings["broken"] is None
+    assert calls == ["after_broken"]
+
+
+def test_scheduled_refresh_runs_hooks_off_the_event_loop(db, monkeypatch):
+    monkeypatch.setattr(post_ingest, "_hooks", [])
+    threads = []
+    
+    @register_post_ingest_hook("record_thread")
+    def record_thread(db):
+        threads.append(threading.get_ident())
+    
+    _add_contest(db, 1, list(range(1, 16)))
+    
+    async def refresh():
+        await refresh_contest_cache()
+        return threading.get_ident()
+    
+    loop_thread = asyncio.run(refresh())
+    assert threads and threads[0] != loop_thread
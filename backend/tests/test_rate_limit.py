@@ -0,0 +1,75 @@
+"""Tests for the atomic daily suggestion limit."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base
+from app.core.migrations import run_migrations
+from app.models.lottery import UserSubscription, UserSuggestionUsage
+from app.services.rate_limit_service import RateLimitService
+from app.services.subscription_cache import get_subscription_cache
+
+
+async def _check(user_id):
+    async with AsyncSessionLocal() as session:
+        return await RateLimitService(session).check_and_increment(user_id)
+
+
+async def _check_concurrently(user_id, requests):
+    return await asyncio.gather(*(_check(user_id) for _ in range(requests)))
+
+
+def test_limit_holds_under_concurrency(db):
+    results = asyncio.run(_check_concurrently("racer", 20))
+    
+    allowed = [remaining for can_generate, remaining in results if can_generate]
+    assert len(allowed) == settings.rate_limit_suggestions_per_day
+    assert sorted(allowed) == list(range(settings.rate_limit_suggestions_per_day))
+    
+    usage = db.query(UserSuggestionUsage).filter_by(user_id="racer").all()
+    assert len(usage) == 1
+    assert usage[0].suggestions_count == settings.rate_limit_suggestions_per_day
+
+
+def test_premium_users_are_unlimited_and_cached(db):
+    db.add(UserSubscription(user_id="vip", is_premium=True, expires_at=datetime.utcnow() + timedelta(days=1)))
+    db.commit()
+    
+    results = asyncio.run(_check_concurrently("vip", 5))
+    
+    assert results == [(True, -1)] * 5
+    assert get_subscription_cache().get("vip").is_active
+    assert db.query(UserSuggestionUsage).filter_by(user_id="vip").count() == 0
+
+
+def test_expired_premium_counts_as_free(db):
+    db.add(UserSubscription(user_id="lapsed", is_premium=True, expires_at=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+    
+    assert asyncio.run(_check("lapsed")) == (True, settings.rate_limit_suggestions_per_day - 1)
+
+
+def test_migration_collapses_duplicates_and_adds_unique_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    today = date.today().isoformat()
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX uq_user_suggestion_usage_user_date"))
+        for count in (1, 3, 2):
+            connection.execute(text(
+                "INSERT INTO user_suggestion_usage (user_id, date, suggestions_count, is_premium) "
+                "VALUES ('dup', :today, :count, 0)"
+            ), {"today": today, "count": count})
+    
+    run_migrations(engine)
+    run_migrations(engine)  # idempotent
+    
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT suggestions_count FROM user_suggestion_usage")).all()
+    assert rows == [(3,)]
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("user_suggestion_usage")}
+    assert indexes["uq_user_suggestion_usage_user_date"]["unique"]
+    engine.dispose()
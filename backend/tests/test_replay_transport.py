@@ -0,0 +1,73 @@
+"""Tests for the record/replay transports used for offline ingestion."""
+
+import asyncio
+
+import httpx
+
+from app.services.data.lotofacil_fetcher import LotofacilFetcher
+from app.services.data.replay_transport import RecordingTransport, ReplayTransport
+
+CAIXA_HOST = "servicebus2.caixa.gov.br"
+LOTTOLOOKUP_HOST = "lottolookup.com.br"
+
+
+def _contest_payload(contest):
+    return {"numero": contest, "dataApuracao": "01/01/2026", "listaDezenas": [f"{n:02d}" for n in range(1, 16)]}
+
+
+def _upstream(request: httpx.Request) -> httpx.Response:
+    contest = int(request.url.path.rsplit("/", 1)[-1])
+    return httpx.Response(200, json=_contest_payload(contest))
+
+
+def _record(fixtures_dir, contests):
+    """Record both upstream hosts through a fake network."""
+    recorder = RecordingTransport(fixtures_dir, transport=httpx.MockTransport(_upstream))
+    fetcher = LotofacilFetcher(transport=recorder)
+    
+    async def record():
+        for contest in contests:
+            await fetcher.fetch_contest(contest)
+        async with httpx.AsyncClient(transport=recorder) as client:
+            for contest in contests:
+                await client.get(f"https://{LOTTOLOOKUP_HOST}/api/lotofacil/{contest}")
+    
+    asyncio.run(record())
+
+
+def test_replay_serves_recorded_responses(tmp_path):
+    _record(tmp_path, [3575, 3576])
+    replay = ReplayTransport(tmp_path)
+    fetcher = LotofacilFetcher(transport=replay)
+    
+    data = asyncio.run(fetcher.fetch_contest(3576))
+    
+    assert data["numero"] == 3576
+    assert replay.requests_served == 1
+
+
+def test_injected_caixa_error_falls_back_to_lottolookup(tmp_path):
+    _record(tmp_path, [3576])
+    replay = ReplayTransport(tmp_path, errors={CAIXA_HOST: 403})
+    fetcher = LotofacilFetcher(transport=replay)
+    
+    data = asyncio.run(fetcher.fetch_contest(3576))
+    
+    assert data["numero"] == 3576
+    assert replay.requests_served == 2
+
+
+def test_injected_latency_beyond_timeout_raises_read_timeout(tmp_path):
+    _record(tmp_path, [3576])
+    replay = ReplayTransport(tmp_path, latency={"*": 5.0})
+    fetcher = LotofacilFetcher(transport=replay)
+    fetcher.timeout = 0.01
+    
+    assert asyncio.run(fetcher.fetch_contest(3576)) is None
+
+
+def test_missing_fixture_is_a_404(tmp_path):
+    replay = ReplayTransport(tmp_path)
+    fetcher = LotofacilFetcher(transport=replay)
+    
+    assert asyncio.run(fetcher.fetch_contest(1)) is None
@@ -0,0 +1,89 @@
+"""Tests for the numbers_mask column and the SQL-side set queries."""
+
+from datetime import date
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.bitmask import numbers_to_mask
+from app.core.database import Base
+from app.core.migrations import run_migrations
+from app.models.lottery import LotteryResult
+from app.services.storage.results_repository import (
+    count_draws_containing,
+    draws_with_min_hits,
+    find_draw_by_numbers,
+    find_draws_containing,
+    hit_distribution,
+)
+
+DRAWS = {
+    1: list(range(1, 16)),
+    2: list(range(11, 26)),
+    3: list(range(1, 8)) + list(range(18, 26)),
+}
+
+
+def _seed(db):
+    for contest, numbers in DRAWS.items():
+        db.add(LotteryResult(contest_number=contest, draw_date=date(2026, 1, contest), numbers=numbers))
+    db.commit()
+
+
+def test_mask_is_set_on_ingest(db):
+    _seed(db)
+    
+    result = db.query(LotteryResult).filter_by(contest_number=2).one()
+    assert result.numbers_mask == numbers_to_mask(DRAWS[2])
+    
+    result.numbers = DRAWS[1]
+    db.commit()
+    assert result.numbers_mask == numbers_to_mask(DRAWS[1])
+
+
+def test_containment_queries(db):
+    _seed(db)
+    
+    assert [r.contest_number for r in find_draws_containing(db, [1, 7])] == [3, 1]
+    assert count_draws_containing(db, [12, 13]) == 2
+    assert count_draws_containing(db, [1, 25]) == 1
+    assert find_draws_containing(db, [1, 7], limit=1)[0].contest_number == 3
+
+
+def test_exact_lookup(db):
+    _seed(db)
+    
+    assert find_draw_by_numbers(db, reversed(DRAWS[2])).contest_number == 2
+    assert find_draw_by_numbers(db, range(2, 17)) is None
+
+
+def test_hit_counts_are_computed_in_sql(db):
+    _seed(db)
+    ticket = list(range(1, 16))
+    
+    # Draw 1: 15 hits, draw 2: 11-15 -> 5, draw 3: 1-7 -> 7
+    assert hit_distribution(db, ticket) == {5: 1, 7: 1, 15: 1}
+    assert draws_with_min_hits(db, ticket, 7) == [
+        {"contest_number": 3, "hits": 7},
+        {"contest_number": 1, "hits": 15},
+    ]
+
+
+def test_migration_adds_and_backfills_mask(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE lottery_results (id INTEGER PRIMARY KEY, contest_number INTEGER UNIQUE NOT NULL, "
+            "draw_date DATE NOT NULL, numbers JSON NOT NULL, created_at DATETIME)"
+        ))
+        connection.execute(text(
+            "INSERT INTO lottery_results (contest_number, draw_date, numbers) VALUES (1, '2026-01-01', '[1, 2, 3]')"
+        ))
+    Base.metadata.create_all(bind=engine)
+    
+    run_migrations(engine)
+    
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT numbers_mask FROM lottery_results")).scalar() == 0b111
+    names = {index["name"] for index in inspect(engine).get_indexes("lottery_results")}
+    assert "ix_lottery_results_numbers_mask" in names
+    engine.dispose()
@@ -0,0 +1,78 @@
+"""Tests for contest search over the per-contest feature arrays."""
+
+import numpy as np
+from conftest import random_draws
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.draw_matrix import DrawMatrix
+
+DRAWS = {
+    1: list(range(1, 16)),                          # sum 120, 7 even
+    2: list(range(11, 26)),                         # sum 270, 7 even
+    3: list(range(1, 8)) + list(range(18, 26)),     # sum 196, 7 even
+    4: list(range(2, 26, 2)) + [1, 3, 5],           # sum 165, 12 even
+}
+
+
+def test_search_filters():
+    numbers = random_draws(500, seed=3)
+    matrix = DrawMatrix.from_numbers(np.arange(1, 501), np.full(500, "2026-01-01", dtype="datetime64[D]"), numbers)
+    ticket = set(numbers[0][:12].tolist()) | {n for n in range(1, 26) if n not in numbers[0]}
+    
+    selected = matrix.search(
+        contains_all=[3, 4],
+        contains_any=[20, 21],
+        excludes=[25],
+        sum_min=180,
+        sum_max=210,
+        even_count=7,
+        ticket=ticket,
+        min_overlap=9
+    )
+    
+    expected = []
+    for row in numbers.tolist():
+        drawn = set(row)
+        expected.append(
+            {3, 4} <= drawn and bool(drawn & {20, 21}) and 25 not in drawn
+            and 180 <= sum(row) <= 210 and sum(n % 2 == 0 for n in row) == 7
+            and len(drawn & ticket) >= 9
+        )
+    assert selected.tolist() == expected
+    assert matrix.search().all()
+
+
+def test_search_endpoint(seed_results):
+    seed_results(DRAWS)
+    client = TestClient(app)
+    
+    body = client.get("/api/v1/results/search", params={"contains": [1, 7]}).json()
+    assert [r["contest_number"] for r in body["results"]] == [3, 1]
+    assert body["results"][0] == {"contest_number": 3, "draw_date": "2026-01-03", "numbers": sorted(DRAWS[3])}
+    
+    body = client.get("/api/v1/results/search", params={"excludes": [25], "even_count": 7}).json()
+    assert [r["contest_number"] for r in body["results"]] == [1]
+    
+    body = client.get("/api/v1/results/search", params={"sum_min": 150, "sum_max": 200, "contains_any": [2, 3]}).json()
+    assert [r["contest_number"] for r in body["results"]] == [4, 3]
+    
+    body = client.get("/api/v1/results/search", params={"ticket": list(range(1, 16))}).json()
+    assert [r["contest_number"] for r in body["results"]] == [1]
+    body = client.get("/api/v1/results/search", params={"ticket": list(range(1, 16)), "min_overlap": 7}).json()
+    assert [r["contest_number"] for r in body["results"]] == [4, 3, 1]
+
+
+def test_search_pagination_and_validation(seed_results):
+    seed_results(DRAWS)
+    client = TestClient(app)
+    
+    first = client.get("/api/v1/results/search", params={"page_size": 3}).json()
+    assert [r["contest_number"] for r in first["results"]] == [4, 3, 2]
+    assert first["total"] == 4 and first["next_before"] == 2
+    second = client.get("/api/v1/results/search", params={"page_size": 3, "before": 2}).json()
+    assert [r["contest_number"] for r in second["results"]] == [1]
+    assert second["next_before"] is None
+    
+    assert client.get("/api/v1/results/search", params={"contains": [26]}).status_code == 422
+    assert client.get("/api/v1/results/search", params={"min_overlap": 11}).status_code == 422
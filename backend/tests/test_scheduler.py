@@ -0,0 +1,75 @@
+"""Tests for draw-time polling with exponential backoff."""
+
+import asyncio
+from datetime import date
+
+from app.models.lottery import LotteryResult
+from app.services import scheduler
+from app.services.cache_service import get_contest_cache
+from app.services.pipelines.post_ingest import run_post_ingest_hooks
+from app.services.scheduler import DrawPollingPolicy, poll_lottery_data
+
+
+class FakeFetcher:
+    """Fetcher returning a scripted sequence of latest contest numbers."""
+    
+    def __init__(self, db, latest_contests):
+        self.db = db
+        self.latest_contests = list(latest_contests)
+        self.latest_calls = 0
+        self.updates = 0
+    
+    async def fetch_latest_result(self):
+        self.latest_calls += 1
+        contest = self.latest_contests.pop(0)
+        return {"numero": contest, "dataApuracao": "02/01/2026", "listaDezenas": [f"{n:02d}" for n in range(1, 16)]}
+    
+    async def update_database(self, db, latest_api_result=None):
+        self.updates += 1
+        db.add(LotteryResult(
+            contest_number=latest_api_result["numero"],
+            draw_date=date(2026, 1, 2),
+            numbers=list(range(1, 16))
+        ))
+        db.commit()
+        run_post_ingest_hooks(db)
+        return {"success": True, "contests_added": 1, "latest_contest": latest_api_result["numero"]}
+
+
+def _no_wait_policy(max_attempts):
+    return DrawPollingPolicy(initial_delay_seconds=0, max_attempts=max_attempts)
+
+
+def test_backoff_delays_are_capped():
+    policy = DrawPollingPolicy(initial_delay_seconds=60, backoff_factor=2, max_delay_seconds=300, max_attempts=6)
+    assert policy.delays() == [60, 120, 240, 300, 300]
+
+
+def test_polls_until_new_contest_then_stops(db, monkeypatch):
+    db.add(LotteryResult(contest_number=3576, draw_date=date(2026, 1, 1), numbers=list(range(1, 16))))
+    db.commit()
+    fetcher = FakeFetcher(db, [3576, 3576, 3577, 3577])
+    monkeypatch.setattr(scheduler, "get_fetcher", lambda: fetcher)
+    monkeypatch.setattr(scheduler, "is_leader", lambda: True)
+    
+    result = asyncio.run(poll_lottery_data(_no_wait_policy(max_attempts=5)))
+    
+    assert result["success"] is True
+    assert result["attempts"] == 3
+    assert fetcher.latest_calls == 3
+    assert fetcher.updates == 1
+    # Caches were warmed for the new contest
+    assert get_contest_cache().version.latest == 3577
+    assert get_contest_cache().get("statistics")["total_contests"] == 2
+
+
+def test_polling_gives_up_after_max_attempts(db, monkeypatch):
+    fetcher = FakeFetcher(db, [0, 0, 0])
+    monkeypatch.setattr(scheduler, "get_fetcher", lambda: fetcher)
+    monkeypatch.setattr(scheduler, "is_leader", lambda: True)
+    
+    result = asyncio.run(poll_lottery_data(_no_wait_policy(max_attempts=3)))
+    
+    assert result["success"] is False
+    assert fetcher.latest_calls == 3
+    assert fetcher.updates == 0
@@ -0,0 +1,114 @@
+"""Tests for the memory-mapped draw matrix shared between workers."""
+
+from dataclasses import fields
+from datetime import date
+
+import numpy as np
+import pytest
+from conftest import random_draws
+
+from app.core.config import settings
+from app.services.cache_service import (
+    get_cached_draw_matrix,
+    get_cached_history,
+    get_contest_cache,
+    refresh_contest_version,
+)
+from app.services.draw_matrix import DrawMatrix
+from app.services.statistics_service import LotteryStatisticsService
+from app.services.storage.shared_draw_matrix import (
+    attach_draw_matrix,
+    prune_draw_matrices,
+    publish_draw_matrix,
+    published_versions,
+)
+
+
+def _matrix(last_contest, rows=40):
+    contests = np.arange(last_contest - rows + 1, last_contest + 1)
+    dates = np.datetime64("2024-01-01") + contests.astype("timedelta64[D]")
+    return DrawMatrix.from_numbers(contests, dates, random_draws(rows, seed=last_contest))
+
+
+def test_publish_and_attach(tmp_path):
+    matrix = _matrix(100)
+    
+    assert publish_draw_matrix(matrix, root=tmp_path).name == "100-40"
+    shared = attach_draw_matrix("100-40", root=tmp_path)
+    
+    for field in fields(DrawMatrix):
+        assert isinstance(getattr(shared, field.name), np.memmap)
+        np.testing.assert_array_equal(getattr(shared, field.name), getattr(matrix, field.name))
+    with pytest.raises(ValueError):
+        shared.masks[0] = 0
+    assert shared.search(contains_all=[1]).tolist() == matrix.search(contains_all=[1]).tolist()
+    assert attach_draw_matrix("101-41", root=tmp_path) is None
+
+
+def test_versions_are_immutable_and_pruned(tmp_path):
+    first = publish_draw_matrix(_matrix(100), root=tmp_path)
+    # Same version again (e.g. another worker): the published copy stays
+    assert publish_draw_matrix(_matrix(100), root=tmp_path) == first
+    # Same latest contest with more draws (a backfill) is a new version
+    assert publish_draw_matrix(_matrix(100, rows=50), root=tmp_path).name == "100-50"
+    assert len(attach_draw_matrix("100-40", root=tmp_path)) == 40
+    
+    publish_draw_matrix(_matrix(101), root=tmp_path)
+    assert published_versions(root=tmp_path) == ["100-50", "101-40"]
+    assert prune_draw_matrices(root=tmp_path, keep=1) == ["100-50"]
+    assert publish_draw_matrix(DrawMatrix.empty(), root=tmp_path) is None
+
+
+def test_attach_rejects_files_not_matching_the_version(tmp_path):
+    source = publish_draw_matrix(_matrix(100), root=tmp_path)
+    # E.g. a directory left over from before a restart, renamed by hand
+    source.rename(source.with_name("100-45"))
+    
+    assert attach_draw_matrix("100-45", root=tmp_path) is None
+    with pytest.raises(ValueError):
+        attach_draw_matrix("100", root=tmp_path)
+
+
+def test_prefix_counts():
+    matrix = _matrix(100)
+    numbers = matrix.numbers
+    
+    assert matrix.frequencies().tolist() == [int((numbers == n).sum()) for n in range(1, 26)]
+    assert matrix.frequencies(30).tolist() == [int((numbers[30:] == n).sum()) for n in range(1, 26)]
+
+
+def test_workers_share_the_published_matrix(seed_results, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "shared_draw_matrix_enabled", True)
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    db = seed_results([range(contest, contest + 15) for contest in range(1, 6)], first_date=date(2026, 1, 2))
+    
+    history = get_cached_history(db)
+    assert published_versions() == ["5-5"]
+    
+    # A fresh worker: nothing cached, and the database must not be read
+    get_contest_cache().invalidate()
+    monkeypatch.setattr(LotteryStatisticsService, "load_history_arrays", lambda self: pytest.fail("history loaded"))
+    
+    assert isinstance(get_cached_draw_matrix(db).masks, np.memmap)
+    assert get_cached_history(db).equals(history)
+
+
+def test_backfill_publishes_a_new_matrix(seed_results, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "shared_draw_matrix_enabled", True)
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    db = seed_results({contest: range(contest, contest + 15) for contest in (3, 4, 5)})
+    assert len(get_cached_draw_matrix(db)) == 3
+    
+    # Older contests arrive after the latest one (e.g. a restart later)
+    seed_results({contest: range(contest, contest + 15) for contest in (1, 2)})
+    get_contest_cache().invalidate()
+    
+    matrix = get_cached_draw_matrix(db)
+    assert matrix.contests.tolist() == [1, 2, 3, 4, 5]
+    assert published_versions() == ["5-3", "5-5"]
+    
+    # Another worker attaches the backfilled matrix, not the truncated one
+    get_contest_cache().invalidate()
+    refresh_contest_version(db)
+    assert isinstance(get_cached_draw_matrix(db).masks, np.memmap)
+    assert len(get_cached_draw_matrix(db)) == 5
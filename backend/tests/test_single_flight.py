@@ -0,0 +1,87 @@
+"""Tests for single-flight coalescing of cache misses."""
+
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.single_flight import SingleFlight
+from app.main import app
+from app.services import cache_service
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+    
+    async def scenario():
+        results = await asyncio.gather(*(flight.do(("statistics", 7), compute) for _ in range(10)))
+        # Finished flights are forgotten: the next miss computes again
+        again = await flight.do(("statistics", 8), compute)
+        return results, again
+    
+    results, again = asyncio.run(scenario())
+    
+    assert results == ["value"] * 10 and again == "value"
+    assert len(calls) == 2
+    assert flight.stats() == {"statistics": {"executed": 2, "coalesced": 9}}
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_cancellation_is_isolated():
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("boom")
+    
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+    
+    async def scenario():
+        failures = await asyncio.gather(*(flight.do("a", fail) for _ in range(3)), return_exceptions=True)
+        
+        impatient = asyncio.ensure_future(flight.do("b", slow))
+        patient = asyncio.ensure_future(flight.do("b", slow))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return failures, await patient
+    
+    failures, value = asyncio.run(scenario())
+    
+    assert all(isinstance(error, RuntimeError) for error in failures)
+    assert value == 42
+
+
+def test_cold_burst_computes_statistics_once(seed_results, monkeypatch):
+    seed_results([range(contest, contest + 15) for contest in range(1, 4)])
+    
+    computed = []
+    original = cache_service.LotteryStatisticsService.compute_statistics_from_history
+    
+    def slow_statistics(history):
+        computed.append(threading.get_ident())
+        time.sleep(0.05)
+        return original(history)
+    
+    monkeypatch.setattr(cache_service.LotteryStatisticsService, "compute_statistics_from_history", staticmethod(slow_statistics))
+    before = cache_service.get_single_flight().stats().get("statistics", {}).get("coalesced", 0)
+    
+    async def scenario():
+        return await asyncio.gather(*(
+            cache_service.get_cached_async("statistics", cache_service.get_cached_statistics) for _ in range(20)
+        ))
+    
+    results = asyncio.run(scenario())
+    
+    assert len(computed) == 1
+    assert all(result["total_contests"] == 3 for result in results)
+    stats = TestClient(app).get("/health/cache").json()
+    assert stats["single_flight"]["statistics"]["coalesced"] - before == 19
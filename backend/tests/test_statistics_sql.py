@@ -0,0 +1,40 @@
+"""Tests for the SQL aggregation mode of LotteryStatisticsService."""
+
+from datetime import date
+
+import pytest
+from conftest import random_draws
+
+from app.core.config import settings
+from app.services.cache_service import get_cached_statistics
+from app.services.statistics_service import LotteryStatisticsService
+
+
+@pytest.fixture
+def seeded(seed_results):
+    return seed_results(random_draws(200, seed=11), first_date=date(2020, 1, 2))
+
+
+def test_sql_mode_matches_pandas(seeded):
+    service = LotteryStatisticsService(seeded)
+    
+    from_pandas = service.compute_statistics(backend="pandas")
+    from_sql = service.compute_statistics(backend="sql")
+    
+    assert from_sql.pop("average_sum") == pytest.approx(from_pandas.pop("average_sum"))
+    assert from_sql == from_pandas
+    assert from_sql["total_contests"] == 200
+    assert from_sql["total_numbers_analyzed"] == 3000
+    assert from_sql["date_range"] == {"first_draw": "2020-01-02", "last_draw": "2020-07-19"}
+
+
+def test_sql_mode_without_data(db):
+    statistics = LotteryStatisticsService(db).compute_statistics(backend="sql")
+    assert statistics == {"error": "No data available for analysis", "total_contests": 0}
+
+
+def test_cached_statistics_use_configured_backend(seeded, monkeypatch):
+    monkeypatch.setattr(settings, "statistics_backend", "sql")
+    monkeypatch.setattr(LotteryStatisticsService, "get_history_dataframe", lambda self: pytest.fail("history loaded"))
+    
+    assert get_cached_statistics(seeded)["total_contests"] == 200
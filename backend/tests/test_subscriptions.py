@@ -0,0 +1,177 @@
+"""Tests for cached subscription lookups."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.main import app
+from app.models.lottery import UserSubscription
+from app.services.subscription_cache import NO_SUBSCRIPTION, SubscriptionCache, SubscriptionStatus, get_subscription_cache
+from app.schemas.lottery import SubscriptionEvent
+from app.services.subscription_service import collapse_events, get_subscription_status
+
+WEBHOOK_AUTH = {"Authorization": "Bearer test-webhook-secret"}
+
+
+@pytest.fixture
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "revenuecat_webhook_secret", "test-webhook-secret")
+
+
+def test_get_does_not_create_rows_and_caches_unknown_users(db):
+    client = TestClient(app)
+    
+    body = client.get("/api/v1/subscriptions/nobody").json()
+    
+    assert body == {"user_id": "nobody", "is_premium": False, "expires_at": None}
+    assert db.query(UserSubscription).count() == 0
+    assert get_subscription_cache().get("nobody") == NO_SUBSCRIPTION
+
+
+def test_update_and_cancel_invalidate_the_cache(db):
+    client = TestClient(app)
+    client.get("/api/v1/subscriptions/u1")
+    
+    client.post("/api/v1/subscriptions/update", json={"user_id": "u1", "is_premium": True})
+    assert client.get("/api/v1/subscriptions/u1").json()["is_premium"] is True
+    
+    client.delete("/api/v1/subscriptions/u1")
+    assert client.get("/api/v1/subscriptions/u1").json()["is_premium"] is False
+
+
+def test_cache_hits_skip_the_database(db):
+    db.add(UserSubscription(user_id="vip", is_premium=True))
+    db.commit()
+    
+    async def lookup():
+        async with AsyncSessionLocal() as session:
+            return await get_subscription_status(session, "vip")
+    
+    first = asyncio.run(lookup())
+    # Changed behind the cache's back (e.g. by another worker): served from cache until the TTL
+    db.query(UserSubscription).filter_by(user_id="vip").update({"is_premium": False})
+    db.commit()
+    
+    assert asyncio.run(lookup()) == first
+    assert first.is_active
+
+
+def test_expiry_is_evaluated_lazily():
+    soon = SubscriptionStatus(True, True, datetime.utcnow() + timedelta(seconds=3600))
+    expired = SubscriptionStatus(True, True, datetime.utcnow() - timedelta(seconds=1))
+    
+    assert soon.is_active
+    assert not expired.is_active
+
+
+def test_cache_is_bounded_and_ttl_expires():
+    cache = SubscriptionCache(max_entries=2, ttl_seconds=60)
+    for user_id in ("a", "b"):
+        cache.set(user_id, NO_SUBSCRIPTION)
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", NO_SUBSCRIPTION)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == NO_SUBSCRIPTION
+    assert len(cache) == 2
+    
+    expired = SubscriptionCache(max_entries=2, ttl_seconds=0)
+    expired.set("a", NO_SUBSCRIPTION)
+    assert expired.get("a") is None
+
+
+def test_batch_collapses_to_latest_event_per_user(db, webhook_secret):
+    db.add(UserSubscription(user_id="existing", is_premium=True))
+    db.commit()
+    client = TestClient(app)
+    client.get("/api/v1/subscriptions/existing")  # cached as premium
+    t0 = datetime(2026, 1, 1)
+    
+    response = client.post("/api/v1/subscriptions/batch", headers=WEBHOOK_AUTH, json={"events": [
+        {"user_id": "a", "is_premium": True, "event_timestamp": (t0 + timedelta(minutes=5)).isoformat()},
+        {"user_id": "a", "is_premium": False, "event_timestamp": t0.isoformat()},  # older, delivered late
+        {"user_id": "existing", "is_premium": True},
+        {"user_id": "existing", "is_premium": False},
+    ]})
+    
+    body = response.json()
+    assert response.status_code == 200
+    assert body["received"] == 4
+    assert body["users_updated"] == 2
+    rows = {row.user_id: row.is_premium for row in db.query(UserSubscription).all()}
+    assert rows == {"a": True, "existing": False}
+    assert client.get("/api/v1/subscriptions/existing").json()["is_premium"] is False
+
+
+def test_untimestamped_events_only_replace_untimestamped_ones():
+    t0 = datetime(2026, 1, 1)
+    events = [
+        SubscriptionEvent(user_id="a", is_premium=True, event_timestamp=t0),
+        SubscriptionEvent(user_id="a", is_premium=False),
+        SubscriptionEvent(user_id="b", is_premium=True),
+        SubscriptionEvent(user_id="b", is_premium=False),
+        SubscriptionEvent(user_id="c", is_premium=False),
+        SubscriptionEvent(user_id="c", is_premium=True, event_timestamp=t0),
+    ]
+    
+    latest = collapse_events(events)
+    
+    assert {user_id: event.is_premium for user_id, event in latest.items()} == {"a": True, "b": False, "c": True}
+
+
+def test_replayed_batch_does_not_roll_back_newer_state(db, webhook_secret):
+    client = TestClient(app)
+    t0 = datetime(2026, 1, 1)
+    
+    def send(*events):
+        response = client.post("/api/v1/subscriptions/batch", headers=WEBHOOK_AUTH, json={"events": list(events)})
+        assert response.status_code == 200
+        return response.json()
+    
+    old = {"user_id": "a", "is_premium": True, "event_timestamp": t0.isoformat()}
+    send(old)
+    body = send({"user_id": "a", "is_premium": False, "event_timestamp": "2026-01-01T01:00:00+00:00"})
+    assert body["results"][0]["is_premium"] is False
+    
+    # The first batch is delivered again, then an event without a timestamp
+    assert send(old)["results"][0]["is_premium"] is False
+    assert send({"user_id": "a", "is_premium": True})["results"][0]["is_premium"] is False
+    
+    row = db.query(UserSubscription).filter_by(user_id="a").one()
+    assert row.is_premium is False
+    assert row.event_timestamp == t0 + timedelta(hours=1)
+    assert client.get("/api/v1/subscriptions/a").json()["is_premium"] is False
+
+
+def test_large_batch_is_applied_in_one_request(db, webhook_secret):
+    events = [{"user_id": f"user-{i % 2500}", "is_premium": i % 3 == 0} for i in range(5000)]
+    
+    response = TestClient(app).post("/api/v1/subscriptions/batch", headers=WEBHOOK_AUTH, json={"events": events})
+    
+    assert response.json()["users_updated"] == 2500
+    assert db.query(UserSubscription).count() == 2500
+    # The second half of the batch wins: user-1 last appears at i=2501
+    assert db.query(UserSubscription).filter_by(user_id="user-1").one().is_premium is False
+    assert db.query(UserSubscription).filter_by(user_id="user-0").one().is_premium is False
+    assert db.query(UserSubscription).filter_by(user_id="user-2").one().is_premium is True
+
+
+def test_batch_requires_the_webhook_secret(db, monkeypatch):
+    client = TestClient(app)
+    payload = {"events": [{"user_id": "a", "is_premium": True}]}
+    
+    monkeypatch.setattr(settings, "revenuecat_webhook_secret", None)
+    assert client.post("/api/v1/subscriptions/batch", headers=WEBHOOK_AUTH, json=payload).status_code == 503
+    
+    monkeypatch.setattr(settings, "revenuecat_webhook_secret", "s3cret")
+    assert client.post("/api/v1/subscriptions/batch", json=payload).status_code == 401
+    assert client.post(
+        "/api/v1/subscriptions/batch", headers={"Authorization": "Bearer wrong"}, json=payload
+    ).status_code == 401
+    assert db.query(UserSubscription).count() == 0
+    
+    assert client.post("/api/v1/subscriptions/batch", headers={"Authorization": "s3cret"}, json=payload).status_code == 200
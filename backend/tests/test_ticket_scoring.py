@@ -0,0 +1,74 @@
+"""Tests for bulk ticket scoring (vectorized popcount against the draw history)."""
+
+import numpy as np
+from conftest import random_draws
+from fastapi.testclient import TestClient
+
+from app.core.bitmask import masks_from_matrix
+from app.main import app
+from app.services.draw_matrix import DrawMatrix
+from app.services.ticket_scoring import hit_distribution, score_against_draw, tickets_to_masks
+
+
+def test_distribution_matches_set_intersections():
+    draws = random_draws(300, seed=7)
+    # Mostly near-copies of draws, so every prize tier shows up
+    tickets = [list(draws[i % 300][:15 - i % 5]) + [n for n in range(1, 26) if n not in draws[i % 300]][:i % 5]
+               for i in range(60)]
+    tickets += [list(row) for row in random_draws(20, seed=8, size=18)]
+    
+    expected = np.zeros((len(tickets), 5), dtype=np.int64)
+    for t, ticket in enumerate(tickets):
+        for draw in draws:
+            hits = len(set(ticket) & set(draw.tolist()))
+            if hits >= 11:
+                expected[t, hits - 11] += 1
+    
+    masks = tickets_to_masks(tickets)
+    draw_masks = masks_from_matrix(draws)
+    assert expected.sum() > 0
+    # Tiny blocks exercise both the ticket and the draw splits
+    for block_cells in (1_000_000, 450, 7, 1):
+        np.testing.assert_array_equal(hit_distribution(masks, draw_masks, block_cells=block_cells), expected)
+
+
+def test_score_against_single_draw():
+    masks = tickets_to_masks([range(1, 16), range(6, 26)])
+    draw = masks_from_matrix(np.array([list(range(11, 26))]))[0]
+    assert score_against_draw(masks, draw).tolist() == [5, 15]
+
+
+def test_draw_matrix_features():
+    matrix = DrawMatrix.from_numbers(
+        np.array([2, 1]),
+        np.array(["2026-01-02", "2026-01-01"], dtype="datetime64[D]"),
+        np.array([list(range(11, 26)), list(range(1, 16))])
+    )
+    assert matrix.contests.tolist() == [1, 2]
+    assert matrix.sums.tolist() == [120, 270]
+    assert matrix.even_counts.tolist() == [7, 7]
+    assert matrix.index_of(2) == 1
+    assert matrix.index_of(3) is None
+    assert len(DrawMatrix.empty()) == 0
+
+
+def test_score_endpoint(seed_results):
+    seed_results([range(1, 16), range(11, 26)])
+    client = TestClient(app)
+    tickets = [list(range(1, 16)), list(range(25, 5, -1))]
+    
+    response = client.post("/api/v1/tickets/score", json={"tickets": tickets, "contest": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["contests_scored"] == 1
+    assert [score["hits"] for score in body["scores"]] == [5, 15]
+    assert body["scores"][1]["numbers"] == list(range(6, 26))
+    
+    body = client.post("/api/v1/tickets/score", json={"tickets": tickets}).json()
+    assert body["contests_scored"] == 2
+    assert body["scores"][0]["distribution"] == {"11": 0, "12": 0, "13": 0, "14": 0, "15": 1}
+    assert body["scores"][1]["distribution"] == {"11": 0, "12": 0, "13": 0, "14": 0, "15": 1}
+    
+    assert client.post("/api/v1/tickets/score", json={"tickets": tickets, "contest": 9}).status_code == 404
+    assert client.post("/api/v1/tickets/score", json={"tickets": [list(range(1, 15))]}).status_code == 422
+    assert client.post("/api/v1/tickets/score", json={"tickets": [[1] * 15]}).status_code == 422
@@ -0,0 +1,148 @@
+"""Tests for the sliding-window limiter and its write-behind flush."""
+
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.database import AsyncSessionLocal
+from app.models.lottery import UserSuggestionUsage
+from app.services import usage_limiter
+from app.services.rate_limit_service import RateLimitService
+from app.services.usage_limiter import MemoryWindowBackend, UsageLimiter, flush_usage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock, monkeypatch):
+    limiter = UsageLimiter(MemoryWindowBackend(clock=clock), limit=3, window_seconds=60)
+    monkeypatch.setattr(usage_limiter, "_limiter_instance", limiter)
+    monkeypatch.setattr(usage_limiter, "_limiter_created", True)
+    return limiter
+
+
+def test_window_slides(limiter, clock):
+    async def scenario():
+        counts = []
+        for _ in range(4):
+            counts.append(await limiter.hit("u"))
+            clock.now += 10
+        # The first hit leaves the window 60s after it was made
+        clock.now += 25
+        counts.append(await limiter.hit("u"))
+        return counts, await limiter.remaining("u")
+    
+    counts, remaining = asyncio.run(scenario())
+    
+    assert counts == [1, 2, 3, None, 3]
+    assert remaining == 0
+
+
+def test_service_counts_without_touching_the_database(db, limiter):
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            service = RateLimitService(session)
+            return [await service.check_and_increment("free") for _ in range(4)]
+    
+    results = asyncio.run(scenario())
+    
+    assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+    assert db.query(UserSuggestionUsage).count() == 0
+    assert limiter.write_behind.pending == 1
+
+
+def test_flush_aggregates_and_adds_to_existing_rows(db, limiter):
+    async def scenario():
+        for user_id in ("a", "a", "b"):
+            await limiter.hit(user_id)
+        first = await flush_usage(limiter)
+        await limiter.hit("a")
+        second = await flush_usage(limiter)
+        return first, second
+    
+    assert asyncio.run(scenario()) == (2, 1)
+    
+    counts = {row.user_id: row.suggestions_count for row in db.query(UserSuggestionUsage).all()}
+    assert counts == {"a": 3, "b": 1}
+    assert db.query(UserSuggestionUsage).filter_by(user_id="a").one().date == date.today()
+
+
+def test_failed_flush_keeps_pending_counts(db, limiter, monkeypatch):
+    class BrokenSession:
+        bind = None
+        
+        async def execute(self, statement):
+            raise RuntimeError("database down")
+        
+        async def rollback(self):
+            pass
+    
+    monkeypatch.setattr("app.services.usage_limiter.dialect_insert", lambda db: sqlite_insert)
+    
+    async def scenario():
+        await limiter.hit("a")
+        with pytest.raises(RuntimeError):
+            await limiter.write_behind.flush(BrokenSession())
+        return limiter.write_behind.pending
+    
+    assert asyncio.run(scenario()) == 1
+
+
+def test_flush_is_chunked_and_requeues_only_failed_chunks(db, limiter, monkeypatch):
+    monkeypatch.setattr(usage_limiter, "UPSERT_CHUNK_SIZE", 2)
+    
+    class FlakySession:
+        """Commits the first chunk, then fails."""
+        
+        def __init__(self, session):
+            self.session = session
+            self.bind = session.bind
+            self.executed = 0
+        
+        async def execute(self, statement):
+            self.executed += 1
+            if self.executed > 1:
+                raise RuntimeError("database down")
+            return await self.session.execute(statement)
+        
+        async def commit(self):
+            await self.session.commit()
+        
+        async def rollback(self):
+            await self.session.rollback()
+    
+    async def scenario():
+        for user_id in ("a", "b", "c", "d", "e"):
+            await limiter.hit(user_id)
+        async with AsyncSessionLocal() as session:
+            with pytest.raises(RuntimeError):
+                await limiter.write_behind.flush(FlakySession(session))
+        pending = limiter.write_behind.pending
+        return pending, await flush_usage(limiter)
+    
+    # Chunks of 2: the first is written, the other 3 rows are retried next time
+    assert asyncio.run(scenario()) == (3, 3)
+    counts = {row.user_id: row.suggestions_count for row in db.query(UserSuggestionUsage).all()}
+    assert counts == {"a": 1, "b": 1, "c": 1, "d": 1, "e": 1}
+
+
+def test_incomplete_window_backend_fails_at_construction():
+    class NoCount(usage_limiter.WindowBackend):
+        async def hit(self, user_id, limit, window_seconds):
+            return 1
+    
+    with pytest.raises(TypeError):
+        NoCount()
@@ -0,0 +1,142 @@
+"""Tests for the suggestion usage retention job."""
+
+import importlib.util
+import os
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.migrations import run_migrations
+from app.models.lottery import UserSuggestionUsage, UserSuggestionUsageMonthly
+from app.services.usage_retention import (
+    DEFAULT_PARTITION,
+    add_months,
+    ensure_future_partitions,
+    month_start,
+    partition_name,
+    rollup_old_usage,
+    run_usage_retention,
+)
+
+TODAY = date(2026, 6, 15)
+
+# Partitioning tests need a PostgreSQL database they may create schemas in
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def _usage(db, user_id, day, count):
+    db.add(UserSuggestionUsage(user_id=user_id, date=day, suggestions_count=count, is_premium=False))
+
+
+def test_old_rows_are_rolled_up_per_user_and_month(db):
+    _usage(db, "a", date(2026, 1, 5), 3)
+    _usage(db, "a", date(2026, 1, 20), 2)
+    _usage(db, "a", date(2026, 2, 1), 1)
+    _usage(db, "b", date(2026, 1, 7), 1)
+    _usage(db, "a", TODAY, 2)  # inside the retention window
+    db.commit()
+    
+    result = rollup_old_usage(db, retention_days=90, batch_size=2, today=TODAY)
+    
+    assert result == {"rows_rolled_up": 4, "monthly_rows_touched": 4, "batches": 2}
+    assert [row.date for row in db.query(UserSuggestionUsage).all()] == [TODAY]
+    monthly = {
+        (row.user_id, row.month): (row.suggestions_count, row.active_days)
+        for row in db.query(UserSuggestionUsageMonthly).all()
+    }
+    assert monthly == {
+        ("a", date(2026, 1, 1)): (5, 2),
+        ("a", date(2026, 2, 1)): (1, 1),
+        ("b", date(2026, 1, 1)): (1, 1),
+    }
+
+
+def test_batches_are_bounded(db):
+    for offset in range(10):
+        _usage(db, f"user-{offset}", date(2025, 1, 1) + timedelta(days=offset), 1)
+    db.commit()
+    
+    first = rollup_old_usage(db, retention_days=30, batch_size=3, max_batches=2, today=TODAY)
+    assert first["rows_rolled_up"] == 6
+    assert db.query(UserSuggestionUsage).count() == 4
+    
+    rest = run_usage_retention(db, today=TODAY)
+    assert rest["partitioned"] is False
+    assert db.query(UserSuggestionUsage).count() == 0
+    assert sum(row.suggestions_count for row in db.query(UserSuggestionUsageMonthly).all()) == 10
+
+
+def test_add_months_wraps_years():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_migration_drops_redundant_user_id_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX ix_user_suggestion_usage_user_id ON user_suggestion_usage (user_id)"))
+    
+    run_migrations(engine)
+    
+    names = {index["name"] for index in inspect(engine).get_indexes("user_suggestion_usage")}
+    assert "ix_user_suggestion_usage_user_id" not in names
+    assert "uq_user_suggestion_usage_user_date" in names
+    engine.dispose()
+
+
+@pytest.fixture
+def postgres_engine():
+    """Engine on a throwaway schema of the TEST_POSTGRES_URL database."""
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    
+    schema = f"usage_retention_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        Base.metadata.create_all(bind=engine)
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def _load_partition_script():
+    path = Path(__file__).parent.parent / "scripts" / "partition_usage_table.py"
+    spec = importlib.util.spec_from_file_location("partition_usage_table", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_new_partition_takes_rows_from_the_default_partition(postgres_engine):
+    script = _load_partition_script()
+    with postgres_engine.begin() as connection:
+        for statement in script.build_statements(connection, keep_legacy=False):
+            connection.execute(text(statement))
+    
+    # Beyond the partitions created by the script: lands in the default partition
+    later = add_months(month_start(date.today()), settings.usage_partition_months_ahead + 2)
+    with Session(postgres_engine) as db:
+        db.add(UserSuggestionUsage(user_id="early", date=later + timedelta(days=3), suggestions_count=1))
+        db.commit()
+        
+        ensured = ensure_future_partitions(db, months_ahead=settings.usage_partition_months_ahead + 2)
+        
+        assert partition_name(later) in ensured
+        assert db.execute(text(f"SELECT COUNT(*) FROM {partition_name(later)}")).scalar() == 1
+        assert db.execute(text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+        assert db.query(UserSuggestionUsage).filter_by(user_id="early").count() == 1
+        # Idempotent once the partitions exist
+        assert ensure_future_partitions(db, months_ahead=settings.usage_partition_months_ahead + 2) == ensured
@@ -0,0 +1,88 @@
+"""Tests for the streaming workbook reader."""
+
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from openpyxl import Workbook
+
+from app.services.storage.xlsx_stream import (
+    iter_contest_records,
+    iter_record_chunks,
+    records_to_arrays,
+)
+
+
+def write_workbook(path, rows, preamble=0, header=None):
+    workbook = Workbook()
+    sheet = workbook.active
+    for _ in range(preamble):
+        sheet.append(["Lotofácil - resultados"])
+    sheet.append(header or ["Concurso", "Data"] + [f"bola {i}" for i in range(1, 16)])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def contest_row(contest, draw_date="01/01/2026"):
+    return [contest, draw_date] + list(range(1, 16))
+
+
+def test_finds_header_after_preamble_rows(tmp_path):
+    path = write_workbook(tmp_path / "h.xlsx", [contest_row(2), contest_row(1, "30/12/2025")], preamble=6)
+    
+    records = list(iter_contest_records(path))
+    
+    assert [r.concurso for r in records] == [2, 1]
+    assert records[1].data == date(2025, 12, 30)
+    assert records[0].numeros == list(range(1, 16))
+
+
+def test_accepts_datetime_cells_and_skips_footer_rows(tmp_path):
+    path = write_workbook(
+        tmp_path / "h.xlsx",
+        [contest_row(1, datetime(2020, 1, 4)), [], ["Total de concursos: 1"]],
+        header=["concurso", "data"] + [f"bola_{i}" for i in range(1, 16)],
+    )
+    
+    records = list(iter_contest_records(path))
+    
+    assert len(records) == 1
+    assert records[0].data == date(2020, 1, 4)
+
+
+def test_missing_header_raises(tmp_path):
+    path = write_workbook(tmp_path / "h.xlsx", [], header=["foo", "bar"])
+    
+    with pytest.raises(ValueError, match="concurso"):
+        list(iter_contest_records(path))
+
+
+def test_records_are_yielded_lazily(tmp_path):
+    path = write_workbook(tmp_path / "h.xlsx", [contest_row(n) for n in range(10, 0, -1)])
+    
+    records = iter_contest_records(path)
+    assert next(records).concurso == 10
+    records.close()
+
+
+def test_records_to_arrays_types(tmp_path):
+    path = write_workbook(tmp_path / "h.xlsx", [contest_row(2, "02/01/2026"), contest_row(1)])
+    
+    arrays = records_to_arrays(iter_contest_records(path))
+    
+    assert arrays["contests"].tolist() == [2, 1]
+    assert arrays["dates"].dtype == np.dtype("datetime64[D]")
+    assert arrays["dates"][0] == np.datetime64("2026-01-02")
+    assert arrays["numbers"].dtype == np.int16
+    assert arrays["numbers"].shape == (2, 15)
+
+
+def test_chunks_cover_every_record(tmp_path):
+    path = write_workbook(tmp_path / "h.xlsx", [contest_row(n) for n in range(7, 0, -1)])
+    
+    chunks = list(iter_record_chunks(path, chunk_size=3))
+    
+    assert [len(c["contests"]) for c in chunks] == [3, 3, 1]
+    assert np.concatenate([c["contests"] for c in chunks]).tolist() == list(range(7, 0, -1))